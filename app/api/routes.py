@@ -10,6 +10,8 @@ from bson.regex import Regex
 import re
 import hashlib
 
+from core.exceptions import HelpUsStorageError
+
 
 
 logger = logging.getLogger(__name__)
@@ -403,7 +405,12 @@ def register_routes(app: Flask) -> None:
         try:
             chatbot = current_app.config['CHATBOT']
             chatbot.save_helpus_data(data)  # 👈 هذه السطر يستخدم الدالة الموجودة في chatbot.py
-            return jsonify({'message': 'تم حفظ البيانات بنجاح', 'status': 'success'})
+            # تُكتب البيانات إلى قاعدة البيانات دفعة واحدة لاحقاً، لذا يؤكد الرد استلامها فقط (202)
+            return jsonify({'message': 'تم استلام البيانات بنجاح', 'status': 'success'}), 202
+        except HelpUsStorageError as e:
+            # تعذر الحفظ في قاعدة البيانات حالياً وامتلأ المخزن المؤقت - لم تُستلم البيانات
+            logger.error(f"تعذر استلام البيانات: {str(e)}")
+            return jsonify({'message': 'تعذر حفظ البيانات حالياً، يرجى المحاولة لاحقاً', 'status': 'error'}), 503
         except Exception as e:
             logger.error(f"خطأ أثناء حفظ البيانات: {str(e)}")
             return jsonify({'message': 'حدث خطأ أثناء الحفظ', 'status': 'error'}), 500    
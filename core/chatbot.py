@@ -2,25 +2,267 @@
 نواة الشاتبوت - المكون المركزي الذي يربط كل الخدمات.
 """
 
+import atexit
 import logging
-import datetime
-from typing import Dict, List, Optional, Any
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Sequence
 import re
 
+from pymongo.errors import BulkWriteError
+
 from utils.location_integration import LocationIntegration
-from services.data.data_loader import DataLoader
+from services.data.data_loader import DataLoader, FORMATTED_PRICE_SUFFIX
 from services.llm.gemini_service import GeminiService
 from services.neighborhood.recommendation import NeighborhoodRecommendationService
-from services.neighborhood.search import FacilitySearchService
+from services.neighborhood.search import FacilitySearchService, FacilityResult
 from services.neighborhood.formatter import ResponseFormatter
 from services.geo.distance_calculator import DistanceCalculator
-from core.exceptions import ServiceInitializationError
+from core.exceptions import ServiceInitializationError, LLMServiceError, QueryClassificationError, HelpUsStorageError
 from utils.query_processor import QueryProcessor
 
 
 
 logger = logging.getLogger(__name__)
 
+# الكلمات المفتاحية التي يجب أن تظهر في أي استفسار عن أفضل/أسوأ حي
+_BW_TRIGGERS = ('افضل', 'أفضل', 'اسوء', 'أسوأ', 'اسوا', 'أسوا', 'احسن', 'أحسن', 'اردء', 'أردأ')
+
+# نمط مُجمّع لكل الكلمات المفتاحية أعلاه يفحص الرسالة في مسح واحد قبل تشغيل الأنماط التفصيلية
+_BW_TRIGGER_RE = re.compile("|".join(map(re.escape, _BW_TRIGGERS)))
+
+# الكلمات الدالة على أفضل/أسوأ في استفسارات الحي، ونهاية الاستفسار (علامة استفهام أو مسافة أو نهاية النص)
+_BEST_WORST_WORDS = r'(?:افضل|أفضل|اسوء|أسوأ|اسوا|أسوا)'
+_QUERY_END = r'(?:[?؟\s]|$)'
+
+# التعبيرات النمطية الدقيقة لاستفسارات أفضل/أسوأ حي (مدمجة في نمط واحد لمسح الرسالة مرة واحدة)
+# جميع الأنماط مثبتة ببداية الرسالة ومجمّعة حسب البادئة المشتركة
+_BEST_WORST_RE = re.compile("|".join(f"(?:{pattern})" for pattern in (
+    # ما هو أفضل/أسوأ حي؟ - ما هي أفضل/أسوأ الأحياء؟ - وش افضل حي؟
+    rf'^(?:ما|ايش|وش|وين) (?:(?:هو )?{_BEST_WORST_WORDS} (?:حي|منطقة|الاحياء|الأحياء)'
+    rf'|(?:هي )?{_BEST_WORST_WORDS} (?:احياء|أحياء|المناطق|مناطق)){_QUERY_END}',
+    
+    # أفضل حي؟ - أحسن حي؟ - أسوأ حي؟ - أردأ حي؟
+    rf'^(?:افضل|أفضل|احسن|أحسن|اسوء|أسوأ|اسوا|أسوا|اردء|أردأ) (?:حي|منطقة){_QUERY_END}',
+    
+    # اقترح لي أفضل حي؟ - أخبرني عن أفضل حي؟
+    rf'^(?:[اأ]قترح (?:لي|علي|) |[اأ]خبرني عن )(?:افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء){_QUERY_END}',
+    
+    # ابغى افضل حي؟ - أبي أفضل حي؟
+    rf'^(?:ابغى افضل|أبغى أفضل|ابي افضل|أبي أفضل) حي{_QUERY_END}',
+)), re.IGNORECASE)
+
+# التحقق من وجود أنماط تشير إلى طلب شخصي أو خاص للمستخدم
+# هذه الأنماط لا تتطلب الرد المحايد لأنها تطلب توصية شخصية
+_CONTEXTUAL_RE = re.compile("|".join(f"(?:{pattern})" for pattern in (
+    r'اقترح لي حي بناء على',  # اقترح لي حي بناء على...
+    r'أقترح لي حي بناء على',  # أقترح لي حي بناء على...
+    r'اقترح لي افضل حي لي',  # اقترح لي افضل حي لي
+    r'أقترح لي أفضل حي لي',  # أقترح لي أفضل حي لي
+    r'افضل حي لي',  # افضل حي لي
+    r'أفضل حي لي',  # أفضل حي لي
+    r'افضل حي يناسبني',  # افضل حي يناسبني
+    r'أفضل حي يناسبني',  # أفضل حي يناسبني
+    r'ماهو افضل حي لي',  # ماهو افضل حي لي
+    r'ما هو أفضل حي لي',  # ما هو أفضل حي لي
+    r'انا عمري \d+ سنة',  # انا عمري .. سنة واريد افضل حي
+    r'عائلة لديها',  # عائلة لديها ... افضل حي
+    r'ابحث عن افضل حي',  # ابحث عن افضل حي
+    r'أبحث عن أفضل حي',  # أبحث عن أفضل حي
+)), re.IGNORECASE)
+
+# الأنماط التي تشير إلى معايير محددة للحي الأفضل
+# هذه الأنماط لا تتطلب الرد المحايد لأنها تسأل عن "أفضل حي" لغرض محدد
+_CRITERIA_RE = re.compile("|".join(f"(?:{pattern})" for pattern in (
+    # أفضل حي للعائلات / للسكن / للاستثمار... إلخ
+    r'(?:افضل|أفضل) حي لل(\w+)',  # أفضل حي للعائلات
+    r'(?:افضل|أفضل) منطقة لل(\w+)',  # أفضل منطقة للسكن
+    r'(?:افضل|أفضل) حي من ناحية ال(\w+)',  # أفضل حي من ناحية الخدمات
+    r'(?:افضل|أفضل) حي من حيث ال(\w+)',  # أفضل حي من حيث الأسعار
+    r'(?:افضل|أفضل) الاحياء (من|في|ب|ل)(\w+)',  # أفضل الأحياء من حيث السكن
+    r'(?:افضل|أفضل) حي (قريب|بالقرب) من',  # أفضل حي قريب من...
+    r'(?:افضل|أفضل) حي (فيه|يوجد فيه|به|يوجد به)',  # أفضل حي فيه مدارس
+    r'(?:افضل|أفضل) حي (بسعر|بمتوسط سعر)',  # أفضل حي بسعر معقول
+)), re.IGNORECASE)
+
+# الكلمات التي تشير إلى رد قصير يعتمد على سياق المحادثة السابقة
+_SHORT_RESPONSE_KEYWORDS = frozenset(("نعم", "المزيد", "اريد", "أريد", "أكمل", "تابع", "اكمل", "استمر", "موافق", "تمام", "اوكي", "اوك", "ok"))
+
+# علامات الترقيم التي تُزال من أطراف كلمات الرد القصير قبل مطابقتها (مثل "نعم،" أو "تمام!")
+_SHORT_RESPONSE_PUNCTUATION = ".,،!?؟؛:"
+
+# أنواع المرافق المدعومة
+_FACILITY_TYPES = ("مدرسة", "مستشفى", "حديقة", "سوبرماركت", "مول")
+
+# ملف CSV المقابل لكل نوع مرفق
+_FACILITY_CSV = {
+    "مدرسة": "المدارس.csv",
+    "مستشفى": "مستشفى.csv",
+    "حديقة": "حدائق.csv",
+    "سوبرماركت": "سوبرماركت.csv",
+    "مول": "مول.csv",
+}
+
+# الاسم الجماعي المعروض لكل نوع مرفق
+_FACILITY_PLURAL = {
+    "مدرسة": "المدارس",
+    "مستشفى": "المستشفيات والمراكز الطبية",
+    "حديقة": "الحدائق والمتنزهات",
+    "سوبرماركت": "محلات السوبرماركت",
+    "مول": "المولات ومراكز التسوق",
+}
+
+# الأسماء الجماعية المستخدمة في طلبات "اعرض جميع ..." ونوع المرفق المقابل لكل منها
+_SHOW_ALL_PLURALS = {plural: facility_type for facility_type, plural in _FACILITY_PLURAL.items()}
+
+# نمط مُجمّع لطلبات عرض جميع المرافق (نوع محدد أو المرافق/الخدمات عامة)
+_SHOW_ALL_RE = re.compile(
+    r"(?:اعرض|ما هي|أرني|أريد|اريد) (?:جميع|كل) "
+    r"(?P<plural>" + "|".join(map(re.escape, _SHOW_ALL_PLURALS)) + r"|المرافق|الخدمات)"
+    r" في (?:حي)? (?P<tail>.*)"
+)
+
+# أنواع الطلبات الخاصة التي تعني "المزيد" من المعلومات عن الحي
+_MORE_TYPES = frozenset(("المزيد", "مزيد", "اكثر", "أكثر"))
+
+# أقسام المرافق في رد "المزيد": (نوع المرفق في خدمة البحث، العنوان المعروض)
+_MORE_SECTIONS = (
+    ("مدرسة", "مدارس"),
+    ("مستشفى", "مستشفيات"),
+    ("حديقة", "حدائق"),
+    ("مول", "مراكز تسوق"),
+    ("سوبرماركت", "سوبرماركت"),
+)
+
+# عدد الخيوط المشتركة لتنفيذ عمليات البحث عن المرافق بالتوازي (نوع واحد لكل خيط)
+_FACILITY_SEARCH_WORKERS = len(_FACILITY_TYPES)
+
+# عدد الخيوط المخصصة لاستعلامات تحديد الموقع بواسطة IP في الخلفية
+_LOCATION_LOOKUP_WORKERS = 4
+
+# أنواع الاستعلامات التي ينتج عنها حي موصى به (ويُضاف إليها معلومات المسافة)
+_NEIGHBORHOOD_QUERY_TYPES = frozenset(('neighborhood_info', 'neighborhood_recommendation'))
+
+# أنواع المرافق المعروضة في رد البحث عن سكن بالقرب من مرافق (بترتيب العرض)
+_HOUSING_FACILITY_TYPES = ("مدرسة", "مستشفى", "حديقة", "مول")
+
+# الاسم المعروض لكل نوع عقار في رد البحث عن سكن (الافتراضي "سكن")
+_PROPERTY_TYPE_DISPLAY = {
+    'شقة': 'شقة',
+    'فيلا': 'فيلا',
+    'أرض': 'أرض',
+    'تجاري': 'عقار تجاري',
+}
+
+# الفعل المعروض لكل نوع معاملة في رد البحث عن سكن (الافتراضي "شراء")
+_TRANSACTION_DISPLAY = {'إيجار': 'استئجار'}
+
+# أسماء أعمدة الإحداثيات المحتملة في بيانات الأحياء (بترتيب الأولوية)
+_LAT_KEYS = ("lat", "latitude", "خط_العرض", "LAT")
+_LON_KEYS = ("lon", "longitude", "خط_الطول", "LON")
+
+# إعدادات قاطع الدائرة لاستدعاءات النموذج اللغوي في المعالجة الاحتياطية
+_LLM_FAIL_MAX = 5
+_LLM_RESET_TIMEOUT = 30.0
+
+# تجميع بيانات استبيان "Help Us" قبل كتابتها دفعة واحدة: الحد الأقصى للدفعة والمهلة القصوى بالثواني
+_HELPUS_BATCH_SIZE = 50
+_HELPUS_FLUSH_INTERVAL = 5.0
+
+# الحد الأقصى لعدد بيانات الاستبيان المنتظرة في الذاكرة (تُرفض البيانات الجديدة عند بلوغه بدلاً من حذف بيانات مستلمة)
+_HELPUS_MAX_BUFFERED = 1000
+
+# الحد الأقصى لمحاولات كتابة مستند استبيان واحد قبل التخلي عنه
+_HELPUS_MAX_ATTEMPTS = 5
+
+# رمز خطأ MongoDB للمفتاح المكرر (المستند محفوظ مسبقاً من محاولة سابقة)
+_DUPLICATE_KEY_ERROR = 11000
+
+# رموز أخطاء الكتابة المؤقتة في MongoDB التي تستحق إعادة المحاولة
+# (انقطاع الشبكة، تبديل الخادم الرئيسي أو إيقافه، انتهاء المهلة)؛ أي رمز آخر خطأ دائم في المستند نفسه
+_TRANSIENT_WRITE_ERROR_CODES = frozenset((6, 7, 50, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436))
+
+# الحد الأقصى لعدد المستخدمين المحتفظ بتاريخ محادثاتهم في الذاكرة (يُحذف الأقدم استخداماً)
+_MAX_TRACKED_USERS = 50_000
+
+# الحد الأقصى لعدد المحادثات المحتفظ بها لكل مستخدم (تُحذف الأقدم تلقائياً)
+_MAX_HISTORY_PER_USER = 50
+
+# الحد الأقصى لعدد الأسماء المعروضة في قائمة واحدة داخل الرد
+_MAX_LISTED_NAMES = 5
+
+_GENERIC_ERROR_RESPONSE = "عذراً، حدث خطأ ما. هل يمكنك إعادة صياغة طلبك من فضلك؟"
+
+def _arabic_list_join(names: Sequence[str], limit: int = _MAX_LISTED_NAMES) -> str:
+    """
+    دمج قائمة أسماء بصيغة عربية: "أ"، "أ وب"، "أ, ب وج".
+    
+    Args:
+        names: الأسماء المراد دمجها
+        limit: الحد الأقصى لعدد الأسماء المدمجة (لتحديد حجم الرد)
+        
+    Returns:
+        str: النص المدمج
+    """
+    names = names[:limit]
+    if not names:
+        return ""
+    if len(names) == 1:
+        return names[0]
+    return f"{', '.join(names[:-1])} و{names[-1]}"
+
+def _formatted_price(info: Dict, key: str) -> str:
+    """
+    الحصول على السعر المنسق لحقل معين، باستخدام القيمة المنسقة مسبقاً عند التحميل إن وجدت.
+    
+    Args:
+        info: معلومات الحي
+        key: اسم حقل السعر
+        
+    Returns:
+        str: السعر المنسق مع العملة
+    """
+    formatted_price = info.get(key + FORMATTED_PRICE_SUFFIX)
+    if formatted_price:
+        return formatted_price
+    return f"{int(info[key]):,} ريال"
+
+@dataclass(slots=True)
+class ComponentsStatus:
+    """
+    حالة تهيئة المكونات الرئيسية للشاتبوت.
+    """
+    data_loader: bool
+    llm_service: bool
+    recommendation_service: bool
+    search_service: bool
+    formatter: bool
+    query_processor: bool
+
+
+@dataclass(slots=True)
+class HelpUsSubmission:
+    """
+    بيانات استبيان "Help Us" منتظرة للكتابة مع عدد محاولات كتابتها.
+    """
+    document: dict
+    attempts: int = 0
+
+
+@dataclass(slots=True, frozen=True)
+class ChatTurn:
+    """
+    محادثة واحدة في تاريخ المستخدم (سجل مضغوط بدلاً من قاموس بمفاتيح نصية).
+    """
+    user: str
+    bot: str
+    timestamp: int  # بالنانوثانية منذ بداية الحقبة
+
+
 class NeighborhoodChatbot:
     """
     الشاتبوت الرئيسي للتوصية بالأحياء والمرافق.
@@ -38,23 +280,28 @@ class NeighborhoodChatbot:
         """
         
         try:
-            # تهيئة محمل البيانات
-            self.data_loader = DataLoader(
-                mongo_uri=config.MONGO_URI,
-                mongo_db=config.MONGO_DB,
-                default_neighborhoods=config.DEFAULT_NEIGHBORHOODS
-            )
+            # تهيئة محمل البيانات وخدمة النموذج اللغوي بالتوازي (مستقلتان وتعتمدان على الشبكة)
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="chatbot-init") as executor:
+                data_loader_future = executor.submit(
+                    DataLoader,
+                    mongo_uri=config.MONGO_URI,
+                    mongo_db=config.MONGO_DB,
+                    default_neighborhoods=config.DEFAULT_NEIGHBORHOODS
+                )
+                llm_service_future = executor.submit(
+                    GeminiService,
+                    api_key=config.GOOGLE_API_KEY,
+                    model_name=config.LLM_MODEL,
+                    safety_settings=config.SAFETY_SETTINGS,
+                    temperature=config.LLM_TEMPERATURE,
+                    top_p=config.LLM_TOP_P,
+                    top_k=config.LLM_TOP_K,
+                    max_output_tokens=config.LLM_MAX_OUTPUT_TOKENS
+                )
+            self.data_loader = data_loader_future.result()
+            self.llm_service = llm_service_future.result()
             
-            # تهيئة خدمة النموذج اللغوي
-            self.llm_service = GeminiService(
-                api_key=config.GOOGLE_API_KEY,
-                model_name=config.LLM_MODEL,
-                safety_settings=config.SAFETY_SETTINGS,
-                temperature=config.LLM_TEMPERATURE,
-                top_p=config.LLM_TOP_P,
-                top_k=config.LLM_TOP_K,
-                max_output_tokens=config.LLM_MAX_OUTPUT_TOKENS
-            )
+            # الخدمات التالية تعتمد على محمل البيانات وتُنشأ بعد اكتماله
             
             # تهيئة خدمة توصيات الأحياء
             self.recommendation_service = NeighborhoodRecommendationService(
@@ -88,8 +335,44 @@ class NeighborhoodChatbot:
             data_loader=self.data_loader
             )
             
-            # إضافة قائمة لتخزين تاريخ المحادثة
-            self.user_chat_histories = {}
+            # إضافة قائمة لتخزين تاريخ المحادثة (LRU محدود بعدد المستخدمين)
+            self.user_chat_histories: "OrderedDict[str, deque[ChatTurn]]" = OrderedDict()
+            self._history_lock = threading.Lock()
+            
+            # نمط مُجمّع لأسماء الأحياء يُبنى عند أول استخدام ويُعاد بناؤه إذا تغيرت القائمة
+            self._neighborhood_regex = None
+            self._neighborhood_regex_source = None
+            
+            # مجمّع خيوط مشترك للبحث المتوازي عن المرافق (بدلاً من إنشاء خيوط لكل طلب)
+            self._facility_executor = ThreadPoolExecutor(
+                max_workers=_FACILITY_SEARCH_WORKERS,
+                thread_name_prefix="facility-search"
+            )
+            atexit.register(self._facility_executor.shutdown, wait=False, cancel_futures=True)
+            
+            # مجمّع خيوط لتحديد موقع المستخدم بواسطة IP بالتوازي مع بقية معالجة الرسالة
+            self._location_executor = ThreadPoolExecutor(
+                max_workers=_LOCATION_LOOKUP_WORKERS,
+                thread_name_prefix="location-lookup"
+            )
+            atexit.register(self._location_executor.shutdown, wait=False, cancel_futures=True)
+            
+            # مفتاحا الإحداثيات في بيانات الأحياء (يُحددان عند أول حساب للمسافة)
+            self._coord_keys = None
+            
+            # حالة قاطع الدائرة للنموذج اللغوي (محمية بقفل لأن الطلبات تُعالج في خيوط متزامنة)
+            self._llm_failures = 0
+            self._llm_open_until = 0.0
+            self._llm_breaker_lock = threading.Lock()
+            
+            # مخزن مؤقت لبيانات استبيان "Help Us" يُكتب إلى قاعدة البيانات بـ insert_many
+            self._helpus_buffer: List[HelpUsSubmission] = []
+            self._helpus_lock = threading.Lock()
+            self._helpus_timer: Optional[threading.Timer] = None
+            atexit.register(self._flush_helpus_at_exit)
+            
+            # حالة المكونات محسوبة مرة واحدة بعد ربطها (تُحدّث عند استبدال أي مكون)
+            self.refresh_components_status()
             
             logger.info("تمت تهيئة شاتبوت الأحياء بنجاح")
             logger.info("تم تهيئة ذاكرة المحادثة")
@@ -109,24 +392,29 @@ class NeighborhoodChatbot:
             user_message: رسالة المستخدم
             bot_response: رد الشاتبوت
         """
-        # إنشاء قائمة محادثات للمستخدم إذا لم تكن موجودة
-        if user_id not in self.user_chat_histories:
-            self.user_chat_histories[user_id] = []
-        
-        # إضافة المحادثة إلى تاريخ هذا المستخدم
-        self.user_chat_histories[user_id].append({
-            'user': user_message,
-            'bot': bot_response,
-            'timestamp': datetime.datetime.now().isoformat()
-        })
-        
-        # الاحتفاظ بآخر 50 رسالة فقط لتجنب استهلاك الذاكرة
-        if len(self.user_chat_histories[user_id]) > 50:
-            self.user_chat_histories[user_id] = self.user_chat_histories[user_id][-50:]
+        # إنشاء سجل محادثات محدود الطول للمستخدم إذا لم يكن موجوداً
+        # (يحذف deque أقدم محادثة تلقائياً عند تجاوز الحد دون نسخ القائمة)
+        # صيانة LRU والإضافة تتم تحت القفل حتى لا يحذف طلب متزامن السجل بين الفحص والاستخدام
+        evicted_user = None
+        with self._history_lock:
+            history = self.user_chat_histories.get(user_id)
+            if history is None:
+                history = self.user_chat_histories[user_id] = deque(maxlen=_MAX_HISTORY_PER_USER)
+                # حذف تاريخ المستخدم الأقدم استخداماً عند تجاوز الحد الأقصى
+                if len(self.user_chat_histories) > _MAX_TRACKED_USERS:
+                    evicted_user, _ = self.user_chat_histories.popitem(last=False)
+            else:
+                self.user_chat_histories.move_to_end(user_id)
+            
+            # إضافة المحادثة إلى تاريخ هذا المستخدم
+            history.append(ChatTurn(user_message, bot_response, time.time_ns()))
+            history_length = len(history)
         
-        logger.debug(f"تم إضافة محادثة جديدة للمستخدم {user_id}. عدد المحادثات: {len(self.user_chat_histories[user_id])}")
+        if evicted_user is not None:
+            logger.debug(f"تم حذف تاريخ المحادثة للمستخدم {evicted_user} لتجاوز الحد الأقصى للمستخدمين")
+        logger.debug(f"تم إضافة محادثة جديدة للمستخدم {user_id}. عدد المحادثات: {history_length}")
         
-    def get_chat_history(self, user_id: str) -> List[Dict]:
+    def get_chat_history(self, user_id: str) -> List[ChatTurn]:
         """
         الحصول على كامل تاريخ المحادثة لمستخدم معين.
         
@@ -134,11 +422,12 @@ class NeighborhoodChatbot:
             user_id: معرف المستخدم
             
         Returns:
-            List[Dict]: قائمة بالمحادثات السابقة
+            List[ChatTurn]: قائمة بالمحادثات السابقة
         """
-        return self.user_chat_histories.get(user_id, [])
+        with self._history_lock:
+            return list(self.user_chat_histories.get(user_id, ()))
 
-    def get_last_n_messages(self, user_id: str, n: int = 5) -> List[Dict]:
+    def get_last_n_messages(self, user_id: str, n: int = 5) -> List[ChatTurn]:
         """
         الحصول على آخر n رسائل من تاريخ المحادثة لمستخدم معين.
         
@@ -147,99 +436,77 @@ class NeighborhoodChatbot:
             n: عدد الرسائل التي يجب استرجاعها
             
         Returns:
-            List[Dict]: قائمة بآخر n رسائل
+            List[ChatTurn]: قائمة بآخر n رسائل
+        """
+        with self._history_lock:
+            history = self.user_chat_histories.get(user_id)
+            if not history:
+                return []
+            return list(itertools.islice(history, max(0, len(history) - n), None))
+
+    def _get_neighborhood_regex(self) -> Optional["re.Pattern"]:
+        """
+        الحصول على نمط مُجمّع لأسماء الأحياء المتاحة (الأطول أولاً لتفضيل التطابق الأدق).
+        يُعاد بناء النمط فقط إذا تغيرت قائمة الأحياء في محمل البيانات.
+        
+        Returns:
+            Optional[re.Pattern]: النمط المُجمّع أو None إذا لم تكن هناك أحياء
+        """
+        neighborhoods = self.data_loader.get_available_neighborhoods()
+        if neighborhoods is not self._neighborhood_regex_source:
+            names = sorted({name for name in neighborhoods if name}, key=len, reverse=True)
+            self._neighborhood_regex = re.compile("|".join(map(re.escape, names))) if names else None
+            self._neighborhood_regex_source = neighborhoods
+        return self._neighborhood_regex
+    
+    def _find_mentioned_neighborhood(self, text: str) -> Optional[str]:
+        """
+        البحث عن أول حي مذكور في النص حسب ترتيب قائمة الأحياء المتاحة.
+        يُستخدم النمط المُجمّع كفلتر سريع: معظم النصوص لا تذكر أي حي فتُرفض بمسح واحد،
+        وعند وجود تطابق يُحدد الحي بترتيب القائمة (كما في المسح الأصلي) لا بموضعه في النص.
+        
+        Args:
+            text: النص المراد البحث فيه
+            
+        Returns:
+            Optional[str]: اسم الحي أو None إذا لم يُذكر أي حي
         """
-        history = self.user_chat_histories.get(user_id, [])
-        return history[-n:] if len(history) >= n else history
+        if not text:
+            return None
+        neighborhood_regex = self._get_neighborhood_regex()
+        if neighborhood_regex is None or not neighborhood_regex.search(text):
+            return None
+        return next((name for name in self.data_loader.get_available_neighborhoods() if name and name in text), None)
 
     def _handle_best_worst_neighborhood_query(self, message: str) -> Optional[str]:
         """
         معالجة استفسارات "أفضل حي" أو "أسوأ حي" بطريقة محايدة
         
         Args:
-            message: رسالة المستخدم
+            message: رسالة المستخدم (بعد إزالة المسافات الطرفية في process_message)
             
         Returns:
             Optional[str]: رد محايد إذا كان الاستعلام عن أفضل/أسوأ حي، أو None إذا لم يكن كذلك
         """
-        # تنظيف الرسالة
-        cleaned_message = message.strip()
-        
-        # قائمة التعبيرات النمطية الدقيقة لاستفسارات أفضل/أسوأ حي
-        best_worst_patterns = [
-            # أنماط سؤال عن أفضل حي
-            r'^(?:ما|ايش|وش|وين) (?:هو |)(افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',  # ما هو أفضل حي؟
-            r'^(?:ما|ايش|وش|وين) (?:هي |)(افضل|أفضل) (?:احياء|أحياء|المناطق|مناطق)(?:\?|؟|$|\s)',  # ما هي أفضل الأحياء؟
-            r'^(?:افضل|أفضل) (?:حي|منطقة)(?:\?|؟|$|\s)',  # أفضل حي؟
-            r'^(?:احسن|أحسن) (?:حي|منطقة)(?:\?|؟|$|\s)',  # أحسن حي؟
-            
-            # أنماط سؤال عن أسوأ حي
-            r'^(?:ما|ايش|وش|وين) (?:هو |)(اسوء|أسوأ|اسوا|أسوا) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',  # ما هو أسوأ حي؟
-            r'^(?:ما|ايش|وش|وين) (?:هي |)(اسوء|أسوأ|اسوا|أسوا) (?:احياء|أحياء|المناطق|مناطق)(?:\?|؟|$|\s)',  # ما هي أسوأ الأحياء؟
-            r'^(?:اسوء|أسوأ|اسوا|أسوا) (?:حي|منطقة)(?:\?|؟|$|\s)',  # أسوأ حي؟
-            r'^(?:اردء|أردأ) (?:حي|منطقة)(?:\?|؟|$|\s)',  # أردأ حي؟
-            
-            # أنماط طلب توصية عامة بأفضل/أسوأ حي
-            r'^اقترح (?:لي|علي|) (?:افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',  # اقترح لي أفضل حي؟
-            r'^أقترح (?:لي|علي|) (?:افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',  # أقترح لي أفضل حي؟
-            r'^اخبرني عن (?:افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',  # اخبرني عن أفضل حي؟
-            r'^أخبرني عن (?:افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',  # أخبرني عن أفضل حي؟
-            
-            # أنماط طلب مباشر
-            r'^وش افضل حي(?:\?|؟|$|\s)',  # وش افضل حي؟
-            r'^وش أفضل حي(?:\?|؟|$|\s)',  # وش أفضل حي؟
-            r'^ابغى افضل حي(?:\?|؟|$|\s)',  # ابغى افضل حي؟ 
-            r'^أبغى أفضل حي(?:\?|؟|$|\s)',  # أبغى أفضل حي؟
-            r'^ابي افضل حي(?:\?|؟|$|\s)',  # ابي افضل حي؟
-            r'^أبي أفضل حي(?:\?|؟|$|\s)',  # أبي أفضل حي؟
-            
-        ]
-        
-        # التحقق من وجود أنماط تشير إلى طلب شخصي أو خاص للمستخدم
-        # هذه الأنماط لا تتطلب الرد المحايد لأنها تطلب توصية شخصية
-        contextual_patterns = [
-            r'اقترح لي حي بناء على',  # اقترح لي حي بناء على...
-            r'أقترح لي حي بناء على',  # أقترح لي حي بناء على...
-            r'اقترح لي افضل حي لي',  # اقترح لي افضل حي لي
-            r'أقترح لي أفضل حي لي',  # أقترح لي أفضل حي لي
-            r'افضل حي لي',  # افضل حي لي
-            r'أفضل حي لي',  # أفضل حي لي
-            r'افضل حي يناسبني',  # افضل حي يناسبني
-            r'أفضل حي يناسبني',  # أفضل حي يناسبني
-            r'ماهو افضل حي لي',  # ماهو افضل حي لي
-            r'ما هو أفضل حي لي',  # ما هو أفضل حي لي
-            r'انا عمري \d+ سنة',  # انا عمري .. سنة واريد افضل حي
-            r'عائلة لديها',  # عائلة لديها ... افضل حي
-            r'ابحث عن افضل حي',  # ابحث عن افضل حي
-            r'أبحث عن أفضل حي',  # أبحث عن أفضل حي
-        ]
-        
-        # الأنماط التي تشير إلى معايير محددة للحي الأفضل
-        # هذه الأنماط لا تتطلب الرد المحايد لأنها تسأل عن "أفضل حي" لغرض محدد
-        criteria_patterns = [
-            # أفضل حي للعائلات / للسكن / للاستثمار... إلخ
-            r'(?:افضل|أفضل) حي لل(\w+)',  # أفضل حي للعائلات
-            r'(?:افضل|أفضل) منطقة لل(\w+)',  # أفضل منطقة للسكن
-            r'(?:افضل|أفضل) حي من ناحية ال(\w+)',  # أفضل حي من ناحية الخدمات
-            r'(?:افضل|أفضل) حي من حيث ال(\w+)',  # أفضل حي من حيث الأسعار
-            r'(?:افضل|أفضل) الاحياء (من|في|ب|ل)(\w+)',  # أفضل الأحياء من حيث السكن
-            r'(?:افضل|أفضل) حي (قريب|بالقرب) من',  # أفضل حي قريب من...
-            r'(?:افضل|أفضل) حي (فيه|يوجد فيه|به|يوجد به)',  # أفضل حي فيه مدارس
-            r'(?:افضل|أفضل) حي (بسعر|بمتوسط سعر)',  # أفضل حي بسعر معقول
-        ]
-        
+        # الرسالة منظفة مسبقاً في process_message، فلا حاجة لنسخة جديدة منها
+        cleaned_message = message
+
+        # تخطي جميع فحوصات التعبيرات النمطية إذا لم تحتوِ الرسالة على أي كلمة مفتاحية
+        if not _BW_TRIGGER_RE.search(cleaned_message):
+            return None
+
         # التحقق مما إذا كان للسؤال سياق شخصي أو متطلبات محددة
-        if any(re.search(pattern, cleaned_message, re.IGNORECASE) for pattern in contextual_patterns):
+        if _CONTEXTUAL_RE.search(cleaned_message):
             logger.info("تم اكتشاف استفسار شخصي عن الحي - المتابعة إلى المعالجة العادية")
             return None
             
         # التحقق مما إذا كان السؤال يحتوي على معايير محددة
-        if any(re.search(pattern, cleaned_message, re.IGNORECASE) for pattern in criteria_patterns):
+        if _CRITERIA_RE.search(cleaned_message):
             logger.info("تم اكتشاف استفسار عن أفضل حي مع معايير محددة - المتابعة إلى المعالجة العادية")
             return None
         
         # التحقق من وجود نمط من أنماط أفضل/أسوأ حي العامة
-        if any(re.search(pattern, cleaned_message, re.IGNORECASE) for pattern in best_worst_patterns):
+        if _BEST_WORST_RE.search(cleaned_message):
             logger.info("تم التعرف على استفسار عن أفضل/أسوأ حي بشكل عام")
             
             # الرد المحايد
@@ -283,11 +550,7 @@ class NeighborhoodChatbot:
                 return best_worst_response
             
             # التحقق من الأحياء المذكورة في الرسالة
-            mentioned_neighborhood = None
-            for neighborhood in self.data_loader.get_available_neighborhoods():
-                if neighborhood in cleaned_message:
-                    mentioned_neighborhood = neighborhood
-                    break
+            mentioned_neighborhood = self._find_mentioned_neighborhood(cleaned_message)
                     
             # التحقق مما إذا كان طلب عرض جميع المرافق في حي محدد
             if mentioned_neighborhood:
@@ -309,6 +572,12 @@ class NeighborhoodChatbot:
             # متغير لتخزين الحي الموصى به إذا وجد
             recommended_neighborhood = None
             
+            # بدء تحديد موقع المستخدم بواسطة IP مبكراً إذا لم تُرسل إحداثياته وكان الرد سيتضمن مسافة إلى حي،
+            # بحيث يتداخل انتظار الشبكة مع التوصية وتنسيق الرد بدلاً من أن يُضاف بعدهما
+            location_future = None
+            if (user_latitude is None or user_longitude is None) and query_analysis['query_type'] in _NEIGHBORHOOD_QUERY_TYPES:
+                location_future = self.location_integration.prefetch_user_location(self._location_executor)
+            
             # معالجة البحث عن سكن قرب مرافق محددة
             if query_analysis['query_type'] == 'housing_search' and 'proximity_facilities' in query_analysis['entities']:
                 response = self._handle_housing_with_facilities(query_analysis, cleaned_message, user_latitude, user_longitude)
@@ -341,87 +610,42 @@ class NeighborhoodChatbot:
                     recommended_neighborhood = neighborhood_name
                     if facility_type:
                         # إذا تم تحديد نوع المرفق، عرض معلومات مختصرة
-                        facility_info = self.search_service.find_facilities_in_neighborhood(neighborhood_name, facility_type)
-                        response = self._summarize_facilities(facility_info, neighborhood_name, facility_type)
+                        facility_result = self.search_service.find_facility_result(neighborhood_name, facility_type)
+                        response = self._summarize_facilities(facility_result, neighborhood_name, facility_type)
                     else:
                         # عرض نظرة عامة عن المرافق
-                        response = f"إليك أبرز المرافق في {neighborhood_name}:\n\n"
+                        parts = [f"إليك أبرز المرافق في {neighborhood_name}:\n\n"]
                         
-                        # إضافة 1-2 مرفق من كل نوع
-                        for facility_type in ["مدرسة", "مستشفى", "حديقة", "سوبرماركت", "مول"]:
-                            facility_info = self.search_service.find_facilities_in_neighborhood(neighborhood_name, facility_type)
-                            if "لم يتم العثور" not in facility_info:
+                        # إضافة 1-2 مرفق من كل نوع (البحث عن جميع الأنواع بالتوازي)
+                        for facility_type, facility_result in self._find_all_facilities(neighborhood_name):
+                            if facility_result.found:
                                 # استخراج 1-2 مرفق فقط
-                                summarized = self._extract_sample_facilities(facility_info, 2)
+                                summarized = self._extract_sample_facilities(facility_result, 2)
                                 if summarized:
-                                    facility_plural = {
-                                        "مدرسة": "المدارس",
-                                        "مستشفى": "المستشفيات والمراكز الطبية",
-                                        "حديقة": "الحدائق والمتنزهات",
-                                        "سوبرماركت": "محلات السوبرماركت",
-                                        "مول": "المولات ومراكز التسوق"
-                                    }.get(facility_type, facility_type)
-                                    response += f"أبرز {facility_plural}:\n{summarized}\n\n"
+                                    facility_plural = _FACILITY_PLURAL.get(facility_type, facility_type)
+                                    parts.append(f"أبرز {facility_plural}:\n{summarized}\n\n")
                         
-                        response += "للاطلاع على قائمة كاملة بالمرافق، يمكنك أن تسأل عن نوع محدد مثل 'أين توجد المدارس في هذا الحي؟'"
+                        parts.append("للاطلاع على قائمة كاملة بالمرافق، يمكنك أن تسأل عن نوع محدد مثل 'أين توجد المدارس في هذا الحي؟'")
+                        response = "".join(parts)
                 else:
                     response = "يرجى تحديد الحي الذي تريد معرفة المرافق فيه."
             
-            elif query_analysis['query_type'] == 'facility_location':
-                # سؤال عن موقع مرفق محدد
-                facility_name = query_analysis['entities'].get('facility_name')
-                facility_type = query_analysis['entities'].get('facility_type')
-                
-                if facility_name and facility_type:
-                    # تحديد ملف CSV المناسب
-                    csv_file = None
-                    if facility_type == 'مدرسة':
-                        csv_file = "المدارس.csv"
-                    elif facility_type == 'مستشفى':
-                        csv_file = "مستشفى.csv"
-                    elif facility_type == 'حديقة':
-                        csv_file = "حدائق.csv"
-                    elif facility_type == 'سوبرماركت':
-                        csv_file = "سوبرماركت.csv"
-                    elif facility_type == 'مول':
-                        csv_file = "مول.csv"
-                    
-                    if csv_file:
-                        response = self.search_service.search_entity(csv_file, facility_name)
-            
-            elif query_analysis['query_type'] == 'facility_search':
-                # بحث عن مرفق باسمه
+            elif query_analysis['query_type'] in ('facility_location', 'facility_search'):
+                # سؤال عن موقع مرفق محدد أو بحث عن مرفق باسمه
                 facility_name = query_analysis['entities'].get('facility_name')
                 facility_type = query_analysis['entities'].get('facility_type')
                 
                 if facility_name and facility_type:
-                    # تحديد ملف CSV المناسب
-                    csv_file = None
-                    if facility_type == 'مدرسة':
-                        csv_file = "المدارس.csv"
-                    elif facility_type == 'مستشفى':
-                        csv_file = "مستشفى.csv"
-                    elif facility_type == 'حديقة':
-                        csv_file = "حدائق.csv"
-                    elif facility_type == 'سوبرماركت':
-                        csv_file = "سوبرماركت.csv"
-                    elif facility_type == 'مول':
-                        csv_file = "مول.csv"
-                    
-                    if csv_file:
-                        response = self.search_service.search_entity(csv_file, facility_name)
+                    response = self._search_facility_by_name(facility_type, facility_name)
             else:
                 # إذا لم يتم التعرف على نوع الاستعلام بواسطة معالج الاستعلامات، 
                 # استخدم آلية المعالجة القديمة
-                response = self._fallback_processing(cleaned_message)
+                response = self._fallback_processing(cleaned_message, query_analysis)
                     
                 # التحقق مما إذا كان لدينا حي موصى به من المعالجة الاحتياطية
                 if "حي" in response:
                     # محاولة استخراج اسم الحي من الرسالة
-                    for neighborhood in self.data_loader.get_available_neighborhoods():
-                        if neighborhood in response:
-                            recommended_neighborhood = neighborhood
-                            break
+                    recommended_neighborhood = self._find_mentioned_neighborhood(response)
             
             # إذا تم التوصية بحي، قم بحساب وإضافة معلومات المسافة
             if recommended_neighborhood:
@@ -432,6 +656,12 @@ class NeighborhoodChatbot:
                     distance = self._calculate_distance_to_neighborhood(
                         recommended_neighborhood, user_latitude, user_longitude
                     )
+                elif location_future is not None:
+                    # استخدام الموقع الذي بدأ تحديده بواسطة IP في الخلفية
+                    ip_latitude, ip_longitude = location_future.result()
+                    distance = self.location_integration.calculate_distance_to_neighborhood(
+                        recommended_neighborhood, ip_latitude, ip_longitude
+                    )
                 else:
                     # محاولة استخدام طريقة تحديد الموقع القائمة على IP كاحتياطي
                     distance = self.location_integration.calculate_distance_to_neighborhood(recommended_neighborhood)
@@ -446,13 +676,29 @@ class NeighborhoodChatbot:
             
             return response
                 
-        except Exception as e:
-            logger.error(f"خطأ في معالجة الرسالة: {str(e)}")
-            response = "عذراً، حدث خطأ ما. هل يمكنك إعادة صياغة طلبك من فضلك؟"
+        except Exception:
+            logger.exception("خطأ في معالجة الرسالة")
+            response = _GENERIC_ERROR_RESPONSE
             self.add_to_history(user_id, user_message, response)
             return response
 
 
+    def _search_facility_by_name(self, facility_type: str, facility_name: str) -> str:
+        """
+        البحث عن مرفق باسمه في ملف CSV الخاص بنوعه، أو في جميع الملفات إذا كان النوع غير معروف.
+        
+        Args:
+            facility_type: نوع المرفق
+            facility_name: اسم المرفق
+            
+        Returns:
+            str: نتيجة البحث منسقة
+        """
+        csv_file = _FACILITY_CSV.get(facility_type)
+        if csv_file:
+            return self.search_service.search_entity(csv_file, facility_name)
+        return self.search_service.search_all_facilities(facility_name)
+
     def _handle_short_response(self, user_id: str, cleaned_message: str) -> Optional[str]:
         """
         معالجة الردود القصيرة بناءً على سياق المحادثة السابقة
@@ -464,43 +710,43 @@ class NeighborhoodChatbot:
         Returns:
             Optional[str]: الرد المناسب أو None إذا لم تكن رسالة قصيرة
         """
-        short_response_keywords = ["نعم", "المزيد", "اريد", "أريد", "أكمل", "تابع", "اكمل", "استمر", "موافق", "تمام", "اوكي", "اوك", "ok"]
+        # الرسائل القصيرة لا تتجاوز كلمتين (يكفي تقسيم أول ثلاث كلمات للحكم على ذلك)
+        tokens = cleaned_message.lower().split(maxsplit=2)
+        if len(tokens) > 2:
+            return None
         
-        if len(cleaned_message.split()) <= 2 and any(keyword in cleaned_message.lower() for keyword in short_response_keywords):
+        # مطابقة كلمات الرسالة مع مجموعة كلمات الرد القصير (بحث في جدول تجزئة لكل كلمة)
+        if not _SHORT_RESPONSE_KEYWORDS.isdisjoint(token.strip(_SHORT_RESPONSE_PUNCTUATION) for token in tokens):
             # استخراج المحادثة السابقة - زيادة عدد الرسائل المسترجعة
             previous_messages = self.get_last_n_messages(user_id, 3)  # استرجاع آخر 3 رسائل بدلاً من 2
             
             if len(previous_messages) >= 1:
-                last_bot_message = previous_messages[-1].get('bot', '')
+                last_bot_message = previous_messages[-1].bot
                 
                 # تخزين الحي المذكور في سياق المحادثة
                 context_neighborhood = None
                 
                 # البحث عن حي محدد في الرسالة السابقة للبوت
-                for neighborhood in self.data_loader.get_available_neighborhoods():
-                    if neighborhood in last_bot_message:
-                        context_neighborhood = neighborhood
-                        logger.info(f"تم العثور على حي '{context_neighborhood}' في المحادثة السابقة")
-                        break
+                context_neighborhood = self._find_mentioned_neighborhood(last_bot_message)
+                if context_neighborhood:
+                    logger.info(f"تم العثور على حي '{context_neighborhood}' في المحادثة السابقة")
                 
                 # إذا لم يتم العثور على حي في رسالة البوت الأخيرة، ابحث في رسالة البوت قبل الأخيرة (إذا وجدت)
                 if context_neighborhood is None and len(previous_messages) >= 2:
-                    second_last_bot_message = previous_messages[-2].get('bot', '')
-                    for neighborhood in self.data_loader.get_available_neighborhoods():
-                        if neighborhood in second_last_bot_message:
-                            context_neighborhood = neighborhood
-                            logger.info(f"تم العثور على حي '{context_neighborhood}' في الرسالة قبل الأخيرة")
-                            break
+                    second_last_bot_message = previous_messages[-2].bot
+                    context_neighborhood = self._find_mentioned_neighborhood(second_last_bot_message)
+                    if context_neighborhood:
+                        logger.info(f"تم العثور على حي '{context_neighborhood}' في الرسالة قبل الأخيرة")
                 
                 # الآن لدينا سياق الحي، استخدمه لمعالجة الطلبات المتعلقة "بهذا الحي"
                 if context_neighborhood:
-                    # تحديد أنواع المرافق المطلوبة
-                    facility_types = ["مدرسة", "مستشفى", "حديقة", "سوبرماركت", "مول"]
                     requested_facility = None
                     
                     # البحث عن الكلمات المتعلقة بالمرافق في رسالة المستخدم
-                    for facility in facility_types:
-                        if facility in cleaned_message or facility + "س" in cleaned_message or "مرافق" in cleaned_message or "مدارس" in cleaned_message:
+                    # (فحص "مرافق" و"مدارس" لا يعتمد على نوع المرفق، لذا يُحسب مرة واحدة)
+                    mentions_general = "مرافق" in cleaned_message or "مدارس" in cleaned_message
+                    for facility in _FACILITY_TYPES:
+                        if mentions_general or facility in cleaned_message or facility + "س" in cleaned_message:
                             requested_facility = facility
                             break
                     
@@ -510,24 +756,23 @@ class NeighborhoodChatbot:
                     
                     if "المرافق" in cleaned_message or "كل المرافق" in cleaned_message:
                         # عرض معلومات عامة عن المرافق في الحي المحفوظ في السياق
-                        response = f"إليك أبرز المرافق في {context_neighborhood}:\n\n"
+                        parts = [f"إليك أبرز المرافق في {context_neighborhood}:\n\n"]
                         
-                        # إضافة 1-2 مرفق من كل نوع
-                        for facility_type in facility_types:
-                            facility_info = self.search_service.find_facilities_in_neighborhood(context_neighborhood, facility_type)
-                            if "لم يتم العثور" not in facility_info:
+                        # إضافة 1-2 مرفق من كل نوع (البحث عن جميع الأنواع بالتوازي)
+                        for facility_type, facility_result in self._find_all_facilities(context_neighborhood):
+                            if facility_result.found:
                                 # استخراج 1-2 مرفق فقط
-                                summarized = self._extract_sample_facilities(facility_info, 2)
+                                summarized = self._extract_sample_facilities(facility_result, 2)
                                 if summarized:
-                                    response += f"• {summarized}\n\n"
+                                    parts.append(f"• {summarized}\n\n")
                         
-                        response += f"لعرض قائمة كاملة بالمرافق، يمكنك أن تسأل عن نوع محدد مثل 'أين توجد المدارس في {context_neighborhood}؟'"
-                        return response
+                        parts.append(f"لعرض قائمة كاملة بالمرافق، يمكنك أن تسأل عن نوع محدد مثل 'أين توجد المدارس في {context_neighborhood}؟'")
+                        return "".join(parts)
                     
                     elif requested_facility:
                         # عرض معلومات مختصرة عن أهم المرافق من النوع المطلوب في الحي المحفوظ في السياق
-                        facility_info = self.search_service.find_facilities_in_neighborhood(context_neighborhood, requested_facility)
-                        summarized_facilities = self._summarize_facilities(facility_info, context_neighborhood, requested_facility)
+                        facility_result = self.search_service.find_facility_result(context_neighborhood, requested_facility)
+                        summarized_facilities = self._summarize_facilities(facility_result, context_neighborhood, requested_facility)
                         return summarized_facilities
                     
                     else:
@@ -535,9 +780,8 @@ class NeighborhoodChatbot:
                         return self.formatter.format_neighborhood_response(context_neighborhood)
                 
                 # البحث عن مرافق محددة في الرسالة السابقة
-                facility_types = ["مدرسة", "مستشفى", "حديقة", "سوبرماركت", "مول"]
                 facility_mentioned = None
-                for facility in facility_types:
+                for facility in _FACILITY_TYPES:
                     if facility in last_bot_message:
                         facility_mentioned = facility
                         break
@@ -564,12 +808,45 @@ class NeighborhoodChatbot:
             # لم يتم التعرف على هذه الرسالة كرد قصير
             return None
         
-    def _summarize_facilities(self, facility_info: str, neighborhood_name: str, facility_type: str) -> str:
+    def _find_facilities_parallel(self, neighborhood_name: str, facility_types) -> List[tuple]:
+        """
+        البحث عن عدة أنواع من المرافق في حي معين بالتوازي.
+        
+        Args:
+            neighborhood_name: اسم الحي
+            facility_types: أنواع المرافق المطلوبة
+            
+        Returns:
+            List[tuple]: قائمة (نوع المرفق، نتيجة البحث) بنفس ترتيب الأنواع المطلوبة
+        """
+        facility_types = list(facility_types)
+        results = self._facility_executor.map(
+            lambda facility_type: self.search_service.find_facility_result(neighborhood_name, facility_type),
+            facility_types
+        )
+        return list(zip(facility_types, results))
+
+    def _find_all_facilities(self, neighborhood_name: str) -> List[tuple]:
+        """
+        البحث عن جميع أنواع المرافق في حي معين بالتوازي.
+        يُتخطى البحث كلياً إذا لم يظهر الحي في مواقع أي من ملفات المرافق.
+        
+        Args:
+            neighborhood_name: اسم الحي
+            
+        Returns:
+            List[tuple]: قائمة (نوع المرفق، نتيجة البحث)، أو قائمة فارغة إذا لا توجد مرافق في الحي
+        """
+        if not self.search_service.has_any_facilities(neighborhood_name):
+            return []
+        return self._find_facilities_parallel(neighborhood_name, _FACILITY_TYPES)
+
+    def _summarize_facilities(self, facility_result: FacilityResult, neighborhood_name: str, facility_type: str) -> str:
         """
         تلخيص معلومات المرافق وعرض عدد قليل منها
         
         Args:
-            facility_info: النص الكامل لمعلومات المرافق
+            facility_result: نتيجة البحث عن المرافق
             neighborhood_name: اسم الحي
             facility_type: نوع المرفق
             
@@ -577,79 +854,41 @@ class NeighborhoodChatbot:
             str: معلومات ملخصة عن المرافق
         """
         # التحقق من وجود مرافق
-        if "لم يتم العثور" in facility_info:
+        if not facility_result.found:
             return f"لم يتم العثور على {facility_type} في {neighborhood_name}."
         
         # تحديد الاسم الجماعي المناسب للمرفق
-        facility_plural = {
-            "مدرسة": "المدارس",
-            "مستشفى": "المستشفيات والمراكز الطبية",
-            "حديقة": "الحدائق والمتنزهات",
-            "سوبرماركت": "محلات السوبرماركت",
-            "مول": "المولات ومراكز التسوق"
-        }.get(facility_type, facility_type)
+        facility_plural = _FACILITY_PLURAL.get(facility_type, facility_type)
         
         # عنوان الرد
-        response = f"إليك أبرز {facility_plural} في حي {neighborhood_name}:\n\n"
+        parts = [f"إليك أبرز {facility_plural} في حي {neighborhood_name}:\n\n"]
         
         # استخراج 2-3 مرافق فقط
-        sample_facilities = self._extract_sample_facilities(facility_info, 2)
+        sample_facilities = self._extract_sample_facilities(facility_result, 2)
         if sample_facilities:
-            response += sample_facilities + "\n\n"
-        
-        # استخراج عدد المرافق الكلي من النص
-        total_count = 0
-        count_match = re.search(r'\((\d+)\)', facility_info)
-        if count_match:
-            total_count = int(count_match.group(1))
+            parts.append(sample_facilities + "\n\n")
         
         # إضافة معلومات إحصائية
-        if total_count > 2:
-            response += f"يوجد إجمالي {total_count} من {facility_plural} في الحي.\n"
+        if facility_result.count > 2:
+            parts.append(f"يوجد إجمالي {facility_result.count} من {facility_plural} في الحي.\n")
         
         # إضافة تلميح
-        response += f"لعرض القائمة الكاملة، اكتب 'اعرض جميع {facility_plural} في {neighborhood_name}'"
+        parts.append(f"لعرض القائمة الكاملة، اكتب 'اعرض جميع {facility_plural} في {neighborhood_name}'")
         
-        return response
+        return "".join(parts)
 
-    def _extract_sample_facilities(self, facility_info: str, count: int = 1) -> str:
+    def _extract_sample_facilities(self, facility_result: FacilityResult, count: int = 1) -> str:
         """
-        استخراج عدد محدد من المرافق من النص الكامل
+        استخراج عدد محدد من أسماء المرافق من نتيجة البحث
         
         Args:
-            facility_info: النص الكامل لمعلومات المرافق
+            facility_result: نتيجة البحث عن المرافق
             count: عدد المرافق المراد استخراجها
             
         Returns:
             str: نص يحتوي على عينة من المرافق
         """
-        # تقسيم النص إلى سطور
-        lines = facility_info.split('\n')
-        
-        # البحث عن السطور التي تبدأ بـ "•" (العلامة النقطية)
-        bullet_lines = [line for line in lines if line.strip().startswith('•')]
-        
-        # اختيار عدد محدد من السطور
-        selected_lines = bullet_lines[:1] if bullet_lines else []
-        
-        # استخراج اسم المرفق فقط (بدون العنوان أو أي تفاصيل أخرى)
-        result_lines = []
-        for line in selected_lines:
-            line = line.strip()
-            # حذف العنوان (بعد علامة '|' أو ':')
-            if '|' in line:
-                facility_name = line.split('|')[0]
-            elif ':' in line:
-                facility_name = line.split(':')[0]
-            else:
-                facility_name = line
-                
-            # تنظيف الاسم وإزالة العلامة النقطية في البداية
-            facility_name = facility_name.replace('•', '').strip()
-            result_lines.append(facility_name)
-        
-        # دمج النتائج
-        return '\n'.join(result_lines)
+        return '\n'.join(facility_result.names[:count])
 
     def _handle_show_all_facilities(self, user_message: str, neighborhood_name: str) -> Optional[str]:
         """
@@ -662,137 +901,43 @@ class NeighborhoodChatbot:
         Returns:
             Optional[str]: الرد المناسب أو None إذا لم يكن طلب عرض جميع المرافق
         """
-        # قائمة بأنواع المرافق وأسمائها الجماعية
-        facility_types = {
-            "مدرسة": "المدارس",
-            "مستشفى": "المستشفيات والمراكز الطبية",
-            "حديقة": "الحدائق والمتنزهات",
-            "سوبرماركت": "محلات السوبرماركت",
-            "مول": "المولات ومراكز التسوق"
-        }
-        
-        # البحث عن أنماط مثل "اعرض جميع المدارس في حي الياسمين"
-        for facility_type, facility_plural in facility_types.items():
-            # أنماط مختلفة للطلب
-            patterns = [
-                f"اعرض (?:جميع|كل) {facility_plural} في (?:حي)? {neighborhood_name}",
-                f"ما هي (?:جميع|كل) {facility_plural} في (?:حي)? {neighborhood_name}",
-                f"أرني (?:جميع|كل) {facility_plural} في (?:حي)? {neighborhood_name}",
-                f"أريد (?:جميع|كل) {facility_plural} في (?:حي)? {neighborhood_name}",
-                f"اريد (?:جميع|كل) {facility_plural} في (?:حي)? {neighborhood_name}"
-            ]
-            
-            for pattern in patterns:
-                if re.search(pattern, user_message, re.IGNORECASE):
-                    logger.info(f"تم تحديد طلب عرض جميع {facility_plural} في {neighborhood_name}")
-                    # البحث عن المرافق من هذا النوع في الحي
-                    facility_info = self.search_service.find_facilities_in_neighborhood(neighborhood_name, facility_type)
-                    return facility_info
-        
-        # البحث عن طلب عام لجميع المرافق مثل "اعرض جميع المرافق في حي الياسمين"
-        general_patterns = [
-            f"اعرض (?:جميع|كل) (?:المرافق|الخدمات) في (?:حي)? {neighborhood_name}",
-            f"ما هي (?:جميع|كل) (?:المرافق|الخدمات) في (?:حي)? {neighborhood_name}",
-            f"أرني (?:جميع|كل) (?:المرافق|الخدمات) في (?:حي)? {neighborhood_name}",
-            f"أريد (?:جميع|كل) (?:المرافق|الخدمات) في (?:حي)? {neighborhood_name}",
-            f"اريد (?:جميع|كل) (?:المرافق|الخدمات) في (?:حي)? {neighborhood_name}"
-        ]
-        
-        for pattern in general_patterns:
-            if re.search(pattern, user_message, re.IGNORECASE):
-                logger.info(f"تم تحديد طلب عرض جميع المرافق في {neighborhood_name}")
-                # جمع معلومات عن جميع أنواع المرافق
-                all_facilities = []
-                for facility_type in facility_types.keys():
-                    facility_info = self.search_service.find_facilities_in_neighborhood(neighborhood_name, facility_type)
-                    if "لم يتم العثور" not in facility_info:
-                        all_facilities.append(facility_info)
-                
-                # دمج المعلومات
-                if all_facilities:
-                    response = f"جميع المرافق المتوفرة في {neighborhood_name}:\n\n"
-                    response += "\n\n".join(all_facilities)
-                    return response
-                else:
-                    return f"عذراً، لم يتم العثور على معلومات عن المرافق في {neighborhood_name}."
+        # توحيد حالة الأحرف مرة واحدة بدلاً من المطابقة غير الحساسة لحالة الأحرف
+        msg = user_message.lower()
         
-        # لم يتم تحديد طلب عرض جميع المرافق
-        return None
-
-    def _build_detailed_neighborhood_response(self, neighborhood_name: str) -> str:
-        """
-        بناء استجابة مفصلة للحي تتضمن المرافق والمزايا
+        # جميع صيغ الطلب تحتوي على "جميع" أو "كل" - تخطي فحص النمط إذا لم توجد أي منهما
+        if "جميع" not in msg and "كل" not in msg:
+            return None
         
-        Args:
-            neighborhood_name: اسم الحي
-            
-        Returns:
-            str: الاستجابة المفصلة
-        """
-        # البحث عن المرافق في الحي
-        facilities_info = self.search_service.find_facilities_in_neighborhood(neighborhood_name, None)
-        
-        # دمج المعلومات مع بعض التفاصيل الإضافية
-        extra_info = f"إليك المزيد من المعلومات عن {neighborhood_name}:\n\n"
-        
-        # إضافة معلومات المزايا من قاعدة البيانات
-        benefits = self.data_loader.get_neighborhood_benefits(neighborhood_name)
-        if benefits and len(benefits) > 0:
-            extra_info += "تجارب السكان السابقين:\n"
-            for i, benefit in enumerate(benefits[:3], 1):  # أخذ أول 3 مزايا فقط
-                extra_info += f"{i}. {benefit}\n"
-            extra_info += "\n"
-        
-        # إضافة معلومات المرافق
-        if "لم يتم العثور" not in facilities_info:
-            extra_info += facilities_info
-        else:
-            extra_info += "المرافق المتوفرة في الحي:\n"
-            
-            # البحث عن المرافق المختلفة بشكل منفصل
-            for facility_type in ["مدرسة", "مستشفى", "حديقة", "سوبرماركت", "مول"]:
-                facility_info = self.search_service.find_facilities_in_neighborhood(neighborhood_name, facility_type)
-                if "لم يتم العثور" not in facility_info:
-                    extra_info += f"\n{facility_info}\n"
-        
-        # إضافة معلومات عن الأسعار إذا كانت متاحة
-        neighborhood_info = self.data_loader.find_neighborhood_info(neighborhood_name)
-        if neighborhood_info:
-            price_info = []
-            
-            # البحث عن معلومات الأسعار - تحديث أسماء الحقول لتتوافق مع البيانات الفعلية
-            price_fields = [
-                {"key": "price_of_meter_Apartment", "label": "سعر المتر للشقق"},
-                {"key": "price_of_meter_Villas", "label": "سعر المتر للفلل"},
-                {"key": "average_rent", "label": "متوسط الإيجار"},
-                {"key": "price_of_meter_Commercial", "label": "سعر المتر التجاري"},
-                # أسماء بديلة بالعربية
-                {"key": "سعر_المتر_للشقق", "label": "سعر المتر للشقق"},
-                {"key": "سعر_المتر_للفلل", "label": "سعر المتر للفلل"},
-                {"key": "متوسط_الإيجار", "label": "متوسط الإيجار"},
-                {"key": "سعر_المتر_التجاري", "label": "سعر المتر التجاري"}
+        # نمط واحد مُجمّع لجميع صيغ الطلب، ثم التحقق من أن الحي المذكور يلي "في (حي)"
+        name = neighborhood_name.lower()
+        for match in _SHOW_ALL_RE.finditer(msg):
+            if not match.group('tail').startswith(name):
+                continue
+            
+            facility_type = _SHOW_ALL_PLURALS.get(match.group('plural'))
+            if facility_type:
+                # البحث عن أنماط مثل "اعرض جميع المدارس في حي الياسمين"
+                logger.info(f"تم تحديد طلب عرض جميع {match.group('plural')} في {neighborhood_name}")
+                # البحث عن المرافق من هذا النوع في الحي
+                return self.search_service.find_facilities_in_neighborhood(neighborhood_name, facility_type)
+            
+            # طلب عام لجميع المرافق مثل "اعرض جميع المرافق في حي الياسمين"
+            logger.info(f"تم تحديد طلب عرض جميع المرافق في {neighborhood_name}")
+            # جمع معلومات عن جميع أنواع المرافق (البحث عن جميع الأنواع بالتوازي)
+            all_facilities = [
+                facility_result.text
+                for facility_type, facility_result in self._find_all_facilities(neighborhood_name)
+                if facility_result.found
             ]
             
-            for field in price_fields:
-                key = field["key"]
-                if key in neighborhood_info and neighborhood_info[key]:
-                    price_value = neighborhood_info[key]
-                    
-                    # تنسيق السعر
-                    if isinstance(price_value, (int, float)):
-                        formatted_price = "{:,}".format(int(price_value))
-                        price_info.append(f"{field['label']}: {formatted_price} ريال")
-                    else:
-                        price_info.append(f"{field['label']}: {price_value}")
-            
-            if price_info:
-                extra_info += "\nمعلومات الأسعار في الحي:\n"
-                for info in price_info:
-                    extra_info += f"• {info}\n"
-        
-        extra_info += "\nيمكنك السؤال عن تفاصيل أكثر مثل 'أين توجد مدارس في الحي' أو 'معلومات عن مستشفيات الحي'"
+            # دمج المعلومات
+            if all_facilities:
+                return f"جميع المرافق المتوفرة في {neighborhood_name}:\n\n" + "\n\n".join(all_facilities)
+            else:
+                return f"عذراً، لم يتم العثور على معلومات عن المرافق في {neighborhood_name}."
         
-        return extra_info
+        # لم يتم تحديد طلب عرض جميع المرافق
+        return None
 
     def _handle_housing_with_facilities(self, query_analysis: Dict, user_message: str, user_latitude: float = None, user_longitude: float = None) -> str:
         """
@@ -813,106 +958,83 @@ class NeighborhoodChatbot:
         transaction_type = query_analysis['entities'].get('transaction_type', 'إيجار')  # افتراضياً إيجار
         proximity_facilities = query_analysis['entities'].get('proximity_facilities', [])
         
-        # تحديد أولويات المرافق
-        schools_needed = any(facility['type'] == 'مدرسة' for facility in proximity_facilities)
-        hospitals_needed = any(facility['type'] == 'مستشفى' for facility in proximity_facilities)
-        parks_needed = any(facility['type'] == 'حديقة' for facility in proximity_facilities)
-        malls_needed = any(facility['type'] == 'مول' for facility in proximity_facilities)
+        # أنواع المرافق المطلوبة بدون تكرار مع الحفاظ على ترتيب ذكرها (مسح واحد يُستخدم أيضاً لفحص العضوية)
+        requested_types = dict.fromkeys(facility['type'] for facility in proximity_facilities)
+        unique_facility_names = list(requested_types)
         
         # اختيار حي مناسب بناءً على المتطلبات
         suggested_neighborhood = self.recommendation_service.get_recommended_neighborhood(user_message)
         
         # بناء الاستجابة
-        property_type_display = {
-            'شقة': 'شقة', 
-            'فيلا': 'فيلا', 
-            'أرض': 'أرض', 
-            'تجاري': 'عقار تجاري'
-        }.get(property_type, 'سكن')
-        
-        transaction_display = 'استئجار' if transaction_type == 'إيجار' else 'شراء'
+        property_type_display = _PROPERTY_TYPE_DISPLAY.get(property_type, 'سكن')
+        transaction_display = _TRANSACTION_DISPLAY.get(transaction_type, 'شراء')
         
-        response = f"بناءً على متطلباتك للبحث عن {property_type_display} لل{transaction_display}"
+        parts = [f"بناءً على متطلباتك للبحث عن {property_type_display} لل{transaction_display}"]
         
         # إضافة الميزانية إذا كانت متاحة
         if budget:
-            formatted_budget = "{:,}".format(budget)
-            response += f" بميزانية {formatted_budget} ريال"
+            formatted_budget = f"{budget:,}"
+            parts.append(f" بميزانية {formatted_budget} ريال")
         
         # إضافة المرافق المطلوبة
-        if proximity_facilities:
-            facility_names = [f['type'] for f in proximity_facilities]
-            unique_facility_names = list(set(facility_names))
-            
-            if len(unique_facility_names) == 1:
-                response += f" بالقرب من {unique_facility_names[0]}"
-            elif len(unique_facility_names) == 2:
-                response += f" بالقرب من {unique_facility_names[0]} و{unique_facility_names[1]}"
-            else:
-                formatted_facilities = ", ".join(unique_facility_names[:-1]) + f" و{unique_facility_names[-1]}"
-                response += f" بالقرب من {formatted_facilities}"
+        if unique_facility_names:
+            parts.append(f" بالقرب من {_arabic_list_join(unique_facility_names)}")
         
         # إضافة توصية الحي
-        response += f"، أقترح عليك النظر في {suggested_neighborhood}.\n\n"
+        parts.append(f"، أقترح عليك النظر في {suggested_neighborhood}.\n\n")
+        
+        # جلب معلومات الحي مرة واحدة ومشاركتها بين المنسق وفحص الأسعار أدناه
+        detailed_info = self.data_loader.find_neighborhood_info(suggested_neighborhood)
         
         # إضافة معلومات الحي مع ضمان ظهور كافة المعلومات السعرية
-        neighborhood_info = self.formatter.format_neighborhood_response(suggested_neighborhood)
-        response += neighborhood_info + "\n\n"
+        neighborhood_info = self.formatter.format_neighborhood_response(
+            suggested_neighborhood, neighborhood_info=detailed_info
+        )
+        parts.append(neighborhood_info)
+        parts.append("\n\n")
         
         # إضافة معلومات سعرية إضافية للحي إذا لم تظهر أعلاه
-        detailed_info = self.data_loader.find_neighborhood_info(suggested_neighborhood)
         if detailed_info:
-            # التحقق من وجود سعر المتر للشقق
-            show_extra_prices = False
-            if "price_of_meter_Apartment" in detailed_info and detailed_info["price_of_meter_Apartment"] and "سعر المتر للشقق" not in neighborhood_info:
-                show_extra_prices = True
-            elif "price_of_meter_Villas" in detailed_info and detailed_info["price_of_meter_Villas"] and "سعر المتر للفلل" not in neighborhood_info:
-                show_extra_prices = True
+            apartment_price = detailed_info.get("price_of_meter_Apartment")
+            villa_price = detailed_info.get("price_of_meter_Villas")
+            
+            # التسميات السعرية الظاهرة مسبقاً في معلومات الحي (مسح واحد لكل تسمية)
+            present_labels = {label for label in ("سعر المتر للشقق", "سعر المتر للفلل") if label in neighborhood_info}
+            
+            # التحقق من وجود سعر متر غير معروض أعلاه
+            show_extra_prices = (
+                (apartment_price and "سعر المتر للشقق" not in present_labels)
+                or (villa_price and "سعر المتر للفلل" not in present_labels)
+            )
                 
             if show_extra_prices:
                 price_info = []
                 # إضافة الأسعار ذات الصلة بنوع العقار المطلوب
-                if property_type == "شقة" and "price_of_meter_Apartment" in detailed_info and detailed_info["price_of_meter_Apartment"]:
-                    price = int(detailed_info["price_of_meter_Apartment"])
-                    formatted_price = "{:,}".format(price)
-                    price_info.append(f"سعر المتر للشقق: {formatted_price} ريال")
+                if property_type == "شقة" and apartment_price:
+                    price_info.append(f"سعر المتر للشقق: {_formatted_price(detailed_info, 'price_of_meter_Apartment')}")
                     
-                elif property_type == "فيلا" and "price_of_meter_Villas" in detailed_info and detailed_info["price_of_meter_Villas"]:
-                    price = int(detailed_info["price_of_meter_Villas"])
-                    formatted_price = "{:,}".format(price)
-                    price_info.append(f"سعر المتر للفلل: {formatted_price} ريال")
+                elif property_type == "فيلا" and villa_price:
+                    price_info.append(f"سعر المتر للفلل: {_formatted_price(detailed_info, 'price_of_meter_Villas')}")
                 
                 if price_info:
-                    response += "معلومات الأسعار:\n"
+                    parts.append("معلومات الأسعار:\n")
                     for info in price_info:
-                        response += f"• {info}\n\n"
+                        parts.append(f"• {info}\n\n")
         
         # إضافة معلومات المرافق المطلوبة
         facilities_header = "المرافق المتوفرة في الحي والتي تناسب متطلباتك:\n"
-        facilities_info = ""
-        
-        if schools_needed:
-            school_info = self.search_service.find_facilities_in_neighborhood(suggested_neighborhood, "مدرسة")
-            if "لم يتم العثور" not in school_info:
-                facilities_info += f"\n{school_info}\n"
-        
-        if hospitals_needed:
-            hospital_info = self.search_service.find_facilities_in_neighborhood(suggested_neighborhood, "مستشفى")
-            if "لم يتم العثور" not in hospital_info:
-                facilities_info += f"\n{hospital_info}\n"
+        facilities_parts = []
         
-        if parks_needed:
-            park_info = self.search_service.find_facilities_in_neighborhood(suggested_neighborhood, "حديقة")
-            if "لم يتم العثور" not in park_info:
-                facilities_info += f"\n{park_info}\n"
+        needed_types = [facility_type for facility_type in _HOUSING_FACILITY_TYPES if facility_type in requested_types]
         
-        if malls_needed:
-            mall_info = self.search_service.find_facilities_in_neighborhood(suggested_neighborhood, "مول")
-            if "لم يتم العثور" not in mall_info:
-                facilities_info += f"\n{mall_info}\n"
+        # البحث عن المرافق المطلوبة بالتوازي
+        for facility_type, facility_result in self._find_facilities_parallel(suggested_neighborhood, needed_types):
+            if facility_result.found:
+                facilities_parts.append(f"\n{facility_result.text}\n")
         
-        if facilities_info:
-            response += facilities_header + facilities_info
+        if facilities_parts:
+            parts.append(facilities_header)
+            parts.extend(facilities_parts)
             
         # إضافة معلومات المسافة إذا كانت متاحة
         if user_latitude is not None and user_longitude is not None:
@@ -921,9 +1043,9 @@ class NeighborhoodChatbot:
             )
             if distance is not None:
                 distance_message = self.location_integration.format_distance_message(suggested_neighborhood, distance)
-                response += f"\n{distance_message}"
+                parts.append(f"\n{distance_message}")
         
-        return response
+        return "".join(parts)
 
     def _calculate_distance_to_neighborhood(self, neighborhood_name: str, user_latitude: float, user_longitude: float) -> Optional[float]:
         """
@@ -940,34 +1062,27 @@ class NeighborhoodChatbot:
         try:
             logger.info(f"حساب المسافة إلى {neighborhood_name} من الإحداثيات: {user_latitude}, {user_longitude}")
             
+            # المسار السريع: حساب المسافات إلى جميع الأحياء دفعة واحدة وإعادة استخدامها لنفس الموقع
+            distance = self.data_loader.distance_to_neighborhood(neighborhood_name, user_latitude, user_longitude)
+            if distance is not None:
+                distance = round(distance, 2)
+                logger.info(f"تم حساب المسافة إلى {neighborhood_name}: {distance} كم")
+                return distance
+            
             # الحصول على معلومات الحي
             neighborhood_info = self.data_loader.find_neighborhood_info(neighborhood_name)
             if not neighborhood_info:
                 logger.warning(f"لم يتم العثور على معلومات الحي: {neighborhood_name}")
                 return None
             
-            # البحث عن أعمدة الإحداثيات
-            lat_keys = ["lat", "latitude", "خط_العرض", "LAT"]
-            lon_keys = ["lon", "longitude", "خط_الطول", "LON"]
-            
-            # العثور على مفتاح خط العرض
-            lat_key = None
-            for key in lat_keys:
-                if key in neighborhood_info:
-                    lat_key = key
-                    break
-            
-            # العثور على مفتاح خط الطول
-            lon_key = None
-            for key in lon_keys:
-                if key in neighborhood_info:
-                    lon_key = key
-                    break
-            
-            if not lat_key or not lon_key:
+            # البحث عن أعمدة الإحداثيات (تُحدد مرة واحدة لأن جميع الأحياء تشترك في نفس الأعمدة)
+            coord_keys = self._resolve_coord_keys(neighborhood_info)
+            if not coord_keys:
                 logger.warning(f"لم يتم العثور على إحداثيات الحي: {neighborhood_name}")
                 return None
             
+            lat_key, lon_key = coord_keys
+            
             # تحويل الإحداثيات إلى أرقام
             try:
                 neighborhood_lat = float(neighborhood_info[lat_key])
@@ -988,33 +1103,85 @@ class NeighborhoodChatbot:
             logger.error(f"خطأ في حساب المسافة إلى {neighborhood_name}: {str(e)}")
             return None
 
-    def _fallback_processing(self, user_message: str) -> str:
+    def _resolve_coord_keys(self, neighborhood_info: Dict) -> Optional[tuple]:
+        """
+        تحديد مفتاحي خط العرض وخط الطول في معلومات الحي وتخزينهما مؤقتاً.
+        
+        Args:
+            neighborhood_info: معلومات الحي
+            
+        Returns:
+            Optional[tuple]: (مفتاح خط العرض، مفتاح خط الطول) أو None إذا لم يوجدا
+        """
+        if self._coord_keys is not None:
+            lat_key, lon_key = self._coord_keys
+            if lat_key in neighborhood_info and lon_key in neighborhood_info:
+                return self._coord_keys
+        
+        lat_key = next((key for key in _LAT_KEYS if key in neighborhood_info), None)
+        lon_key = next((key for key in _LON_KEYS if key in neighborhood_info), None)
+        if not lat_key or not lon_key:
+            return None
+        
+        self._coord_keys = (lat_key, lon_key)
+        return self._coord_keys
+    
+    def _fallback_processing(self, user_message: str, query_analysis: Optional[Dict] = None) -> str:
         """
         المعالجة الاحتياطية للرسائل التي لم يتم التعرف عليها بواسطة معالج الاستعلامات.
         
         Args:
             user_message: رسالة المستخدم
+            query_analysis: نتيجة تحليل الاستعلام إذا تم حسابها مسبقاً (اختياري)
             
         Returns:
             str: الرد المناسب
         """
-        # التحقق مما إذا كانت الرسالة متعلقة بالعقارات أو المرافق
-        is_real_estate = self.llm_service.is_real_estate_query(user_message)
+        # تصنيف الاستعلام في _generate_response يحدد أيضاً ما إذا كانت الرسالة خارج النطاق
+        return self._generate_response(user_message, query_analysis)
+    
+    def _llm_circuit_open(self) -> bool:
+        """
+        التحقق مما إذا كان قاطع الدائرة للنموذج اللغوي مفتوحاً.
         
-        if is_real_estate:
-            # إذا كانت الرسالة متعلقة بالعقارات أو المرافق
-            return self._generate_response(user_message)
-        else:
-            # إذا كانت الرسالة غير متعلقة بالعقارات أو المرافق
-            return self.llm_service.generate_off_topic_response(user_message)
+        Returns:
+            bool: True إذا كان يجب تخطي استدعاءات النموذج مؤقتاً
+        """
+        with self._llm_breaker_lock:
+            if self._llm_failures < _LLM_FAIL_MAX:
+                return False
+            if time.monotonic() >= self._llm_open_until:
+                # انتهت مهلة الإغلاق - السماح بمحاولة جديدة
+                self._llm_failures = _LLM_FAIL_MAX - 1
+                return False
+            return True
+    
+    def _record_llm_failure(self) -> None:
+        """
+        تسجيل فشل في استدعاء النموذج اللغوي وفتح الدائرة عند بلوغ الحد الأقصى.
+        """
+        with self._llm_breaker_lock:
+            self._llm_failures += 1
+            if self._llm_failures < _LLM_FAIL_MAX:
+                return
+            self._llm_open_until = time.monotonic() + _LLM_RESET_TIMEOUT
+        logger.warning(f"فتح قاطع الدائرة للنموذج اللغوي لمدة {_LLM_RESET_TIMEOUT} ثانية")
+    
+    def _record_llm_success(self) -> None:
+        """
+        تصفير عداد الأعطال بعد استدعاء ناجح للنموذج اللغوي.
+        """
+        with self._llm_breaker_lock:
+            self._llm_failures = 0
     
-    def _generate_response(self, user_message: str) -> str:
+    def _generate_response(self, user_message: str, query_analysis: Optional[Dict] = None) -> str:
         """
         توليد الرد المناسب على رسالة المستخدم.
         طريقة احتياطية للمعالجة إذا فشل معالج الاستعلامات.
         
         Args:
             user_message: رسالة المستخدم
+            query_analysis: نتيجة تحليل الاستعلام إذا تم حسابها مسبقاً (اختياري)
             
         Returns:
             str: الرد المولد
@@ -1025,10 +1192,21 @@ class NeighborhoodChatbot:
             if explicitly_requested:
                 return self.formatter.format_neighborhood_response(explicitly_requested)
             
+            # إذا كانت الدائرة مفتوحة بسبب أعطال متكررة، أعد رداً ثابتاً دون استدعاء النموذج
+            if self._llm_circuit_open():
+                logger.warning("قاطع الدائرة مفتوح - تخطي استدعاء النموذج اللغوي")
+                return _GENERIC_ERROR_RESPONSE
+            
             # تصنيف نوع الاستعلام وتحديد ملف CSV المناسب
-            query_type, csv_file, search_query = self.llm_service.classify_query(user_message)
+            # يرفع التصنيف استثناءً عند فشل النموذج، لذا لا يُصفّر العداد إلا بعد نجاح فعلي
+            query_type, csv_file, search_query, is_off_topic = self.llm_service.classify_query(user_message)
+            self._record_llm_success()
             logger.info(f"نوع الاستعلام (قديم): {query_type}, ملف CSV: {csv_file}, عبارة البحث: {search_query}")
             
+            # إذا كانت الرسالة غير متعلقة بالعقارات أو المرافق
+            if is_off_topic:
+                return self.llm_service.generate_off_topic_response(user_message)
+            
             # التعامل مع أنواع الاستعلامات المختلفة
             if query_type == "ترحيب":
                 return "أهلاً بك! كيف يمكنني مساعدتك اليوم في البحث عن عقار أو حي مناسب أو المرافق القريبة؟"
@@ -1058,21 +1236,9 @@ class NeighborhoodChatbot:
                     # البحث في ملف CSV المحدد
                     return self.search_service.search_entity(csv_file, search_query)
                 elif csv_file:
-                    # استخراج اسم المرفق من الرسالة بشكل أفضل
-                    facility_type = None
-                    if "المدارس.csv" in csv_file:
-                        facility_type = "مدرسة"
-                    elif "مستشفى.csv" in csv_file:
-                        facility_type = "مستشفى"
-                    elif "حدائق.csv" in csv_file:
-                        facility_type = "حديقة"
-                    elif "سوبرماركت.csv" in csv_file:
-                        facility_type = "سوبرماركت"
-                    elif "مول.csv" in csv_file:
-                        facility_type = "مول"
-                    
-                    # محاولة استخراج اسم المرفق باستخدام المعالج الجديد
-                    query_analysis = self.query_processor.analyze_query(user_message)
+                    # محاولة استخراج اسم المرفق باستخدام المعالج الجديد (إعادة استخدام التحليل السابق إن وجد)
+                    if query_analysis is None:
+                        query_analysis = self.query_processor.analyze_query(user_message)
                     
                     if query_analysis['query_type'] in ['facility_location', 'facility_search'] and 'facility_name' in query_analysis['entities']:
                         facility_name = query_analysis['entities']['facility_name']
@@ -1084,9 +1250,13 @@ class NeighborhoodChatbot:
                     # إذا لم يكن هناك ملف CSV محدد
                     return "كيف يمكنني مساعدتك؟ هل تبحث عن حي معين أو مرفق محدد مثل المدارس أو المستشفيات أو الحدائق أو المولات؟"
         
-        except Exception as e:
-            logger.error(f"خطأ في توليد الرد: {str(e)}")
-            return "عذراً، حدث خطأ ما. هل يمكنك إعادة صياغة طلبك من فضلك؟"
+        except (LLMServiceError, QueryClassificationError):
+            self._record_llm_failure()
+            logger.exception("خطأ في خدمة النموذج اللغوي أثناء توليد الرد")
+            return _GENERIC_ERROR_RESPONSE
+        except Exception:
+            logger.exception("خطأ في توليد الرد")
+            return _GENERIC_ERROR_RESPONSE
     
     def handle_specific_requests(self, user_id: str, user_message: str, neighborhood_name: Optional[str] = None, user_latitude: float = None, user_longitude: float = None) -> str:
         """
@@ -1103,30 +1273,22 @@ class NeighborhoodChatbot:
             str: الرد المخصص
         """
         try:
-            # تحليل الاستعلام
-            query_analysis = self.query_processor.analyze_query(user_message)
-            
             # إذا كان النص يحتوي على "هذا الحي" أو "الحي" دون تحديد، ابحث عن آخر حي في سياق المحادثة
             if ("هذا الحي" in user_message or "الحي" in user_message) and not neighborhood_name:
-                # استخراج آخر حي مذكور في المحادثة
+                # استخراج آخر حي مذكور في المحادثة (من الأحدث إلى الأقدم)
                 previous_messages = self.get_last_n_messages(user_id, 3)
-                for msg in previous_messages:
-                    bot_message = msg.get('bot', '')
-                    for hood in self.data_loader.get_available_neighborhoods():
-                        if hood in bot_message:
-                            neighborhood_name = hood
-                            logger.info(f"تم استخراج الحي '{neighborhood_name}' من سياق المحادثة")
-                            break
+                for msg in reversed(previous_messages):
+                    neighborhood_name = self._find_mentioned_neighborhood(msg.bot)
                     if neighborhood_name:
+                        logger.info(f"تم استخراج الحي '{neighborhood_name}' من سياق المحادثة")
                         break
             
             # إذا كان هناك حي محدد في المعلمات، استخدمه
             if neighborhood_name:
-                # البحث عن نوع المرفق
-                if query_analysis['query_type'] in ['facility_location', 'facility_search'] and 'facility_type' in query_analysis['entities']:
-                    facility_type = query_analysis['entities']['facility_type']
-                else:
-                    facility_type = self.search_service.extract_facility_type_from_message(user_message)
+                # البحث عن نوع المرفق بالكلمات المفتاحية أولاً، ثم بتحليل الاستعلام فقط عند الحاجة
+                facility_type = self.search_service.extract_facility_type_from_message(user_message)
+                if facility_type is None:
+                    facility_type = self._facility_type_from_analysis(self.query_processor.analyze_query(user_message))
                 
                 # البحث عن المرافق في الحي
                 response = self.search_service.find_facilities_in_neighborhood(neighborhood_name, facility_type)
@@ -1135,15 +1297,10 @@ class NeighborhoodChatbot:
                 self.add_to_history(user_id, user_message, f"معلومات عن {facility_type if facility_type else 'المرافق'} في {neighborhood_name}:\n{response}")
                 
                 # إضافة معلومات المسافة إذا تم توفير الإحداثيات
-                if user_latitude is not None and user_longitude is not None:
-                    distance = self.location_integration.calculate_distance_to_neighborhood(
-                        neighborhood_name, user_latitude, user_longitude
-                    )
-                    if distance is not None:
-                        distance_message = self.location_integration.format_distance_message(neighborhood_name, distance)
-                        response += f"\n\n{distance_message}"
-                
-                return response
+                return self._append_distance_message(response, neighborhood_name, user_latitude, user_longitude)
+            
+            # تحليل الاستعلام
+            query_analysis = self.query_processor.analyze_query(user_message)
             
             # إذا لم يكن هناك حي محدد في المعلمات، استخرجه من الرسالة
             if 'neighborhood' in query_analysis['entities']:
@@ -1156,29 +1313,61 @@ class NeighborhoodChatbot:
                 return "من فضلك حدد اسم الحي الذي ترغب في معرفة المزيد عنه."
             
             # تحديد نوع المرفق المطلوب
-            if query_analysis['query_type'] in ['facility_location', 'facility_search'] and 'facility_type' in query_analysis['entities']:
-                facility_type = query_analysis['entities']['facility_type']
-            else:
+            facility_type = self._facility_type_from_analysis(query_analysis)
+            if facility_type is None:
                 facility_type = self.search_service.extract_facility_type_from_message(user_message)
             
             # البحث عن المرافق في الحي
             response = self.search_service.find_facilities_in_neighborhood(neighborhood_name, facility_type)
             
             # إضافة معلومات المسافة إذا تم توفير الإحداثيات
-            if user_latitude is not None and user_longitude is not None:
-                distance = self.location_integration.calculate_distance_to_neighborhood(
-                    neighborhood_name, user_latitude, user_longitude
-                )
-                if distance is not None:
-                    distance_message = self.location_integration.format_distance_message(neighborhood_name, distance)
-                    response += f"\n\n{distance_message}"
-            
-            return response
+            return self._append_distance_message(response, neighborhood_name, user_latitude, user_longitude)
                 
         except Exception as e:
             logger.error(f"خطأ في معالجة الطلب الخاص: {str(e)}")
             return f"عذراً، حدث خطأ أثناء البحث عن معلومات في {neighborhood_name if neighborhood_name else 'هذا الحي'}."
             
+    def _append_distance_message(self, response: str, neighborhood_name: str,
+                                 user_latitude: Optional[float], user_longitude: Optional[float]) -> str:
+        """
+        إضافة رسالة المسافة إلى الحي في نهاية الرد إذا توفرت إحداثيات المستخدم.
+        
+        Args:
+            response: الرد الأصلي
+            neighborhood_name: اسم الحي
+            user_latitude: خط العرض للمستخدم (اختياري)
+            user_longitude: خط الطول للمستخدم (اختياري)
+            
+        Returns:
+            str: الرد مع رسالة المسافة إن أمكن حسابها
+        """
+        if user_latitude is None or user_longitude is None:
+            return response
+        
+        distance = self.location_integration.calculate_distance_to_neighborhood(
+            neighborhood_name, user_latitude, user_longitude
+        )
+        if distance is None:
+            return response
+        
+        distance_message = self.location_integration.format_distance_message(neighborhood_name, distance)
+        return f"{response}\n\n{distance_message}"
+    
+    @staticmethod
+    def _facility_type_from_analysis(query_analysis: Dict) -> Optional[str]:
+        """
+        استخراج نوع المرفق من نتيجة تحليل الاستعلام إذا كان الاستعلام عن المرافق.
+        
+        Args:
+            query_analysis: نتيجة تحليل الاستعلام
+            
+        Returns:
+            Optional[str]: نوع المرفق أو None
+        """
+        if query_analysis['query_type'] in ('facility_location', 'facility_search'):
+            return query_analysis['entities'].get('facility_type')
+        return None
+    
     def get_available_neighborhoods(self) -> List[str]:
         """
         إرجاع قائمة الأحياء المتاحة.
@@ -1215,18 +1404,32 @@ class NeighborhoodChatbot:
         """
         return self.search_service.search_all_facilities(query)
         
+    def refresh_components_status(self) -> ComponentsStatus:
+        """
+        إعادة حساب حالة المكونات الرئيسية (يُستدعى بعد التهيئة أو عند استبدال مكون).
+        """
+        self._components_status = ComponentsStatus(
+            data_loader=self.data_loader is not None,
+            llm_service=self.llm_service is not None,
+            recommendation_service=self.recommendation_service is not None,
+            search_service=self.search_service is not None,
+            formatter=self.formatter is not None,
+            query_processor=self.query_processor is not None
+        )
+        return self._components_status
+    
+    @property
+    def components_status(self) -> ComponentsStatus:
+        """
+        حالة المكونات الرئيسية المحسوبة مسبقاً.
+        """
+        return self._components_status
+    
     def check_components_status(self) -> Dict[str, bool]:
         """
         التحقق من حالة المكونات الرئيسية.
         """
-        return {
-            'data_loader': self.data_loader is not None,
-            'llm_service': self.llm_service is not None,
-            'recommendation_service': self.recommendation_service is not None,
-            'search_service': self.search_service is not None,
-            'formatter': self.formatter is not None,
-            'query_processor': self.query_processor is not None
-        }
+        return asdict(self._components_status)
 
     def process_special_request(self, user_id: str, neighborhood_name: str, request_type: str, 
                                 user_latitude: Optional[float] = None, 
@@ -1246,85 +1449,23 @@ class NeighborhoodChatbot:
         """
         try:
             # تنظيف اسم الحي
-            if neighborhood_name and isinstance(neighborhood_name, str):
-                neighborhood_name = neighborhood_name.strip()
+            neighborhood_name = (neighborhood_name or "").strip()
             
             if not neighborhood_name:
                 return "عذراً، لم يتم تحديد الحي. يرجى ذكر اسم الحي الذي ترغب في معرفة المزيد عنه."
             
-            if request_type.strip() in ["المزيد", "مزيد", "اكثر", "أكثر"]:
-                response = f"أبرز المرافق في {neighborhood_name}:\n\n"
-                
-                # الحصول على المدارس للحي مع تحديد عدد النتائج بمرفق واحد فقط
-                schools = self.search_service.search_facilities(neighborhood_name, "مدارس", limit=1)
-                if schools is not None and not schools.empty:
-                    response += "• مدارس:\n"
-                    for _, school in schools.iterrows():
-                        if 'الاسم' in school:
-                            facility_name = school['الاسم']
-                            # إزالة العنوان إذا كان موجودًا
-                            if '|' in facility_name:
-                                facility_name = facility_name.split('|')[0]
-                            elif ':' in facility_name:
-                                facility_name = facility_name.split(':')[0]
-                            response += f"  - {facility_name.strip()}\n"
-                    response += "\n"
+            if request_type.strip() in _MORE_TYPES:
+                parts = [f"أبرز المرافق في {neighborhood_name}:\n\n"]
                 
-                # الحصول على المستشفيات للحي
-                hospitals = self.search_service.search_facilities(neighborhood_name, "مستشفيات", limit=1)
-                if hospitals is not None and not hospitals.empty:
-                    response += "• مستشفيات:\n"
-                    for _, hospital in hospitals.iterrows():
-                        if 'الاسم' in hospital:
-                            facility_name = hospital['الاسم']
-                            if '|' in facility_name:
-                                facility_name = facility_name.split('|')[0]
-                            elif ':' in facility_name:
-                                facility_name = facility_name.split(':')[0]
-                            response += f"  - {facility_name.strip()}\n"
-                    response += "\n"
-                
-                # الحدائق
-                parks = self.search_service.search_facilities(neighborhood_name, "حدائق", limit=1)
-                if parks is not None and not parks.empty:
-                    response += "• حدائق:\n"
-                    for _, park in parks.iterrows():
-                        if 'الاسم' in park:
-                            facility_name = park['الاسم']
-                            if '|' in facility_name:
-                                facility_name = facility_name.split('|')[0]
-                            elif ':' in facility_name:
-                                facility_name = facility_name.split(':')[0]
-                            response += f"  - {facility_name.strip()}\n"
-                    response += "\n"
-                
-                # المولات
-                malls = self.search_service.search_facilities(neighborhood_name, "مولات", limit=1)
-                if malls is not None and not malls.empty:
-                    response += "• مراكز تسوق:\n"
-                    for _, mall in malls.iterrows():
-                        if 'الاسم' in mall:
-                            facility_name = mall['الاسم']
-                            if '|' in facility_name:
-                                facility_name = facility_name.split('|')[0]
-                            elif ':' in facility_name:
-                                facility_name = facility_name.split(':')[0]
-                            response += f"  - {facility_name.strip()}\n"
-                    response += "\n"
-                
-                # السوبرماركت
-                supermarkets = self.search_service.search_facilities(neighborhood_name, "سوبرماركت", limit=1)
-                if supermarkets is not None and not supermarkets.empty:
-                    response += "• سوبرماركت:\n"
-                    for _, supermarket in supermarkets.iterrows():
-                        if 'الاسم' in supermarket:
-                            facility_name = supermarket['الاسم']
-                            if '|' in facility_name:
-                                facility_name = facility_name.split('|')[0]
-                            elif ':' in facility_name:
-                                facility_name = facility_name.split(':')[0]
-                            response += f"  - {facility_name.strip()}\n"
-                    response += "\n"
+                # أسماء المرافق من نتائج البحث المخزنة مؤقتاً مع تحديد عدد النتائج بمرفق واحد فقط لكل نوع
+                for facility_type, label in _MORE_SECTIONS:
+                    facility_names = self.search_service.find_facility_result(neighborhood_name, facility_type).names[:1]
+                    if not facility_names:
+                        continue
+                    
+                    parts.append(f"• {label}:\n")
+                    parts.extend(f"  - {facility_name}\n" for facility_name in facility_names)
+                    parts.append("\n")
                 
                 # إضافة معلومات المسافة إذا تم توفير الإحداثيات
                 if user_latitude is not None and user_longitude is not None:
@@ -1333,9 +1474,9 @@ class NeighborhoodChatbot:
                     )
                     if distance is not None:
                         distance_message = self.location_integration.format_distance_message(neighborhood_name, distance)
-                        response += f"\n\n{distance_message}"
+                        parts.append(f"\n\n{distance_message}")
                 
-                return response
+                return "".join(parts)
                 
             # إذا لم يتم التعرف على نوع الطلب، استخدم الطريقة القديمة
             user_message = f"معلومات عن {neighborhood_name}"  # رسالة افتراضية
@@ -1348,10 +1489,124 @@ class NeighborhoodChatbot:
                 
 
     def save_helpus_data(self, data: dict) -> None:
-      """
-      حفظ بيانات استبيان "Help Us" في قاعدة البيانات.
-      """
-      self.db['Knowledge_base'].insert_one(data)
+        """
+        استلام بيانات استبيان "Help Us" لحفظها في قاعدة البيانات.
+        تُجمع البيانات وتُكتب دفعة واحدة عند امتلاء الدفعة أو بعد مهلة قصيرة.
+        
+        Args:
+            data: بيانات الاستبيان
+            
+        Raises:
+            HelpUsStorageError: إذا امتلأ المخزن المؤقت لتعذر الكتابة إلى قاعدة البيانات
+        """
+        with self._helpus_lock:
+            if len(self._helpus_buffer) >= _HELPUS_MAX_BUFFERED:
+                raise HelpUsStorageError("المخزن المؤقت لبيانات الاستبيان ممتلئ")
+            self._helpus_buffer.append(HelpUsSubmission(data))
+            flush_now = len(self._helpus_buffer) >= _HELPUS_BATCH_SIZE
+            if not flush_now:
+                self._schedule_helpus_flush_locked()
+        
+        if flush_now:
+            self.flush_helpus_data()
+    
+    def _schedule_helpus_flush_locked(self) -> None:
+        """
+        جدولة كتابة مؤجلة لبيانات الاستبيان إذا لم تكن هناك كتابة مجدولة (يُستدعى مع الاحتفاظ بالقفل).
+        """
+        if self._helpus_timer is None:
+            self._helpus_timer = threading.Timer(_HELPUS_FLUSH_INTERVAL, self.flush_helpus_data)
+            self._helpus_timer.daemon = True
+            self._helpus_timer.start()
+    
+    def _flush_helpus_at_exit(self) -> None:
+        """
+        كتابة بيانات الاستبيان المتبقية بشكل متزامن عند إيقاف التطبيق.
+        المحاولات المجدولة لا تعمل بعد الإيقاف، لذا تُعاد المحاولة هنا مباشرة حتى حد المحاولات.
+        """
+        while self.flush_helpus_data(schedule_retry=False):
+            pass
+    
+    def flush_helpus_data(self, schedule_retry: bool = True) -> int:
+        """
+        كتابة بيانات استبيان "Help Us" المجمعة إلى قاعدة البيانات.
+        عند فشل مؤقت تُعاد البيانات غير المحفوظة إلى مقدمة المخزن المؤقت حتى حد المحاولات،
+        أما الأخطاء الدائمة (مثل فشل التحقق من المستند) فتُسجل ويُتخلى عن مستنداتها.
+        
+        Args:
+            schedule_retry: جدولة محاولة لاحقة للمستندات المعادة إلى المخزن المؤقت
+            
+        Returns:
+            int: عدد المستندات المعادة إلى المخزن المؤقت لإعادة المحاولة
+        """
+        with self._helpus_lock:
+            batch, self._helpus_buffer = self._helpus_buffer, []
+            if self._helpus_timer is not None:
+                self._helpus_timer.cancel()
+                self._helpus_timer = None
+        
+        if not batch:
+            return 0
+        
+        for submission in batch:
+            submission.attempts += 1
+        
+        try:
+            # ordered=False: لا يوقف فشل مستند واحد كتابة بقية الدفعة
+            self.db['Knowledge_base'].insert_many([submission.document for submission in batch], ordered=False)
+            logger.info(f"تم حفظ {len(batch)} من بيانات الاستبيان")
+            return 0
+        except BulkWriteError as e:
+            retry = self._classify_helpus_write_errors(batch, e.details)
+            logger.error(f"خطأ في حفظ بيانات الاستبيان: {str(e)}")
+        except Exception as e:
+            # فشل الدفعة كاملة (مثل انقطاع الاتصال) - إعادة المحاولة لجميع المستندات
+            retry = batch
+            logger.error(f"خطأ في حفظ بيانات الاستبيان: {str(e)}")
+        
+        exhausted = [submission for submission in retry if submission.attempts >= _HELPUS_MAX_ATTEMPTS]
+        if exhausted:
+            retry = [submission for submission in retry if submission.attempts < _HELPUS_MAX_ATTEMPTS]
+            logger.error(f"تم التخلي عن {len(exhausted)} من بيانات الاستبيان بعد {_HELPUS_MAX_ATTEMPTS} محاولات: "
+                         f"{[submission.document for submission in exhausted]}")
+        
+        if not retry:
+            return 0
+        
+        # المستندات المعادة تسبق البيانات الجديدة، ولا تُحذف بيانات مستلمة لتجاوز الحد
+        # (تُرفض البيانات الجديدة في save_helpus_data بدلاً من ذلك)
+        with self._helpus_lock:
+            self._helpus_buffer[:0] = retry
+            if schedule_retry:
+                self._schedule_helpus_flush_locked()
+        return len(retry)
+    
+    def _classify_helpus_write_errors(self, batch: List[HelpUsSubmission], details: Dict) -> List[HelpUsSubmission]:
+        """
+        تحديد المستندات التي تستحق إعادة المحاولة من تفاصيل BulkWriteError.
+        
+        Args:
+            batch: الدفعة المرسلة بنفس ترتيب المستندات
+            details: تفاصيل الخطأ (writeErrors وwriteConcernErrors)
+            
+        Returns:
+            List[HelpUsSubmission]: المستندات المطلوب إعادة كتابتها
+        """
+        write_errors = {error['index']: error for error in details.get('writeErrors', ())}
+        retry = []
+        for index, submission in enumerate(batch):
+            error = write_errors.get(index)
+            if error is None:
+                # كُتب المستند، لكن فشل ضمان الكتابة يعني أن حفظه غير مؤكد: تُعاد كتابته،
+                # وإن كان محفوظاً فسيعود بخطأ المفتاح المكرر ويُعد محفوظاً
+                if details.get('writeConcernErrors'):
+                    retry.append(submission)
+            elif error.get('code') in _TRANSIENT_WRITE_ERROR_CODES:
+                retry.append(submission)
+            elif error.get('code') != _DUPLICATE_KEY_ERROR:
+                logger.error(f"خطأ دائم في حفظ بيانات الاستبيان (الرمز {error.get('code')}): "
+                             f"{error.get('errmsg')} - {submission.document}")
+        return retry
 
 
     
@@ -43,4 +43,9 @@ class ResponseFormattingError(BaseChatbotError):
 
 class DistanceCalculationError(BaseChatbotError):
     """يُثار عندما يفشل حساب المسافة بين المستخدم والحي."""
-    pass
\ No newline at end of file
+    pass
+
+
+class HelpUsStorageError(BaseChatbotError):
+    """يُثار عندما يتعذر استلام بيانات استبيان "Help Us" لحفظها."""
+    pass
@@ -5,16 +5,42 @@
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pymongo import MongoClient
 
 from core.exceptions import DataLoadingError
 
 logger = logging.getLogger(__name__)
 
+# أسماء أعمدة الإحداثيات المحتملة في بيانات الأحياء (بترتيب الأولوية)
+_LAT_COLUMNS = ("lat", "latitude", "خط_العرض", "LAT")
+_LON_COLUMNS = ("lon", "longitude", "خط_الطول", "LON")
+
+# نصف قطر الأرض بالكيلومتر
+_EARTH_RADIUS_KM = 6371.0
+
+# أعمدة الأسعار في بيانات الأحياء التي تُنسق مسبقاً عند التحميل
+_PRICE_COLUMNS = (
+    "price_of_meter_Apartment", "price_of_meter_Villas", "average_rent", "price_of_meter_Commercial",
+    "سعر_المتر_للشقق", "سعر_المتر_للفلل", "متوسط_الإيجار", "سعر_المتر_التجاري"
+)
+
+# اللاحقة المضافة لاسم عمود السعر للحصول على النص المنسق مسبقاً (مثل "12,500 ريال")
+FORMATTED_PRICE_SUFFIX = "_formatted"
+
+# الحد الأقصى لعدد نتائج البحث عن معلومات الأحياء المخزنة مؤقتاً
+_NEIGHBORHOOD_INFO_CACHE_SIZE = 512
+
+# مجموعات MongoDB التي تُحمّل عند التهيئة (تُحمّل بالتوازي لأنها مستقلة)
+_COLLECTIONS = ("Knowledge_base", "Neighborhoods", "Schools", "Gardens", "Supermarkets", "Hospitals", "Malls")
+
 class DataLoader:
     """
     مسؤول عن تحميل ومعالجة البيانات من MongoDB للشاتبوت.
@@ -31,6 +57,10 @@ class DataLoader:
         """
         self.default_neighborhoods = default_neighborhoods
         
+        # ذاكرة مؤقتة (LRU) لمعلومات الأحياء حسب الاسم بعد إزالة بادئة "حي" - البيانات ثابتة بعد التحميل
+        self._neighborhood_info_cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._neighborhood_info_cache_lock = threading.Lock()
+        
         # الاتصال بقاعدة البيانات MongoDB
         try:
             self.client = MongoClient(mongo_uri)
@@ -40,14 +70,16 @@ class DataLoader:
             logger.error(f"فشل الاتصال بقاعدة البيانات MongoDB: {str(e)}")
             raise DataLoadingError(f"فشل الاتصال بقاعدة البيانات: {str(e)}")
         
-        # تحميل البيانات من MongoDB
-        self.knowledge_base = self._load_dataframe('Knowledge_base')
-        self.neighborhoods = self._load_dataframe('Neighborhoods')
-        self.schools = self._load_dataframe('Schools')
-        self.parks = self._load_dataframe('Gardens')  # اسم المجموعة في MongoDB
-        self.supermarkets = self._load_dataframe('Supermarkets')
-        self.hospitals = self._load_dataframe('Hospitals')
-        self.malls = self._load_dataframe('Malls')
+        # تحميل البيانات من MongoDB بالتوازي (وقت التحميل = أبطأ مجموعة بدلاً من مجموع الأوقات)
+        with ThreadPoolExecutor(max_workers=len(_COLLECTIONS), thread_name_prefix="mongo-load") as executor:
+            frames = {name: executor.submit(self._load_dataframe, name) for name in _COLLECTIONS}
+        self.knowledge_base = frames['Knowledge_base'].result()
+        self.neighborhoods = frames['Neighborhoods'].result()
+        self.schools = frames['Schools'].result()
+        self.parks = frames['Gardens'].result()  # اسم المجموعة في MongoDB
+        self.supermarkets = frames['Supermarkets'].result()
+        self.hospitals = frames['Hospitals'].result()
+        self.malls = frames['Malls'].result()
         
         # تحديد أسماء الأعمدة
         self._identify_columns()
@@ -55,6 +87,20 @@ class DataLoader:
         # معالجة مميزات الأحياء
         self._process_neighborhood_benefits()
         
+        # تنسيق الأسعار مرة واحدة عند التحميل بدلاً من كل طلب
+        self._precompute_formatted_prices()
+        
+        # إدراج أسماء أعمدة الأحياء (sys.intern) لتتشارك جميع قواميس معلومات الأحياء والثوابت نفس كائنات المفاتيح
+        self.neighborhoods.columns = [
+            sys.intern(col) if isinstance(col, str) else col for col in self.neighborhoods.columns
+        ]
+        
+        # تجهيز مصفوفات إحداثيات الأحياء لحساب المسافات دفعة واحدة
+        self._build_coordinate_arrays()
+        
+        # تجهيز حالات قاعدة المعرفة للنموذج اللغوي مرة واحدة (تُرسل مع كل طلب توصية)
+        self._llm_cases = self._build_cases_for_llm()
+        
         logger.info("تم تهيئة محمل البيانات من MongoDB بنجاح")
     
     def _verify_files_exist(self) -> None:
@@ -245,8 +291,119 @@ class DataLoader:
             
             logger.info(f"تم تحميل مميزات لـ {len(self.neighborhood_benefits)} حي")
     
+    def _precompute_formatted_prices(self) -> None:
+        """
+        إضافة عمود منسق لكل عمود سعر رقمي في بيانات الأحياء (مثل "12,500 ريال").
+        """
+        if self.neighborhoods.empty:
+            return
+        
+        def _format(value):
+            if isinstance(value, (int, float, np.integer, np.floating)) and pd.notna(value):
+                return f"{int(value):,} ريال"
+            return None
+        
+        for col in _PRICE_COLUMNS:
+            if col in self.neighborhoods.columns:
+                self.neighborhoods[col + FORMATTED_PRICE_SUFFIX] = self.neighborhoods[col].map(_format)
+    
+    def _build_coordinate_arrays(self) -> None:
+        """
+        استخراج إحداثيات الأحياء إلى مصفوفات NumPy مع فهرس للأسماء،
+        لحساب المسافات إلى جميع الأحياء في عملية متجهة واحدة.
+        """
+        self._neighborhood_index: Dict[str, int] = {}
+        self._lat_arr = np.empty(0, dtype=np.float64)
+        self._lon_arr = np.empty(0, dtype=np.float64)
+        # آخر موقع للمستخدم والمسافات المحسوبة منه إلى جميع الأحياء (تُلغى عند إعادة بناء المصفوفات)
+        self._distances_cache = (None, None)
+        
+        if (self.neighborhoods.empty or not self.neighborhood_name_column or
+                self.neighborhood_name_column not in self.neighborhoods.columns):
+            return
+        
+        lat_col = next((col for col in _LAT_COLUMNS if col in self.neighborhoods.columns), None)
+        lon_col = next((col for col in _LON_COLUMNS if col in self.neighborhoods.columns), None)
+        if not lat_col or not lon_col:
+            logger.warning("لم يتم العثور على أعمدة الإحداثيات في بيانات الأحياء")
+            return
+        
+        coords = pd.DataFrame({
+            'name': self.neighborhoods[self.neighborhood_name_column],
+            'lat': pd.to_numeric(self.neighborhoods[lat_col], errors='coerce'),
+            'lon': pd.to_numeric(self.neighborhoods[lon_col], errors='coerce')
+        }).dropna()
+        
+        self._lat_arr = np.radians(coords['lat'].to_numpy(dtype=np.float64))
+        self._lon_arr = np.radians(coords['lon'].to_numpy(dtype=np.float64))
+        
+        for i, name in enumerate(coords['name']):
+            clean_name = str(name).replace("حي ", "").strip()
+            # الاحتفاظ بأول تطابق كما في find_neighborhood_info
+            self._neighborhood_index.setdefault(clean_name, i)
+        
+        logger.info(f"تم تجهيز إحداثيات {len(self._neighborhood_index)} حي لحساب المسافات")
+    
     # الواجهات العامة
     
+    def get_neighborhood_index(self, neighborhood_name: str) -> Optional[int]:
+        """
+        الحصول على موقع الحي في مصفوفات الإحداثيات.
+        
+        Args:
+            neighborhood_name: اسم الحي
+            
+        Returns:
+            Optional[int]: فهرس الحي أو None إذا لم تتوفر إحداثياته
+        """
+        if not neighborhood_name:
+            return None
+        return self._neighborhood_index.get(neighborhood_name.replace("حي ", "").strip())
+    
+    def compute_all_distances(self, user_lat: float, user_lon: float) -> np.ndarray:
+        """
+        حساب المسافة من موقع المستخدم إلى جميع الأحياء دفعة واحدة باستخدام صيغة هافرساين.
+        
+        Args:
+            user_lat: خط عرض المستخدم
+            user_lon: خط طول المستخدم
+            
+        Returns:
+            np.ndarray: المسافات بالكيلومتر بنفس ترتيب فهرس الأحياء
+        """
+        user_lat_rad = np.radians(user_lat)
+        user_lon_rad = np.radians(user_lon)
+        
+        dlat = self._lat_arr - user_lat_rad
+        dlon = self._lon_arr - user_lon_rad
+        a = np.sin(dlat / 2) ** 2 + np.cos(user_lat_rad) * np.cos(self._lat_arr) * np.sin(dlon / 2) ** 2
+        
+        return 2 * _EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    
+    def distance_to_neighborhood(self, neighborhood_name: str, user_lat: float, user_lon: float) -> Optional[float]:
+        """
+        المسافة من موقع المستخدم إلى حي معين من المسافات المحسوبة دفعة واحدة لجميع الأحياء.
+        يُعاد استخدام آخر حساب إذا كان لنفس موقع المستخدم.
+        
+        Args:
+            neighborhood_name: اسم الحي
+            user_lat: خط عرض المستخدم
+            user_lon: خط طول المستخدم
+            
+        Returns:
+            Optional[float]: المسافة بالكيلومتر أو None إذا لم تتوفر إحداثيات الحي
+        """
+        index = self.get_neighborhood_index(neighborhood_name)
+        if index is None:
+            return None
+        
+        origin = (user_lat, user_lon)
+        cached_origin, distances = self._distances_cache
+        if cached_origin != origin:
+            distances = self.compute_all_distances(user_lat, user_lon)
+            self._distances_cache = (origin, distances)
+        return float(distances[index])
+    
     def get_available_neighborhoods(self) -> List[str]:
         """
         الحصول على قائمة الأحياء المتاحة.
@@ -283,6 +440,37 @@ class DataLoader:
     def find_neighborhood_info(self, neighborhood_name: str) -> Dict:
         """
         البحث عن معلومات الحي في ملف الأحياء.
+        تُخزن النتائج مؤقتاً بحيث يتشارك "الملز" و"حي الملز" نفس المدخل.
+        
+        Args:
+            neighborhood_name: اسم الحي
+            
+        Returns:
+            Dict: قاموس يحتوي على معلومات الحي
+        """
+        if not neighborhood_name or not isinstance(neighborhood_name, str):
+            return {}
+        
+        cache_key = neighborhood_name.replace("حي ", "").strip()
+        with self._neighborhood_info_cache_lock:
+            cached = self._neighborhood_info_cache.get(cache_key)
+            if cached is not None:
+                self._neighborhood_info_cache.move_to_end(cache_key)
+                # نسخة سطحية حتى لا يؤثر تعديل المستدعي على المدخل المخزن
+                return dict(cached)
+        
+        result = self._find_neighborhood_info_uncached(neighborhood_name)
+        
+        with self._neighborhood_info_cache_lock:
+            self._neighborhood_info_cache[cache_key] = result
+            if len(self._neighborhood_info_cache) > _NEIGHBORHOOD_INFO_CACHE_SIZE:
+                self._neighborhood_info_cache.popitem(last=False)
+        
+        return dict(result)
+    
+    def _find_neighborhood_info_uncached(self, neighborhood_name: str) -> Dict:
+        """
+        تنفيذ البحث الفعلي عن معلومات الحي دون استخدام الذاكرة المؤقتة.
         
         Args:
             neighborhood_name: اسم الحي
@@ -361,6 +549,16 @@ class DataLoader:
     def get_cases_for_llm(self) -> List[Dict]:
         """
         الحصول على الحالات المنسقة لمعالجة النموذج اللغوي.
+        القائمة مُجهزة مسبقاً عند التحميل ومشتركة بين الطلبات، لذا يجب عدم تعديلها.
+        
+        Returns:
+            List[Dict]: قائمة بالحالات المنسقة
+        """
+        return self._llm_cases
+    
+    def _build_cases_for_llm(self) -> List[Dict]:
+        """
+        تجهيز حالات قاعدة المعرفة بالتنسيق المطلوب للنموذج اللغوي.
         
         Returns:
             List[Dict]: قائمة بالحالات المنسقة
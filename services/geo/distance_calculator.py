@@ -16,6 +16,37 @@ from core.exceptions import DistanceCalculationError
 
 logger = logging.getLogger(__name__)
 
+# نصف قطر الأرض بالكيلومتر
+_EARTH_RADIUS_KM = 6371.0
+
+# أسماء أعمدة الإحداثيات المحتملة في معلومات الحي (بأحرف صغيرة)
+_LAT_KEYS = frozenset(("lat", "latitude", "خط_العرض"))
+_LON_KEYS = frozenset(("lon", "longitude", "خط_الطول"))
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    حساب المسافة بين إحداثيين بصيغة هافرساين.
+    
+    Args:
+        lat1: خط عرض النقطة الأولى
+        lon1: خط طول النقطة الأولى
+        lat2: خط عرض النقطة الثانية
+        lon2: خط طول النقطة الثانية
+        
+    Returns:
+        float: المسافة بالكيلومتر مقربة لخانتين عشريتين
+    """
+    # تحويل الإحداثيات من درجات إلى راديان
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    
+    # صيغة هافرساين لحساب المسافة على سطح كروي
+    sin_dlat = math.sin((lat2_rad - lat1_rad) / 2)
+    sin_dlon = math.sin(math.radians(lon2 - lon1) / 2)
+    a = sin_dlat * sin_dlat + math.cos(lat1_rad) * math.cos(lat2_rad) * sin_dlon * sin_dlon
+    
+    return round(2 * _EARTH_RADIUS_KM * math.asin(math.sqrt(a)), 2)
+
 class DistanceCalculator:
     """
     خدمة لحساب المسافات بين المواقع.
@@ -128,25 +159,7 @@ class DistanceCalculator:
         Returns:
             float: المسافة بالكيلومتر
         """
-        # تحويل الإحداثيات من درجات إلى راديان
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-        
-        # صيغة هافرساين لحساب المسافة على سطح كروي
-        dlon = lon2_rad - lon1_rad
-        dlat = lat2_rad - lat1_rad
-        a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        
-        # نصف قطر الأرض بالكيلومتر
-        radius = 6371
-        
-        # حساب المسافة
-        distance = radius * c
-        
-        return round(distance, 2)
+        return _haversine_km(float(lat1), float(lon1), float(lat2), float(lon2))
     
     def get_distance_to_neighborhood(self, user_address: str, neighborhood_name: str) -> Dict[str, Any]:
         """
@@ -312,6 +325,13 @@ class DistanceCalculator:
             Optional[float]: المسافة بالكيلومترات أو None إذا لم يمكن حسابها
         """
         try:
+            # المسار السريع: المسافات إلى جميع الأحياء محسوبة دفعة واحدة ومعاد استخدامها لنفس الموقع
+            distance = self.data_loader.distance_to_neighborhood(neighborhood_name, user_lat, user_lon)
+            if distance is not None:
+                distance = round(distance, 2)
+                logger.info(f"المسافة من الإحداثيات المرسلة إلى الحي {neighborhood_name}: {distance} كم")
+                return distance
+            
             # الحصول على إحداثيات الحي
             neighborhood_info = self.data_loader.find_neighborhood_info(neighborhood_name)
             if not neighborhood_info:
@@ -319,8 +339,8 @@ class DistanceCalculator:
                 return None
             
             # التحقق مما إذا كانت لدينا إحداثيات الحي
-            lat_key = next((key for key in neighborhood_info.keys() if key.lower() in ['lat', 'latitude', 'خط_العرض']), None)
-            lon_key = next((key for key in neighborhood_info.keys() if key.lower() in ['lon', 'longitude', 'خط_الطول']), None)
+            lat_key = next((key for key in neighborhood_info.keys() if key.lower() in _LAT_KEYS), None)
+            lon_key = next((key for key in neighborhood_info.keys() if key.lower() in _LON_KEYS), None)
             
             if not lat_key or not lon_key or lat_key not in neighborhood_info or lon_key not in neighborhood_info:
                 logger.warning(f"لم يتم العثور على إحداثيات للحي: {neighborhood_name}")
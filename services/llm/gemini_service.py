@@ -5,9 +5,13 @@
 """
 
 import google.generativeai as genai
+import hashlib
 import json
 import re
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from typing import Dict, List, Tuple, Any, Optional
 import pandas as pd
 
@@ -22,6 +26,20 @@ from services.llm.templates import (
 
 logger = logging.getLogger(__name__)
 
+# الحد الأقصى لعدد ردود النموذج المخزنة مؤقتاً (للاستدعاءات الحتمية بدرجة حرارة 0 فقط)
+# المفتاح بصمة ثابتة الحجم للنص المدخل، فلا يتجاوز حجم الذاكرة المؤقتة 256 رداً وبصماتها
+# مهما طال النص المدخل (مثل نص قاعدة المعرفة كاملاً في البحث عن الحالات المشابهة)
+_RESPONSE_CACHE_SIZE = 256
+
+# المهلة القصوى بالثواني لانتظار نتيجة طلب مماثل جارٍ لمستخدم آخر
+_PENDING_REQUEST_TIMEOUT = 60.0
+
+# حجم بصمة النص المدخل بالبايت (128 بت تكفي لتجنب التصادم عملياً)
+_PROMPT_DIGEST_SIZE = 16
+
+# رسالة الخطأ العامة التي تُرجع عند فشل التوليد (لا تُخزن مؤقتاً)
+_GENERATION_ERROR_MESSAGE = "حدث خطأ أثناء معالجة طلبك. يرجى المحاولة مرة أخرى."
+
 class GeminiService:
     """
     خدمة للتفاعل مع واجهة برمجة تطبيقات Google Gemini.
@@ -47,6 +65,17 @@ class GeminiService:
                 "max_output_tokens": max_output_tokens,
             }
             
+            # ذاكرة مؤقتة (LRU) للردود الحتمية حسب (بصمة النص المدخل، الحد الأقصى للرموز)
+            # حتى لا تُرسل الرسائل المتكررة حرفياً إلى النموذج مرة أخرى
+            self._response_cache: "OrderedDict[Tuple[bytes, int], str]" = OrderedDict()
+            self._response_cache_lock = threading.Lock()
+            
+            # الطلبات الحتمية الجارية حالياً: يشترك المستخدمون المتزامنون بنفس النص المدخل في استدعاء واحد
+            self._pending_requests: Dict[Tuple[bytes, int], Future] = {}
+            
+            # آخر قائمة حالات مُرسلة ونصها بصيغة JSON (لا يُعاد التحويل ما دامت القائمة نفسها)
+            self._cases_json_cache: Tuple[Optional[List[Dict]], str] = (None, "")
+            
             logger.info(f"تم تهيئة خدمة النموذج اللغوي بنموذج: {model_name}")
             
         except Exception as e:
@@ -54,7 +83,8 @@ class GeminiService:
             raise LLMServiceError(f"فشل تهيئة خدمة النموذج اللغوي: {str(e)}")
     
     def generate_content(self, prompt: str, temperature: Optional[float] = None, 
-                         max_output_tokens: Optional[int] = None) -> str:
+                         max_output_tokens: Optional[int] = None,
+                         raise_on_error: bool = False) -> str:
         """
         توليد محتوى باستخدام النموذج اللغوي.
         
@@ -62,9 +92,13 @@ class GeminiService:
             prompt: النص المدخل للنموذج
             temperature: درجة الحرارة (الابتكار) - اختياري
             max_output_tokens: الحد الأقصى لعدد الرموز المخرجة - اختياري
+            raise_on_error: رفع LLMServiceError عند الفشل بدلاً من إرجاع رسالة الخطأ العامة
             
         Returns:
             str: النص المولد
+            
+        Raises:
+            LLMServiceError: عند فشل التوليد إذا كان raise_on_error صحيحاً
         """
         try:
             # تكوين الجيل المخصص إذا تم تقديم المعلمات
@@ -74,17 +108,74 @@ class GeminiService:
             if max_output_tokens is not None:
                 custom_config["max_output_tokens"] = max_output_tokens
             
-            response = self.model.generate_content(
-                prompt,
-                generation_config=custom_config
-            )
+            if custom_config["temperature"] != 0:
+                return self._generate(prompt, custom_config)
+            
+            # الردود بدرجة حرارة 0 حتمية، لذا يمكن إعادة استخدامها لنفس النص المدخل
+            # (يُخزن المفتاح كبصمة حتى لا تحتفظ الذاكرة المؤقتة بنسخة من كل نص مدخل طويل)
+            prompt_digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=_PROMPT_DIGEST_SIZE).digest()
+            cache_key = (prompt_digest, custom_config["max_output_tokens"])
+            with self._response_cache_lock:
+                cached = self._response_cache.get(cache_key)
+                if cached is not None:
+                    self._response_cache.move_to_end(cache_key)
+                    return cached
+                
+                # إذا كان نفس الطلب قيد التنفيذ لمستخدم آخر، انتظر نتيجته بدلاً من استدعاء جديد
+                pending = self._pending_requests.get(cache_key)
+                is_owner = pending is None
+                if is_owner:
+                    pending = Future()
+                    self._pending_requests[cache_key] = pending
+            
+            if not is_owner:
+                # انتظار محدود: إذا علق الطلب الأصلي لا تعلق معه جميع الطلبات المماثلة
+                try:
+                    result = pending.result(timeout=_PENDING_REQUEST_TIMEOUT)
+                except FutureTimeoutError:
+                    logger.warning(f"انتهت مهلة انتظار طلب مماثل جارٍ بعد {_PENDING_REQUEST_TIMEOUT} ثانية")
+                    result = _GENERATION_ERROR_MESSAGE
+                if raise_on_error and result is _GENERATION_ERROR_MESSAGE:
+                    raise LLMServiceError("فشل الطلب المماثل الجاري أو انتهت مهلة انتظاره")
+                return result
             
-            return response.text.strip()
+            result = _GENERATION_ERROR_MESSAGE
+            try:
+                result = self._generate(prompt, custom_config)
+                with self._response_cache_lock:
+                    self._response_cache[cache_key] = result
+                    if len(self._response_cache) > _RESPONSE_CACHE_SIZE:
+                        self._response_cache.popitem(last=False)
+                return result
+            finally:
+                # إبلاغ الطلبات المنتظرة بالنتيجة (أو برسالة الخطأ العامة عند الفشل)
+                with self._response_cache_lock:
+                    self._pending_requests.pop(cache_key, None)
+                pending.set_result(result)
             
         except Exception as e:
             logger.error(f"خطأ في توليد المحتوى: {str(e)}")
+            if raise_on_error:
+                raise LLMServiceError(f"فشل توليد المحتوى: {str(e)}") from e
             # إرجاع رسالة خطأ عامة بدلاً من رفع استثناء
-            return "حدث خطأ أثناء معالجة طلبك. يرجى المحاولة مرة أخرى."
+            return _GENERATION_ERROR_MESSAGE
+    
+    def _generate(self, prompt: str, generation_config: Dict[str, Any]) -> str:
+        """
+        استدعاء النموذج اللغوي مباشرة دون ذاكرة مؤقتة.
+        
+        Args:
+            prompt: النص المدخل للنموذج
+            generation_config: إعدادات التوليد
+            
+        Returns:
+            str: النص المولد
+        """
+        response = self.model.generate_content(
+            prompt,
+            generation_config=generation_config
+        )
+        return response.text.strip()
     
     def is_real_estate_query(self, user_message: str) -> bool:
         """
@@ -126,18 +217,24 @@ class GeminiService:
             logger.error(f"خطأ في توليد رد خارج النطاق: {str(e)}")
             return "أستطيع مساعدتك في البحث عن عقار أو سكن مناسب أو المرافق المتوفرة. هل يمكنني مساعدتك في إيجاد حي مناسب لاحتياجاتك؟"
     
-    def classify_query(self, user_message: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    def classify_query(self, user_message: str) -> Tuple[Optional[str], Optional[str], Optional[str], bool]:
         """
         تصنيف استعلام المستخدم واختيار ملف CSV المناسب.
+        يحدد التصنيف نفسه ما إذا كانت الرسالة خارج نطاق العقارات، لتجنب استدعاء إضافي للنموذج.
+        
+        Returns:
+            Tuple: (نوع الاستعلام، ملف CSV، عبارة البحث، هل الرسالة خارج النطاق)
         """
         try:
             # استخدام النموذج لتحديد نوع الرسالة
             prompt = QUERY_TYPE_CLASSIFICATION_TEMPLATE.format(user_message=user_message)
             
+            # رفع الخطأ بدلاً من تصنيف رسالة الخطأ العامة حتى يُحتسب الفشل في قاطع الدائرة
             query_type_response = self.generate_content(
                 prompt,
                 temperature=0.0,
                 max_output_tokens=20,
+                raise_on_error=True,
             )
             
             query_type = query_type_response.strip().lower()
@@ -171,7 +268,9 @@ class GeminiService:
                 csv_file = "سوبرماركت.csv"  
                 search_query = self.extract_entity_from_message(user_message, "supermarket")
             
-            return query_type, csv_file, search_query
+            is_off_topic = query_type == "خارج_النطاق"
+            
+            return query_type, csv_file, search_query, is_off_topic
         
         except Exception as e:
             logger.error(f"خطأ في تصنيف الاستعلام: {str(e)}")
@@ -215,8 +314,11 @@ class GeminiService:
                 logger.warning("لم يتم توفير حالات المعرفة")
                 return "[]", pd.DataFrame()
             
-            # تحويل الحالات إلى JSON
-            knowledge_cases_json = json.dumps(knowledge_cases, ensure_ascii=False)
+            # تحويل الحالات إلى JSON (مرة واحدة لكل قائمة حالات)
+            cached_cases, knowledge_cases_json = self._cases_json_cache
+            if cached_cases is not knowledge_cases:
+                knowledge_cases_json = json.dumps(knowledge_cases, ensure_ascii=False)
+                self._cases_json_cache = (knowledge_cases, knowledge_cases_json)
             
             # إنشاء prompt للنموذج اللغوي
             prompt = SIMILARITY_SEARCH_TEMPLATE.format(
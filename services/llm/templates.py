@@ -2,28 +2,29 @@
 
 """
 قوالب الأوامر لخدمة النموذج اللغوي.
+
+الأجزاء الثابتة (التعليمات وقاعدة المعرفة) تأتي أولاً والمحتوى المتغير لكل طلب
+(رسالة المستخدم) في نهاية القالب، حتى تبقى بداية الأمر متطابقة بين الطلبات
+ويستفيد منها التخزين المؤقت لبادئة الأوامر لدى مزود النموذج.
 """
 
 # قالب تحديد ما إذا كان الاستعلام متعلقًا بالعقارات
 REAL_ESTATE_QUERY_TEMPLATE = """
-المهمة: تحديد ما إذا كانت الرسالة التالية تتعلق بالبحث عن سكن أو عقار أو مرافق أم لا.
-
-رسالة المستخدم:
-{user_message}
+المهمة: تحديد ما إذا كانت رسالة المستخدم أدناه تتعلق بالبحث عن سكن أو عقار أو مرافق أم لا.
 
 قواعد التقييم:
 1. إذا كانت الرسالة تتعلق بالبحث عن سكن، أو شراء/استئجار عقار، أو طلب حي مناسب، أو أسئلة عن أسعار العقارات، أو البحث عن المرافق (مدارس، مستشفيات، حدائق، مولات، الخ) = نعم
 2. إذا كانت الرسالة تتعلق بموضوع آخر تماماً مثل الرياضة، الطعام، الفن، السياسة، أو تحية عامة = لا
 
 المطلوب: قم بتحليل الرسالة والرد فقط بـ "نعم" أو "لا" دون أي كلمات أخرى.
+
+رسالة المستخدم:
+{user_message}
 """
 
 # قالب توليد رد للاستعلامات خارج النطاق
 OFF_TOPIC_RESPONSE_TEMPLATE = """
-أنت مساعد للبحث عن العقارات والمرافق، لكن المستخدم سأل سؤالاً خارج نطاق تخصصك.
-
-رسالة المستخدم:
-{user_message}
+أنت مساعد للبحث عن العقارات والمرافق، لكن المستخدم سأل سؤالاً خارج نطاق تخصصك (رسالته في نهاية هذا النص).
 
 مهمتك:
 1. الرد بطريقة مهذبة ولطيفة على سؤال المستخدم بشكل مختصر
@@ -39,6 +40,9 @@ OFF_TOPIC_RESPONSE_TEMPLATE = """
 - شجع المستخدم على طرح أسئلة متعلقة بالسكن والعقارات والمرافق
 
 الرد يجب أن يكون باللغة العربية الفصحى.
+
+رسالة المستخدم:
+{user_message}
 """
 
 # قالب تصنيف نوع الاستعلام
@@ -54,6 +58,7 @@ QUERY_TYPE_CLASSIFICATION_TEMPLATE = """
 - مستشفى: رسائل تتعلق بالبحث عن اسم مستشفى 
 - حديقة: رسائل تتعلق بالبحث عن اسم حديقة
 - سوبرماركت: رسائل تتعلق بالبحث عن سوبرماركت
+- خارج_النطاق: رسائل لا علاقة لها بالعقارات أو السكن أو الأحياء أو المرافق
 
 الرسالة: 
 {user_message}
@@ -73,10 +78,7 @@ ENTITY_EXTRACTION_TEMPLATE = """
 
 # قالب البحث عن الحالات المشابهة
 SIMILARITY_SEARCH_TEMPLATE = """
-أمامك قائمة من الحالات السابقة للمستخدمين مع الأحياء المقترحة لهم.
-
-حالة المستخدم الحالي:
-{user_message}
+أمامك قائمة من الحالات السابقة للمستخدمين مع الأحياء المقترحة لهم، وحالة المستخدم الحالي في نهاية هذا النص.
 
 قائمة الحالات السابقة:
 {knowledge_cases_json}
@@ -108,4 +110,7 @@ SIMILARITY_SEARCH_TEMPLATE = """
 ```
 
 قدم النتائج بتنسيق JSON فقط دون أي نص إضافي.
+
+حالة المستخدم الحالي:
+{user_message}
 """
\ No newline at end of file
@@ -6,16 +6,165 @@
 """
 
 import re
+import sys
 import logging
 import pandas as pd
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Tuple
 import random
 
-from services.data.data_loader import DataLoader
+from services.data.data_loader import DataLoader, FORMATTED_PRICE_SUFFIX
 from core.exceptions import ResponseFormattingError
 
 logger = logging.getLogger(__name__)
 
+# فواصل تقسيم نص تجارب السكان إلى مميزات منفردة
+_BENEFIT_SPLIT_RE = re.compile(r'[,،\.؛;]')
+
+# علامات الترقيم الزائدة في بداية المميزة
+_LEADING_MARKS_RE = re.compile(r'^[-_*•]+')
+
+# أول رقم (صحيح أو عشري) في نص
+_NUMBER_RE = re.compile(r'(\d+(?:\.\d+)?)')
+
+# أول سعر في نص مع السماح بفواصل الآلاف (مثل "12,500 ريال")
+_PRICE_NUMBER_RE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+# المرافق المختلفة: (أسماء الأعمدة المحتملة في البيانات، (مفرد، مثنى، جمع))
+_FACILITY_COUNT_FORMS = (
+    (("Schools", "المدارس", "school_count", "عدد_المدارس"), ("مدرسة", "مدرستان", "مدارس")),
+    (("Hospitals", "المستشفيات", "hospital_count", "عدد_المستشفيات"), ("مستشفى", "مستشفيان", "مستشفيات")),
+    (("Parks", "الحدائق", "park_count", "عدد_الحدائق"), ("حديقة", "حديقتان", "حدائق")),
+    (("Supermarket", "السوبرماركت", "supermarket_count", "عدد_السوبرماركت"), ("سوبرماركت", "سوبرماركت", "سوبرماركت")),
+    (("Malls", "المولات", "mall_count", "عدد_المولات"), ("مركز تسوق", "مركزي تسوق", "مراكز تسوق")),
+)
+
+# أعمدة وصف الحي المحتملة
+_DESCRIPTION_COLUMNS = ("Description", "الوصف", "description", "about", "عن_الحي")
+
+# أنواع العقارات: (أسماء الأعمدة المحتملة، التسمية المعروضة)
+_PRICE_PROPERTY_TYPES = (
+    (("price_of_meter_Villas", "سعر_المتر_للفلل", "villa_price", "سعر_الفلل"), "سعر المتر للفلل"),
+    (("price_of_meter_Apartment", "سعر_المتر_للشقق", "apartment_price", "سعر_الشقق"), "سعر المتر للشقق"),
+    (("price_of_meter_Land", "سعر_المتر_للأراضي", "land_price", "سعر_الأراضي"), "سعر المتر للأراضي"),
+    (("price_of_meter_Commercial", "سعر_المتر_التجاري", "commercial_price", "سعر_التجاري"), "سعر المتر للمحلات التجارية"),
+    (("average_rent", "متوسط_الإيجار", "rent_price", "سعر_الإيجار"), "متوسط سعر الإيجار"),
+)
+
+# نوع العقار (موقعه في _PRICE_PROPERTY_TYPES) لكل عمود سعر، وترتيب أولوية الأعمدة
+# (أسماء الأعمدة مُدرجة بـ sys.intern لتطابق أسماء الأعمدة المُدرجة عند التحميل بالهوية مباشرة)
+_PRICE_COLUMN_ROLE = {sys.intern(col): role for role, (columns, _) in enumerate(_PRICE_PROPERTY_TYPES) for col in columns}
+_PRICE_COLUMN_RANK = {col: rank for rank, col in enumerate(_PRICE_COLUMN_ROLE)}
+
+# أعمدة مقارنة الأسعار المحتملة
+_PRICE_COMPARISON_COLUMNS = ("price_comparison", "مقارنة_الأسعار", "price_level", "مستوى_السعر")
+
+# أعمدة الموقع في المدينة والأحياء المجاورة المحتملة
+_CITY_LOCATION_COLUMNS = ("city_location", "الموقع_في_المدينة", "الموقع", "location")
+_NEARBY_COLUMNS = ("nearby_neighborhoods", "الأحياء_المجاورة", "المجاور", "الأحياء_المحيطة")
+
+# أعمدة المسافة إلى المواقع الرئيسية والتسمية المعروضة لكل منها
+_KEY_LOCATIONS = (
+    ("distance_to_airport", "المطار"),
+    ("distance_to_city_center", "وسط المدينة"),
+    ("distance_to_highway", "الطريق السريع"),
+    ("المسافة_للمطار", "المطار"),
+    ("المسافة_لوسط_المدينة", "وسط المدينة"),
+    ("المسافة_للطريق_السريع", "الطريق السريع"),
+    ("distance_to_mosque", "المسجد الرئيسي"),
+    ("المسافة_للمسجد", "المسجد الرئيسي"),
+)
+
+# أعمدة المعلومات المخصصة: الأمان، نمط الحياة، جودة المرافق
+_SAFETY_COLUMNS = ("safety_level", "مستوى_الأمان", "الأمان")
+_LIFESTYLE_COLUMNS = ("lifestyle", "نمط_الحياة", "الحياة_الاجتماعية")
+_QUALITY_COLUMNS = ("facilities_quality", "جودة_المرافق", "جودة_الخدمات")
+
+# كلمات مفتاحية في تجارب السكان والعبارة المقابلة لكل منها
+_BENEFIT_STATEMENTS = (
+    ("هدوء", "يتميز الحي بالهدوء"),
+    ("نظافة", "يعتبر الحي نظيفاً"),
+    ("راق", "يعتبر الحي راقياً"),
+    ("عائلات", "مناسب للعائلات"),
+    ("قريب", "قريب من الخدمات الأساسية"),
+    ("مسجد", "قريب من المساجد"),
+    ("مدارس", "قريب من المدارس"),
+)
+
+
+def _first_available(neighborhood_info: Dict, columns: Tuple[str, ...]) -> Tuple[Optional[str], Any]:
+    """
+    إيجاد أول عمود متوفر (بقيمة غير فارغة) من قائمة أعمدة مرتبة حسب الأولوية.
+    
+    Args:
+        neighborhood_info: قاموس يحتوي على معلومات الحي
+        columns: أسماء الأعمدة المحتملة
+        
+    Returns:
+        Tuple[Optional[str], Any]: (اسم العمود، القيمة) أو (None, None) إذا لم يوجد
+    """
+    # pd.notna(None) تساوي False، لذا يكفي استعلام واحد بـ get لكل عمود
+    return next(
+        ((col, value) for col, value in zip(columns, map(neighborhood_info.get, columns)) if pd.notna(value)),
+        (None, None)
+    )
+
+
+def _split_benefits(benefits: List[str]) -> List[str]:
+    """
+    تقسيم نصوص تجارب السكان إلى مميزات منفردة بدون تكرار مع الحفاظ على ترتيب ظهورها.
+    
+    Args:
+        benefits: نصوص تجارب السكان
+        
+    Returns:
+        List[str]: المميزات المنفردة
+    """
+    return list(dict.fromkeys(
+        _LEADING_MARKS_RE.sub('', b).strip()
+        for benefit_text in benefits
+        if benefit_text and isinstance(benefit_text, str)
+        # تقسيم النص حسب الفواصل والنقاط
+        for b in map(str.strip, _BENEFIT_SPLIT_RE.split(benefit_text))
+        # التحقق من أن المميزة تحتوي على نص معقول (أكثر من كلمتين)
+        if b and len(b.split()) >= 2
+    ))
+
+
+def _parse_price(value: Any) -> Optional[float]:
+    """
+    تحويل قيمة سعر (رقم أو نص) إلى رقم، مع تجنب التعبير النمطي للقيم الرقمية.
+    
+    Args:
+        value: قيمة السعر
+        
+    Returns:
+        Optional[float]: السعر أو None إذا تعذر استخراجه
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    
+    text = str(value)
+    try:
+        return float(text.replace(",", ""))
+    except ValueError:
+        # استخراج الرقم من النص
+        match = _PRICE_NUMBER_RE.search(text)
+        return float(match.group().replace(",", "")) if match else None
+
+
+def _count_form_index(count: int) -> int:
+    """
+    تحديد فهرس صيغة العدد المناسبة: 0 للمفرد، 1 للمثنى، 2 للجمع.
+    
+    Args:
+        count: عدد العناصر
+        
+    Returns:
+        int: فهرس الصيغة في جدول الصيغ
+    """
+    return 0 if count == 1 else 1 if count == 2 else 2
+
+
 class ResponseFormatter:
     """
     خدمة لتنسيق الردود المتعلقة بالأحياء والعقارات.
@@ -51,66 +200,68 @@ class ResponseFormatter:
         
         logger.info("تم تهيئة خدمة تنسيق الردود")
     
-    def format_neighborhood_response(self, neighborhood_name: str, personalized: bool = False) -> str:
+    def format_neighborhood_response(self, neighborhood_name: str, personalized: bool = False,
+                                     neighborhood_info: Optional[Dict] = None) -> str:
         """
         تنسيق رد شامل حول حي معين.
+        
+        Args:
+            neighborhood_name: اسم الحي
+            personalized: هل يُخصص الرد للمستخدم
+            neighborhood_info: معلومات الحي إذا جلبها المستدعي مسبقاً (تُجلب من محمل البيانات إذا لم تُمرر)
+            
+        Returns:
+            str: الرد المنسق
         """
-        try:
-            # الحصول على معلومات الحي
+        # الحصول على معلومات الحي ومميزاته (تعالج دوال محمل البيانات أخطاءها وتعيد قيماً فارغة)
+        if neighborhood_info is None:
             neighborhood_info = self.data_loader.find_neighborhood_info(neighborhood_name)
-            
-            # الحصول على مميزات الحي
-            benefits = self.data_loader.get_neighborhood_benefits(neighborhood_name)
-            
-            # تسجيل البيانات للتصحيح
-            logger.info(f"معلومات الحي {neighborhood_name}: {bool(neighborhood_info)}")
-            logger.info(f"مميزات الحي {neighborhood_name}: {len(benefits) if benefits else 0} مميزة")
-            
+        benefits = self.data_loader.get_neighborhood_benefits(neighborhood_name)
+        
+        # تسجيل البيانات للتصحيح
+        logger.info(f"معلومات الحي {neighborhood_name}: {bool(neighborhood_info)}")
+        logger.info(f"مميزات الحي {neighborhood_name}: {len(benefits) if benefits else 0} مميزة")
+        
+        # لا توجد أي بيانات عن الحي - إرجاع رد عدم التوفر مباشرة دون بناء الرد
+        if not neighborhood_info and not benefits:
+            return random.choice(self.response_templates['no_info']).format(item_name=neighborhood_name)
+        
+        try:
             # تنظيف اسم الحي وإضافة كلمة "حي" إذا لم تكن موجودة
             clean_name = neighborhood_name.replace("حي ", "").strip()
             formatted_name = f"حي {clean_name}" if not neighborhood_name.startswith("حي") else neighborhood_name
             
             # إنشاء الرد الأساسي
             template = random.choice(self.response_templates['neighborhood'])
-            response = template.format(neighborhood_name=formatted_name)
+            parts = [template.format(neighborhood_name=formatted_name)]
             
             # إضافة الوصف إذا كان متاحًا
             description = self._get_description(neighborhood_info)
             if description:
-                response += f" {description}"
+                parts.append(f" {description}")
             
             # إضافة المرافق المتاحة
             facilities = self._get_facilities(neighborhood_info)
             if facilities:
-                response += f" يتوفر في الحي العديد من المرافق والخدمات."
+                parts.append(" يتوفر في الحي العديد من المرافق والخدمات.")
             
             # إضافة معلومات الأسعار إذا كانت متاحة
             price_info = self._get_price_info(neighborhood_info)
             if price_info:
                 # عرض جميع معلومات الأسعار المتاحة
                 prices_text = ". ".join(price_info)
-                response += f" {prices_text}."
+                parts.append(f" {prices_text}.")
                     
                 # إضافة مقارنة الأسعار مع المناطق المجاورة إذا كانت متاحة
                 price_comparison = self._get_price_comparison(neighborhood_info)
                 if price_comparison:
                     comparison_template = random.choice(self.response_templates['price_comparison'])
-                    response += f" {comparison_template.format(neighborhood_name=formatted_name, comparison=price_comparison)}"
+                    parts.append(f" {comparison_template.format(neighborhood_name=formatted_name, comparison=price_comparison)}")
             
             # إضافة مميزات الحي من تجارب السكان - التغيير المهم هنا
             if benefits:
                 # حذفنا استدعاء self._format_benefits وجعلناه يظهر مباشرة
-                all_benefits = []
-                for benefit_text in benefits:
-                    if not benefit_text or not isinstance(benefit_text, str):
-                        continue
-                        
-                    individual_benefits = re.split(r'[,،\.؛;]', benefit_text)
-                    for b in individual_benefits:
-                        b = b.strip()
-                        if b and len(b.split()) >= 2 and b not in all_benefits:
-                            b = re.sub(r'^[-_*•]+', '', b).strip()
-                            all_benefits.append(b)
+                all_benefits = _split_benefits(benefits)
                 
                 # إزالة المميزات السلبية
                 negative_words = ["سيء", "رديء", "مشكلة", "ازعاج", "ضوضاء", "غير", "لا ", "ليس", "ضعيف", "سلبي"]
@@ -128,8 +279,9 @@ class ResponseFormatter:
                 
                 for benefit in filtered_benefits:
                     group_match = -1
+                    benefit_lower = benefit.lower()
                     for i, group in enumerate(contradictory_groups):
-                        if any(word in benefit.lower() for word in group):
+                        if any(word in benefit_lower for word in group):
                             group_match = i
                             break
                             
@@ -142,21 +294,21 @@ class ResponseFormatter:
                 top_benefits = final_benefits[:4]
                 if top_benefits:
                     benefits_text = "، ".join(top_benefits)
-                    response += f" ويتميز الحي بـ: {benefits_text}."
+                    parts.append(f" ويتميز الحي بـ: {benefits_text}.")
             
             # باقي الكود كما هو...
             location_info = self._get_location_info(neighborhood_info)
             if location_info:
-                response += f" {location_info}"
+                parts.append(f" {location_info}")
             
             if personalized:
                 custom_info = self._get_personalized_info(neighborhood_info, benefits)
                 if custom_info:
-                    response += f" {custom_info}"
+                    parts.append(f" {custom_info}")
             
-            response += self._get_closing_statement(formatted_name)
+            parts.append(self._get_closing_statement(formatted_name))
             
-            return response
+            return "".join(parts)
                     
         except Exception as e:
             logger.error(f"خطأ في تنسيق رد الحي: {str(e)}")
@@ -285,13 +437,8 @@ class ResponseFormatter:
             return ""
         
         # البحث في أعمدة مختلفة محتملة للوصف
-        description_columns = ["Description", "الوصف", "description", "about", "عن_الحي"]
-        
-        for col in description_columns:
-            if col in neighborhood_info and pd.notna(neighborhood_info[col]):
-                return str(neighborhood_info[col])
-        
-        return ""
+        col, value = _first_available(neighborhood_info, _DESCRIPTION_COLUMNS)
+        return str(value) if col else ""
     
     def _get_facilities(self, neighborhood_info: Dict) -> List[str]:
         """
@@ -308,64 +455,18 @@ class ResponseFormatter:
         if not neighborhood_info:
             return facilities
         
-        # تعريف المرافق المختلفة وتعدد الصيغ المحتملة لها في البيانات
-        facility_mappings = {
-            "Schools": {
-                "names": ["Schools", "المدارس", "school_count", "عدد_المدارس"],
-                "singular": "مدرسة",
-                "plural2": "مدرستان", # للعدد 2
-                "plural": "مدارس"      # للعدد 3 فأكثر
-            },
-            "Hospitals": {
-                "names": ["Hospitals", "المستشفيات", "hospital_count", "عدد_المستشفيات"],
-                "singular": "مستشفى",
-                "plural2": "مستشفيان",
-                "plural": "مستشفيات"
-            },
-            "Parks": {
-                "names": ["Parks", "الحدائق", "park_count", "عدد_الحدائق"],
-                "singular": "حديقة",
-                "plural2": "حديقتان",
-                "plural": "حدائق"
-            },
-            "Supermarket": {
-                "names": ["Supermarket", "السوبرماركت", "supermarket_count", "عدد_السوبرماركت"],
-                "singular": "سوبرماركت",
-                "plural2": "سوبرماركت",
-                "plural": "سوبرماركت"
-            },
-            "Malls": {
-                "names": ["Malls", "المولات", "mall_count", "عدد_المولات"],
-                "singular": "مركز تسوق",
-                "plural2": "مركزي تسوق",
-                "plural": "مراكز تسوق"
-            }
-        }
-        
         # استخراج المرافق مع مراعاة صيغة الجمع الصحيحة
-        for facility_key, mapping in facility_mappings.items():
+        for column_names, forms in _FACILITY_COUNT_FORMS:
             # البحث عن أي اسم من أسماء العمود المحتملة
-            found_value = None
-            for name in mapping["names"]:
-                if name in neighborhood_info and pd.notna(neighborhood_info[name]):
-                    found_value = neighborhood_info[name]
-                    break
+            _, found_value = _first_available(neighborhood_info, column_names)
             
             if found_value is not None:
                 try:
                     # محاولة تحويل القيمة إلى عدد
                     count = int(float(found_value))
                     if count > 0:
-                        # تحديد صيغة العدد المناسبة (مفرد، مثنى، جمع)
-                        if count == 1:
-                            name = mapping["singular"]
-                            facilities.append(f"{count} {name}")
-                        elif count == 2:
-                            name = mapping["plural2"]
-                            facilities.append(f"{count} {name}")
-                        else:
-                            name = mapping["plural"]
-                            facilities.append(f"{count} {name}")
+                        # تحديد صيغة العدد المناسبة (مفرد، مثنى، جمع) بفهرس واحد في الجدول
+                        facilities.append(f"{count} {forms[_count_form_index(count)]}")
                 except (ValueError, TypeError):
                     # إذا لم تكن القيمة رقماً، فقد تكون نصاً يصف المرافق
                     if isinstance(found_value, str) and found_value.strip():
@@ -388,41 +489,16 @@ class ResponseFormatter:
         if not neighborhood_info:
             return price_info
         
-        # تعريف أنواع العقارات وتعدد أسماء الأعمدة المحتملة لها
-        property_types = {
-            "Villas": {
-                "names": ["price_of_meter_Villas", "سعر_المتر_للفلل", "villa_price", "سعر_الفلل"],
-                "label": "سعر المتر للفلل"
-            },
-            "Apartment": {
-                "names": ["price_of_meter_Apartment", "سعر_المتر_للشقق", "apartment_price", "سعر_الشقق"],
-                "label": "سعر المتر للشقق"
-            },
-            "Land": {
-                "names": ["price_of_meter_Land", "سعر_المتر_للأراضي", "land_price", "سعر_الأراضي"],
-                "label": "سعر المتر للأراضي"
-            },
-            "Commercial": {
-                "names": ["price_of_meter_Commercial", "سعر_المتر_التجاري", "commercial_price", "سعر_التجاري"],
-                "label": "سعر المتر للمحلات التجارية"
-            },
-            "Rent": {
-                "names": ["average_rent", "متوسط_الإيجار", "rent_price", "سعر_الإيجار"],
-                "label": "متوسط سعر الإيجار"
-            }
-        }
+        # مرور واحد على أعمدة الأسعار الموجودة فعلاً (تقاطع المفاتيح) لإيجاد أول عمود متوفر لكل نوع عقاري
+        found_by_role = {}
+        for col in sorted(neighborhood_info.keys() & _PRICE_COLUMN_ROLE.keys(), key=_PRICE_COLUMN_RANK.__getitem__):
+            role = _PRICE_COLUMN_ROLE[col]
+            if role not in found_by_role and pd.notna(neighborhood_info[col]):
+                found_by_role[role] = (col, neighborhood_info[col])
         
         # استخراج معلومات الأسعار لكل نوع عقاري
-        for prop_type, config in property_types.items():
-            # البحث عن أي اسم من أسماء العمود المحتملة
-            found_value = None
-            found_column = None
-            
-            for name in config["names"]:
-                if name in neighborhood_info and pd.notna(neighborhood_info[name]):
-                    found_value = neighborhood_info[name]
-                    found_column = name
-                    break
+        for role, (_, label) in enumerate(_PRICE_PROPERTY_TYPES):
+            found_column, found_value = found_by_role.get(role, (None, None))
             
             if found_value is not None:
                 try:
@@ -430,20 +506,20 @@ class ResponseFormatter:
                     if isinstance(found_value, (int, float)):
                         price = int(found_value)
                         # تنسيق السعر بفواصل الآلاف
-                        formatted_price = "{:,}".format(price)
+                        formatted_price = f"{price:,}"
                         
                         # تحديد الوحدة بناءً على نوع العمود
                         if 'rent' in found_column.lower() or 'إيجار' in found_column:
-                            price_info.append(f"{config['label']} {formatted_price} ريال شهرياً")
+                            price_info.append(f"{label} {formatted_price} ريال شهرياً")
                         else:
-                            price_info.append(f"{config['label']} {formatted_price} ريال")
+                            price_info.append(f"{label} {formatted_price} ريال")
                     elif isinstance(found_value, str) and found_value.strip():
                         # إذا كانت القيمة نصية، استخدمها مباشرة
-                        price_info.append(f"{config['label']} {found_value}")
+                        price_info.append(f"{label} {found_value}")
                 except (ValueError, TypeError):
                     # إذا حدث خطأ في تحويل القيمة، استخدم النص كما هو
                     if isinstance(found_value, str) and found_value.strip():
-                        price_info.append(f"{config['label']} {found_value}")
+                        price_info.append(f"{label} {found_value}")
         
         return price_info
     
@@ -461,13 +537,10 @@ class ResponseFormatter:
             return None
         
         # البحث في أعمدة مختلفة محتملة لمقارنة الأسعار
-        comparison_columns = [
-            "price_comparison", "مقارنة_الأسعار", "price_level", "مستوى_السعر"
-        ]
-        
-        for col in comparison_columns:
-            if col in neighborhood_info and pd.notna(neighborhood_info[col]):
-                value = str(neighborhood_info[col]).lower()
+        for col in _PRICE_COMPARISON_COLUMNS:
+            raw_value = neighborhood_info.get(col)
+            if pd.notna(raw_value):
+                value = str(raw_value).lower()
                 
                 # ترجمة القيم المختلفة إلى التصنيفات الثلاثة الرئيسية
                 if any(term in value for term in ["high", "مرتفع", "عالي", "عالية", "أعلى"]):
@@ -489,21 +562,7 @@ class ResponseFormatter:
             return ""
         
         # استخراج كل المميزات المذكورة
-        all_benefits = []
-        for benefit_text in benefits:
-            if not benefit_text or not isinstance(benefit_text, str):
-                continue
-                
-            # تقسيم النص حسب الفواصل والنقاط
-            individual_benefits = re.split(r'[,،\.؛;]', benefit_text)
-            
-            for b in individual_benefits:
-                b = b.strip()
-                # التحقق من أن المميزة تحتوي على نص معقول (أكثر من كلمتين)
-                if b and len(b.split()) >= 2 and b not in all_benefits:
-                    # تنظيف النص من علامات الترقيم الزائدة
-                    b = re.sub(r'^[-_*•]+', '', b).strip()
-                    all_benefits.append(b)
+        all_benefits = _split_benefits(benefits)
         
         # تحديد الكلمات المتناقضة للتحقق منها
         contradictions = [
@@ -518,8 +577,9 @@ class ResponseFormatter:
         for benefit in all_benefits:
             # تحقق من أي مجموعة تنتمي إليها هذه الميزة
             current_group = None
+            benefit_lower = benefit.lower()
             for i, group in enumerate(contradictions):
-                if any(word in benefit.lower() for word in group):
+                if any(word in benefit_lower for word in group):
                     current_group = i
                     break
             
@@ -560,40 +620,25 @@ class ResponseFormatter:
             return location_text
         
         # استخراج الموقع من المدينة
-        city_location_columns = ["city_location", "الموقع_في_المدينة", "الموقع", "location"]
-        for col in city_location_columns:
-            if col in neighborhood_info and pd.notna(neighborhood_info[col]):
-                location_text += f"يقع الحي في {neighborhood_info[col]}. "
-                break
+        col, value = _first_available(neighborhood_info, _CITY_LOCATION_COLUMNS)
+        if col:
+            location_text += f"يقع الحي في {value}. "
         
         # استخراج الأحياء المجاورة
-        nearby_columns = ["nearby_neighborhoods", "الأحياء_المجاورة", "المجاور", "الأحياء_المحيطة"]
-        for col in nearby_columns:
-            if col in neighborhood_info and pd.notna(neighborhood_info[col]):
-                location_text += f"يحده {neighborhood_info[col]}. "
-                break
+        col, value = _first_available(neighborhood_info, _NEARBY_COLUMNS)
+        if col:
+            location_text += f"يحده {value}. "
         
         # استخراج معلومات القرب من الخدمات الرئيسية
-        key_locations = {
-            "distance_to_airport": "المطار",
-            "distance_to_city_center": "وسط المدينة",
-            "distance_to_highway": "الطريق السريع",
-            "المسافة_للمطار": "المطار",
-            "المسافة_لوسط_المدينة": "وسط المدينة",
-            "المسافة_للطريق_السريع": "الطريق السريع",
-            "distance_to_mosque": "المسجد الرئيسي",
-            "المسافة_للمسجد": "المسجد الرئيسي"
-        }
-        
         distance_info = []
-        for col, label in key_locations.items():
-            if col in neighborhood_info and pd.notna(neighborhood_info[col]):
-                value = neighborhood_info[col]
+        for col, label in _KEY_LOCATIONS:
+            value = neighborhood_info.get(col)
+            if pd.notna(value):
                 if isinstance(value, (int, float)):
                     distance_info.append(f"يبعد {value} كم عن {label}")
                 elif isinstance(value, str) and value.strip():
                     # محاولة استخراج الرقم من النص إذا كان ذلك ممكناً
-                    match = re.search(r'(\d+(?:\.\d+)?)', value)
+                    match = _NUMBER_RE.search(value)
                     if match:
                         num = match.group(1)
                         distance_info.append(f"يبعد {num} كم عن {label}")
@@ -622,41 +667,26 @@ class ResponseFormatter:
         custom_info = []
         
         # استخراج معلومات عن الأمان
-        safety_columns = ["safety_level", "مستوى_الأمان", "الأمان"]
-        for col in safety_columns:
-            if col in neighborhood_info and pd.notna(neighborhood_info[col]):
-                custom_info.append(f"مستوى الأمان في الحي {neighborhood_info[col]}")
-                break
+        col, value = _first_available(neighborhood_info, _SAFETY_COLUMNS)
+        if col:
+            custom_info.append(f"مستوى الأمان في الحي {value}")
         
         # استخراج معلومات عن نمط الحياة
-        lifestyle_columns = ["lifestyle", "نمط_الحياة", "الحياة_الاجتماعية"]
-        for col in lifestyle_columns:
-            if col in neighborhood_info and pd.notna(neighborhood_info[col]):
-                custom_info.append(f"نمط الحياة في الحي {neighborhood_info[col]}")
-                break
+        col, value = _first_available(neighborhood_info, _LIFESTYLE_COLUMNS)
+        if col:
+            custom_info.append(f"نمط الحياة في الحي {value}")
         
         # استخراج معلومات عن جودة المرافق
-        quality_columns = ["facilities_quality", "جودة_المرافق", "جودة_الخدمات"]
-        for col in quality_columns:
-            if col in neighborhood_info and pd.notna(neighborhood_info[col]):
-                custom_info.append(f"جودة المرافق والخدمات {neighborhood_info[col]}")
-                break
+        col, value = _first_available(neighborhood_info, _QUALITY_COLUMNS)
+        if col:
+            custom_info.append(f"جودة المرافق والخدمات {value}")
         
         # استخراج معلومات مميزة من تجارب السكان
         if benefits:
-            # البحث عن كلمات مفتاحية محددة في تجارب السكان
-            keywords = {
-                "هدوء": "يتميز الحي بالهدوء",
-                "نظافة": "يعتبر الحي نظيفاً",
-                "راق": "يعتبر الحي راقياً",
-                "عائلات": "مناسب للعائلات",
-                "قريب": "قريب من الخدمات الأساسية",
-                "مسجد": "قريب من المساجد",
-                "مدارس": "قريب من المدارس"
-            }
-            
-            for keyword, statement in keywords.items():
-                if any(keyword in benefit.lower() for benefit in benefits if isinstance(benefit, str)):
+            # البحث عن كلمات مفتاحية محددة في تجارب السكان (توحيد حالة الأحرف مرة واحدة لكل تجربة)
+            lowered_benefits = [benefit.lower() for benefit in benefits if isinstance(benefit, str)]
+            for keyword, statement in _BENEFIT_STATEMENTS:
+                if any(keyword in benefit for benefit in lowered_benefits):
                     if statement not in custom_info:
                         custom_info.append(statement)
         
@@ -708,26 +738,18 @@ class ResponseFormatter:
                 
                 # البحث عن معلومات الأسعار
                 for key, value in hood_info.items():
+                    # تخطي النصوص المنسقة مسبقاً لأنها نسخ من أعمدة الأسعار الأصلية
+                    if key.endswith(FORMATTED_PRICE_SUFFIX):
+                        continue
+                    
                     if ("price" in key.lower() or "سعر" in key) and pd.notna(value):
-                        try:
-                            # محاولة استخراج رقم من القيمة
-                            if isinstance(value, (int, float)):
-                                price = float(value)
-                            else:
-                                # استخراج الرقم من النص
-                                match = re.search(r'(\d+(?:\.\d+)?)', str(value))
-                                if match:
-                                    price = float(match.group(1))
-                                else:
-                                    continue
-                                
-                            # تحديث الحي الأرخص
-                            if price > 0 and price < lowest_price:
-                                lowest_price = price
-                                cheapest_hood = hood
-                                
-                        except (ValueError, TypeError):
-                            continue
+                        # محاولة استخراج رقم من القيمة
+                        price = _parse_price(value)
+                        
+                        # تحديث الحي الأرخص
+                        if price is not None and 0 < price < lowest_price:
+                            lowest_price = price
+                            cheapest_hood = hood
             
             return cheapest_hood
             
@@ -759,10 +781,10 @@ class ResponseFormatter:
                     continue
                 
                 # البحث عن أقرب حي للمركز
-                distance_column = "distance_to_city_center"
-                if distance_column in hood_info and pd.notna(hood_info[distance_column]):
+                distance_value = hood_info.get("distance_to_city_center")
+                if pd.notna(distance_value):
                     try:
-                        distance = float(hood_info[distance_column])
+                        distance = float(distance_value)
                         if distance < min_distance:
                             min_distance = distance
                             best_hood = hood
@@ -7,7 +7,7 @@
 import logging
 import pandas as pd
 import re
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from services.data.data_loader import DataLoader
 from services.llm.gemini_service import GeminiService
@@ -15,6 +15,20 @@ from core.exceptions import NeighborhoodRecommendationError
 
 logger = logging.getLogger(__name__)
 
+# أنماط الطلبات الصريحة لحي محدد (جميعها تحتوي على "حي" أو "منطقة")
+_EXPLICIT_NEIGHBORHOOD_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'اقترح (?:لي|علي) (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
+    r'أقترح (?:لي|علي) (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
+    r'اقتراح (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
+    r'(?:أبي|أبغى|أريد|ابي|ابغى|اريد) (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
+    r'معلومات عن (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
+    r'(?:ساكن|أسكن|اسكن) في (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
+    r'أفضل (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
+))
+
+# كلمات يجب أن تظهر في الرسالة قبل تجربة أنماط الطلبات الصريحة أعلاه
+_EXPLICIT_NEIGHBORHOOD_TRIGGERS = ("حي", "منطقة")
+
 class NeighborhoodRecommendationService:
     """
     خدمة للتوصية بالأحياء المناسبة بناءً على رسالة المستخدم.
@@ -29,8 +43,32 @@ class NeighborhoodRecommendationService:
         """
         self.data_loader = data_loader
         self.llm_service = llm_service
+        # أسماء الأحياء المتاحة مع أسمائها بدون بادئة "حي" (تُبنى عند تغير قائمة الأحياء فقط)
+        self._clean_neighborhoods = ()
+        self._clean_neighborhoods_source = None
+        # نمط مُجمّع لجميع الأسماء المنظفة يكشف بمسح واحد ما إذا كانت الرسالة تذكر أي حي
+        self._clean_neighborhood_regex = None
         logger.info("تم تهيئة خدمة توصيات الأحياء")
     
+    def _get_clean_neighborhoods(self) -> Tuple[Tuple[str, str], ...]:
+        """
+        الحصول على أزواج (اسم الحي، الاسم بدون بادئة "حي") للأحياء المتاحة.
+        يُعاد بناء الأزواج فقط إذا تغيرت قائمة الأحياء في محمل البيانات.
+        
+        Returns:
+            Tuple[Tuple[str, str], ...]: أزواج (اسم الحي، الاسم المنظف)
+        """
+        neighborhoods = self.data_loader.get_available_neighborhoods()
+        if neighborhoods is not self._clean_neighborhoods_source:
+            self._clean_neighborhoods = tuple(
+                (neighborhood, neighborhood.replace("حي ", "").strip()) for neighborhood in neighborhoods
+            )
+            self._clean_neighborhood_regex = re.compile(
+                "|".join(re.escape(clean_name) for _, clean_name in self._clean_neighborhoods)
+            ) if self._clean_neighborhoods else None
+            self._clean_neighborhoods_source = neighborhoods
+        return self._clean_neighborhoods
+    
     def get_recommended_neighborhood(self, user_message: str) -> str:
         """
         الحصول على الحي الموصى به بناءً على رسالة المستخدم.
@@ -100,22 +138,17 @@ class NeighborhoodRecommendationService:
             "من", "إلى", "على", "في", "عن", "مع", "حول", "قرب", "بجانب"
         ]
         
-        # أنماط للعثور على طلبات صريحة للأحياء
-        explicit_patterns = [
-            r'اقترح (?:لي|علي) (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
-            r'أقترح (?:لي|علي) (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
-            r'اقتراح (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
-            r'(?:أبي|أبغى|أريد|ابي|ابغى|اريد) (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
-            r'معلومات عن (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
-            r'(?:ساكن|أسكن|اسكن) في (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)',
-            r'أفضل (?:حي|منطقة) ([\u0600-\u06FF\s]+?)(?:\.|$|\s)'
-        ]
-        
         # تتيح التحليل على سطر واحد
         user_message_oneline = user_message.replace('\n', ' ')
         
+        # تخطي أنماط الطلبات الصريحة إذا لم تحتوِ الرسالة على "حي" أو "منطقة"
+        if any(trigger in user_message_oneline for trigger in _EXPLICIT_NEIGHBORHOOD_TRIGGERS):
+            explicit_patterns = _EXPLICIT_NEIGHBORHOOD_PATTERNS
+        else:
+            explicit_patterns = ()
+        
         for pattern in explicit_patterns:
-            match = re.search(pattern, user_message_oneline)
+            match = pattern.search(user_message_oneline)
             if match:
                 neighborhood = match.group(1).strip()
                 
@@ -130,13 +163,9 @@ class NeighborhoodRecommendationService:
                     continue
                     
                 # التحقق من وجود هذا الحي في قائمة الأحياء المتاحة
-                available_neighborhoods = self.data_loader.get_available_neighborhoods()
-                found_match = False
+                clean_matched = neighborhood.replace("حي ", "").strip()
                 
-                for available_hood in available_neighborhoods:
-                    clean_available = available_hood.replace("حي ", "").strip()
-                    clean_matched = neighborhood.replace("حي ", "").strip()
-                    
+                for available_hood, clean_available in self._get_clean_neighborhoods():
                     if clean_available == clean_matched or clean_available in clean_matched or clean_matched in clean_available:
                         logger.info(f"تم العثور على حي مطابق: {available_hood}")
                         return available_hood
@@ -144,9 +173,8 @@ class NeighborhoodRecommendationService:
                 # إذا وصلنا إلى هنا، فلم يتم العثور على تطابق في قائمة الأحياء المتاحة
                 return None
         
-        # فحص وجود عبارة صريحة في نهاية الرسالة
-        lines = user_message.split('\n')
-        last_line = lines[-1].strip() if lines else ""
+        # فحص وجود عبارة صريحة في نهاية الرسالة (استخراج آخر سطر فقط دون تقسيم الرسالة كاملة)
+        last_line = user_message.rpartition('\n')[2].strip()
         
         # البحث عن أنماط محددة في آخر سطر
         last_line_patterns = [
@@ -165,11 +193,8 @@ class NeighborhoodRecommendationService:
                     continue
                     
                 # التحقق مما إذا كان هذا اسم حي معروف
-                available_neighborhoods = self.data_loader.get_available_neighborhoods()
-                for available_hood in available_neighborhoods:
-                    clean_available = available_hood.replace("حي ", "").strip()
-                    clean_matched = neighborhood.replace("حي ", "").strip()
-                    
+                clean_matched = neighborhood.replace("حي ", "").strip()
+                for available_hood, clean_available in self._get_clean_neighborhoods():
                     if clean_available == clean_matched or clean_available in clean_matched or clean_matched in clean_available:
                         logger.info(f"تم العثور على حي مطابق في السطر الأخير: {available_hood}")
                         return available_hood
@@ -238,8 +263,8 @@ class NeighborhoodRecommendationService:
         if not user_message:
             return None
         
-        # قائمة الأحياء المتاحة
-        available_neighborhoods = self.data_loader.get_available_neighborhoods()
+        # قائمة الأحياء المتاحة مع أسمائها المنظفة
+        clean_neighborhoods = self._get_clean_neighborhoods()
         
         # أولاً، ابحث عن أنماط الجمل التي تشير إلى الحي المقصود للسكن
         housing_patterns = [
@@ -252,12 +277,10 @@ class NeighborhoodRecommendationService:
         for pattern in housing_patterns:
             match = re.search(pattern, user_message)
             if match:
-                potential_hood = match.group(1).strip()
-                for neighborhood in available_neighborhoods:
-                    # إزالة بادئة "حي" إذا كانت موجودة
-                    clean_name = neighborhood.replace("حي ", "").strip()
-                    
-                    if clean_name.lower() == potential_hood.lower() or clean_name.lower() in potential_hood.lower():
+                potential_hood = match.group(1).strip().lower()
+                for neighborhood, clean_name in clean_neighborhoods:
+                    clean_lower = clean_name.lower()
+                    if clean_lower == potential_hood or clean_lower in potential_hood:
                         logger.info(f"تم العثور على اسم الحي في سياق السكن: {neighborhood}")
                         return neighborhood
         
@@ -274,11 +297,12 @@ class NeighborhoodRecommendationService:
                 work_hood = match.group(1).strip()
                 work_neighborhoods.append(work_hood)
         
+        # فحص مسبق بمسح واحد: إذا لم يُذكر أي اسم حي في الرسالة فلا داعي لفحص الأحياء واحداً واحداً
+        if self._clean_neighborhood_regex is None or not self._clean_neighborhood_regex.search(user_message):
+            return None
+        
         # الآن ابحث عن أي حي متاح في الرسالة (باستثناء أحياء العمل)
-        for neighborhood in available_neighborhoods:
-            # إزالة بادئة "حي" إذا كانت موجودة
-            clean_name = neighborhood.replace("حي ", "").strip()
-            
+        for neighborhood, clean_name in clean_neighborhoods:
             # فحص ما إذا كان اسم الحي موجودًا في رسالة المستخدم وليس في أحياء العمل
             if clean_name in user_message and not any(clean_name in work_hood for work_hood in work_neighborhoods):
                 logger.info(f"تم العثور على اسم الحي في رسالة المستخدم: {neighborhood}")
@@ -6,14 +6,96 @@
 
 import logging
 import re
+import threading
 import pandas as pd
-from typing import Dict, List, Optional, Union, Any
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union, Any, Tuple
 
 from services.data.data_loader import DataLoader
 from core.exceptions import FacilitySearchError
 
 logger = logging.getLogger(__name__)
 
+# الحد الأقصى لعدد نتائج البحث عن المرافق المخزنة مؤقتاً
+_FACILITY_CACHE_SIZE = 512
+
+# أسماء أعمدة الحي المحتملة في ملفات المرافق (بترتيب الأولوية)
+_NEIGHBORHOOD_COLUMNS = ("الحي", "اسم_الحي", "neighborhood", "المنطقة", "location", "الحيّ")
+
+# محارف التعابير النمطية الخاصة (البحث المباشر في الأعمدة يعامل اسم الحي كتعبير نمطي)
+_REGEX_METACHARS = frozenset(".^$*+?{}[]\\|()")
+
+# البادئات التي تبدأ بها جميع ردود search_entity عند عدم وجود نتائج أو تعذر البحث
+_NO_RESULT_PREFIXES = ("لم يتم العثور", "عذراً")
+
+# أعمدة الاسم الاحتياطية عند غياب عمود الاسم المحدد للملف (بترتيب الأولوية)
+_FALLBACK_NAME_COLUMNS = ("الاسم", "اسم_المدرسة", "اسم_المستشفى", "اسم_الحديقة", "اسم_السوبرماركت", "اسم_المول")
+
+# ملف CSV وعنوان قائمة النتائج لكل نوع مرفق
+_FACILITY_SOURCES = {
+    "مدرسة": ("المدارس.csv", "المدارس"),
+    "مستشفى": ("مستشفى.csv", "المستشفيات والمراكز الطبية"),
+    "حديقة": ("حدائق.csv", "الحدائق والمتنزهات"),
+    "سوبرماركت": ("سوبرماركت.csv", "محلات السوبرماركت"),
+    "مول": ("مول.csv", "المولات ومراكز التسوق"),
+}
+
+# صيغ "المرافق الأخرى" في جملة "ويوجد ... في الحي" لكل نوع مرفق:
+# (مفرد، مثنى، جمع للأعداد 3-10، تمييز مفرد للأعداد 11 فأكثر)
+_REMAINING_FORMS = {
+    "مدرسة": ("مدرسة أخرى", "مدرستان أخريان", "{n} مدارس أخرى", "{n} مدرسة أخرى"),
+    "مستشفى": ("مستشفى آخر", "مستشفيان آخران", "{n} مستشفيات أخرى", "{n} مستشفى آخر"),
+    "حديقة": ("حديقة أخرى", "حديقتان أخريان", "{n} حدائق أخرى", "{n} حديقة أخرى"),
+    "سوبرماركت": ("متجر آخر", "متجران آخران", "{n} متاجر أخرى", "{n} متجراً آخر"),
+    "مول": ("مركز تسوق آخر", "مركزا تسوق آخران", "{n} مراكز تسوق أخرى", "{n} مركز تسوق آخر"),
+}
+
+# الصيغ المستخدمة عندما يكون نوع المرفق غير محدد أو غير معروف
+_GENERIC_REMAINING_FORMS = ("مرفق آخر", "مرفقان آخران", "{n} مرافق أخرى", "{n} مرفقاً آخر")
+
+
+def _clean_facility_name(value: str) -> str:
+    """
+    إزالة العنوان أو التفاصيل من اسم المرفق (ما بعد '|'، أو ما بعد ':' إذا لم يوجد '|').
+    
+    Args:
+        value: قيمة عمود الاسم
+        
+    Returns:
+        str: اسم المرفق فقط
+    """
+    if '|' in value:
+        return value.split('|', 1)[0].strip()
+    return value.split(':', 1)[0].strip()
+
+
+def _remaining_facilities_phrase(facility_type: Optional[str], remaining: int) -> str:
+    """
+    بناء جملة الإشارة إلى المرافق غير المعروضة.
+    
+    Args:
+        facility_type: نوع المرفق
+        remaining: عدد المرافق غير المعروضة
+        
+    Returns:
+        str: الجملة المنسقة
+    """
+    forms = _REMAINING_FORMS.get(facility_type, _GENERIC_REMAINING_FORMS)
+    form_index = 0 if remaining == 1 else 1 if remaining == 2 else 2 if remaining <= 10 else 3
+    return f"\nويوجد {forms[form_index].format(n=remaining)} في الحي."
+
+
+@dataclass(slots=True, frozen=True)
+class FacilityResult:
+    """
+    نتيجة البحث عن المرافق في حي معين بصيغة منظمة إلى جانب النص المنسق.
+    """
+    found: bool
+    text: str  # النص المنسق المعروض للمستخدم (أو رسالة عدم الوجود)
+    count: int = 0  # العدد الكلي للمرافق المطابقة في الحي
+    names: Tuple[str, ...] = ()  # أسماء المرافق المعروضة في النص بنفس الترتيب
+
 class FacilitySearchService:
     """
     خدمة للبحث عن المرافق والمنشآت في الأحياء المختلفة.
@@ -27,6 +109,14 @@ class FacilitySearchService:
         """
         self.data_loader = data_loader
         
+        # ذاكرة مؤقتة (LRU) لنتائج البحث عن المرافق حسب (الحي، نوع المرفق)
+        self._facility_cache: "OrderedDict[Tuple[str, Optional[str]], FacilityResult]" = OrderedDict()
+        self._facility_cache_lock = threading.Lock()
+        
+        # نص مواقع المرافق الموحد لكل ملف CSV (للاستبعاد السريع للأحياء الخالية) - يُبنى عند أول استخدام
+        self._location_texts: Optional[Dict[str, str]] = None
+        self._location_texts_lock = threading.Lock()
+        
         # ربط ملفات CSV بأسمائها للمساعدة في عمليات البحث
         self.csv_mappings = {
             "المدارس.csv": data_loader.get_schools_data(),
@@ -85,6 +175,17 @@ class FacilitySearchService:
             "مرفق", "مرافق", "خدمات", "منشآت", "قريب", "قريبة", "المتوفرة"
         ]
         
+        # أنماط مُجمّعة للكلمات المفتاحية (الأطول أولاً) تفحص الرسالة في مسح واحد،
+        # مع قاموس يربط كل كلمة بأول نوع مرفق تنتمي إليه
+        self._keyword_to_facility = {}
+        for facility_type, keywords in self.facility_keywords.items():
+            for keyword in keywords:
+                self._keyword_to_facility.setdefault(keyword, facility_type)
+        self._facility_keyword_regex = re.compile(
+            "|".join(map(re.escape, sorted(self._keyword_to_facility, key=len, reverse=True)))
+        )
+        self._general_keyword_regex = re.compile("|".join(map(re.escape, self.general_facility_keywords)))
+        
         logger.info("تم تهيئة خدمة البحث عن المرافق")
     
     def is_facility_query(self, message: str) -> bool:
@@ -103,15 +204,16 @@ class FacilitySearchService:
         message_lower = message.lower()
         
         # التحقق من الكلمات المفتاحية العامة للمرافق
-        if any(keyword in message_lower for keyword in self.general_facility_keywords):
+        if self._general_keyword_regex.search(message_lower):
             logger.info(f"تم تحديد الاستعلام كاستعلام عام عن المرافق: {message}")
             return True
         
-        # التحقق من الكلمات المفتاحية لكل نوع من المرافق
-        for facility_type, keywords in self.facility_keywords.items():
-            if any(keyword in message_lower for keyword in keywords):
-                logger.info(f"تم تحديد الاستعلام كاستعلام عن {facility_type}: {message}")
-                return True
+        # التحقق من الكلمات المفتاحية لكل أنواع المرافق بمسح واحد
+        match = self._facility_keyword_regex.search(message_lower)
+        if match:
+            facility_type = self._keyword_to_facility[match.group(0)]
+            logger.info(f"تم تحديد الاستعلام كاستعلام عن {facility_type}: {message}")
+            return True
         
         return False
     
@@ -376,8 +478,8 @@ class FacilitySearchService:
             for csv_file in ["المدارس.csv", "مستشفى.csv", "حدائق.csv", "سوبرماركت.csv", "مول.csv"]:
                 result = self.search_entity(csv_file, search_query)
                 
-                # إضافة النتيجة فقط إذا كانت تحتوي على نتائج
-                if "لم يتم العثور" not in result and "عذراً" not in result:
+                # إضافة النتيجة فقط إذا كانت تحتوي على نتائج (رسائل عدم الوجود تبدأ دائماً بإحدى البادئات)
+                if not result.startswith(_NO_RESULT_PREFIXES):
                     results.append(result)
             
             if results:
@@ -396,9 +498,10 @@ class FacilitySearchService:
         # نفس الكود السابق دون تغيير
         result_parts = []
         
-        # إضافة الاسم أولاً إذا كان محدداً
-        if name_field and name_field in row and pd.notna(row[name_field]):
-            result_parts.append(f"{row[name_field]}")
+        # إضافة الاسم أولاً إذا كان محدداً (قراءة واحدة للقيمة بدلاً من فحص الوجود ثم الفهرسة)
+        name_value = row.get(name_field) if name_field else None
+        if pd.notna(name_value):
+            result_parts.append(f"{name_value}")
         
         # إضافة باقي المعلومات
         for col in display_cols:
@@ -407,18 +510,18 @@ class FacilitySearchService:
                 continue
                 
             # إضافة القيم غير الفارغة فقط
-            if col in row and pd.notna(row[col]) and row[col]:
+            value = row.get(col)
+            if pd.notna(value) and value:
                 # تحديد اسم العمود المعروض
                 display_name = col.replace("_", " ").replace("اسم", "").strip()
                 
                 # التحقق من نوع القيمة وتنسيقها
-                value = row[col]
                 if isinstance(value, (int, float)) and not isinstance(value, bool):
                     # تنسيق الأرقام
                     if isinstance(value, float) and value.is_integer():
-                        formatted_value = "{:,}".format(int(value))
+                        formatted_value = f"{int(value):,}"
                     else:
-                        formatted_value = "{:.2f}".format(value) if isinstance(value, float) else "{:,}".format(value)
+                        formatted_value = f"{value:.2f}" if isinstance(value, float) else f"{value:,}"
                     result_parts.append(f"{display_name}: {formatted_value}")
                 else:
                     # تنسيق النصوص
@@ -441,50 +544,95 @@ class FacilitySearchService:
         Returns:
             str: نص منسق يحتوي على المرافق المتاحة
         """
+        return self.find_facility_result(neighborhood_name, facility_type).text
+    
+    def find_facilities(self, neighborhood_name: str, facility_type: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        البحث عن المرافق المتاحة في حي معين مع إرجاع مؤشر صريح على وجود نتائج.
+        
+        Args:
+            neighborhood_name: اسم الحي
+            facility_type: نوع المرفق (اختياري)
+            
+        Returns:
+            Tuple[bool, str]: (هل تم العثور على مرافق، نص منسق يحتوي على المرافق المتاحة)
+        """
+        result = self.find_facility_result(neighborhood_name, facility_type)
+        return result.found, result.text
+    
+    def find_facility_result(self, neighborhood_name: str, facility_type: Optional[str] = None) -> FacilityResult:
+        """
+        البحث عن المرافق المتاحة في حي معين مع إرجاع النتيجة بصيغة منظمة (العدد والأسماء والنص).
+        تُخزن النتائج مؤقتاً لتجنب تكرار البحث في البيانات لنفس الحي ونوع المرفق.
+        
+        Args:
+            neighborhood_name: اسم الحي
+            facility_type: نوع المرفق (اختياري)
+            
+        Returns:
+            FacilityResult: نتيجة البحث
+        """
+        cache_key = (neighborhood_name, facility_type)
+        with self._facility_cache_lock:
+            cached = self._facility_cache.get(cache_key)
+            if cached is not None:
+                self._facility_cache.move_to_end(cache_key)
+                return cached
+        
+        result = self._find_facilities_in_neighborhood_uncached(neighborhood_name, facility_type)
+        
+        # الذاكرة المؤقتة قد تُستخدم من عدة خيوط (البحث المتوازي في الشاتبوت)
+        with self._facility_cache_lock:
+            self._facility_cache[cache_key] = result
+            if len(self._facility_cache) > _FACILITY_CACHE_SIZE:
+                self._facility_cache.popitem(last=False)
+        
+        return result
+    
+    def _find_facilities_in_neighborhood_uncached(self, neighborhood_name: str, facility_type: Optional[str] = None) -> FacilityResult:
+        """
+        تنفيذ البحث الفعلي عن المرافق في حي معين دون استخدام الذاكرة المؤقتة.
+        
+        Args:
+            neighborhood_name: اسم الحي
+            facility_type: نوع المرفق (اختياري)
+            
+        Returns:
+            FacilityResult: نتيجة البحث
+        """
         try:
             # تنظيف اسم الحي
             clean_name = neighborhood_name.replace("حي ", "").strip()
             
-            # تحديد ملف CSV المناسب حسب نوع المرفق
-            if facility_type == "مدرسة":
-                csv_file = "المدارس.csv"
-                location_column = "الحي"
-                result_title = f"المدارس في {neighborhood_name}"
-            elif facility_type == "مستشفى":
-                csv_file = "مستشفى.csv"
-                location_column = "الحي"
-                result_title = f"المستشفيات والمراكز الطبية في {neighborhood_name}"
-            elif facility_type == "حديقة":
-                csv_file = "حدائق.csv"
-                location_column = "الحي"
-                result_title = f"الحدائق والمتنزهات في {neighborhood_name}"
-            elif facility_type == "سوبرماركت":
-                csv_file = "سوبرماركت.csv"
-                location_column = "الحي"
-                result_title = f"محلات السوبرماركت في {neighborhood_name}"
-            elif facility_type == "مول":
-                csv_file = "مول.csv"
-                location_column = "الحي"
-                result_title = f"المولات ومراكز التسوق في {neighborhood_name}"
-            elif facility_type is None:
+            if facility_type is None:
                 # إذا لم يتم تحديد نوع المرفق، قم بتجميع كل المرافق
-                all_facilities = []
-                for facility in ["مدرسة", "مستشفى", "حديقة", "سوبرماركت", "مول"]:
-                    facility_info = self.find_facilities_in_neighborhood(neighborhood_name, facility)
-                    if facility_info and "لم يتم العثور" not in facility_info:
-                        all_facilities.append(facility_info)
+                found_results = []
+                for facility in _FACILITY_SOURCES:
+                    result = self.find_facility_result(neighborhood_name, facility)
+                    if result.found:
+                        found_results.append(result)
                 
-                if all_facilities:
-                    return f"المرافق المتاحة في {neighborhood_name}:\n\n" + "\n\n".join(all_facilities)
+                if found_results:
+                    return FacilityResult(
+                        True,
+                        f"المرافق المتاحة في {neighborhood_name}:\n\n" + "\n\n".join(result.text for result in found_results),
+                        sum(result.count for result in found_results),
+                        tuple(name for result in found_results for name in result.names)
+                    )
                 else:
-                    return f"لم يتم العثور على مرافق متاحة في {neighborhood_name} في قاعدة البيانات."
-            else:
-                return f"نوع المرفق '{facility_type}' غير معروف."
+                    return FacilityResult(False, f"لم يتم العثور على مرافق متاحة في {neighborhood_name} في قاعدة البيانات.")
+            
+            # تحديد ملف CSV المناسب حسب نوع المرفق
+            source = _FACILITY_SOURCES.get(facility_type)
+            if source is None:
+                return FacilityResult(False, f"نوع المرفق '{facility_type}' غير معروف.")
+            csv_file, facility_plural = source
+            result_title = f"{facility_plural} في {neighborhood_name}"
             
             # التحقق من وجود ملف CSV
             if csv_file not in self.csv_mappings:
                 logger.error(f"ملف CSV غير موجود: {csv_file}")
-                return f"عذراً، بيانات {facility_type} غير متوفرة."
+                return FacilityResult(False, f"عذراً، بيانات {facility_type} غير متوفرة.")
             
             # الحصول على DataFrame
             df = self.csv_mappings[csv_file]
@@ -492,20 +640,18 @@ class FacilitySearchService:
             # التحقق من DataFrame وعمود الموقع
             if df.empty:
                 logger.warning(f"ملف CSV فارغ: {csv_file}")
-                return f"عذراً، لا توجد بيانات {facility_type}."
+                return FacilityResult(False, f"عذراً، لا توجد بيانات {facility_type}.")
             
             # تحديد عمود الموقع الصحيح
-            neighborhood_columns = ["الحي", "اسم_الحي", "neighborhood", "المنطقة", "location", "الحيّ"]
-            found_column = None
-            
-            for col in neighborhood_columns:
-                if col in df.columns:
-                    found_column = col
-                    break
+            found_column = next((col for col in _NEIGHBORHOOD_COLUMNS if col in df.columns), None)
             
             if not found_column:
                 logger.warning(f"لم يتم العثور على عمود الحي في {csv_file}")
-                return f"عذراً، لا يمكن تحديد موقع {facility_type} بالحي."
+                return FacilityResult(False, f"عذراً، لا يمكن تحديد موقع {facility_type} بالحي.")
+            
+            # استبعاد سريع: إذا لم يظهر الاسم الموحد في أي موقع بالملف فلن تطابقه أي من طرق البحث أدناه
+            if not self._appears_in_locations(clean_name, (csv_file,)):
+                return FacilityResult(False, f"لم يتم العثور على {facility_type} في {neighborhood_name}.")
             
             # البحث عن المرافق في الحي - تحسين البحث بمطابقة جزئية
             neighborhood_facilities = df[
@@ -526,7 +672,7 @@ class FacilitySearchService:
             
             # التحقق من النتائج
             if neighborhood_facilities.empty:
-                return f"لم يتم العثور على {facility_type} في {neighborhood_name}."
+                return FacilityResult(False, f"لم يتم العثور على {facility_type} في {neighborhood_name}.")
             
             # الحصول على إعدادات العرض للمرفق
             if csv_file in self.search_columns:
@@ -547,42 +693,35 @@ class FacilitySearchService:
             # عرض عدد محدود من المرافق فقط (1-2)
             max_display = 1
             displayed = 0
+            displayed_names = []
             
             for index, row in neighborhood_facilities.iterrows():
                 if displayed >= max_display:
                     break
                     
                 # استخراج الاسم فقط بدون أي تفاصيل أخرى
-                facility_name = None
-                if name_field and name_field in row and pd.notna(row[name_field]):
-                    facility_name = row[name_field]
-                else:
+                facility_name = row.get(name_field) if name_field else None
+                if not pd.notna(facility_name):
+                    facility_name = None
                     # البحث عن أي عمود يمكن أن يحتوي على الاسم
-                    for col in ["الاسم", "اسم_المدرسة", "اسم_المستشفى", "اسم_الحديقة", "اسم_السوبرماركت", "اسم_المول"]:
-                        if col in row and pd.notna(row[col]):
-                            facility_name = row[col]
+                    for col in _FALLBACK_NAME_COLUMNS:
+                        value = row.get(col)
+                        if pd.notna(value):
+                            facility_name = value
                             break
                 
                 if facility_name:
                     result_text += f"• {facility_name}\n"
                     displayed += 1
+                    display_name = _clean_facility_name(str(facility_name))
+                    if display_name:
+                        displayed_names.append(display_name)
             
             # إضافة إشارة للمزيد من المرافق إذا لم يتم عرضها كلها
             if displayed < facilities_count:
-                if facility_type == "مدرسة":
-                    result_text += f"\nويوجد {facilities_count-displayed} مدارس أخرى في الحي."
-                elif facility_type == "مستشفى":
-                    result_text += f"\nويوجد {facilities_count-displayed} مستشفيات أخرى في الحي."
-                elif facility_type == "حديقة":
-                    result_text += f"\nويوجد {facilities_count-displayed} حدائق أخرى في الحي."
-                elif facility_type == "سوبرماركت":
-                    result_text += f"\nويوجد {facilities_count-displayed} متاجر أخرى في الحي."
-                elif facility_type == "مول":
-                    result_text += f"\nويوجد {facilities_count-displayed} مراكز تسوق أخرى في الحي."
-                else:
-                    result_text += f"\nويوجد {facilities_count-displayed} مرافق أخرى في الحي."
+                result_text += _remaining_facilities_phrase(facility_type, facilities_count - displayed)
             
-            return result_text
+            return FacilityResult(True, result_text, facilities_count, tuple(displayed_names))
                 
         except Exception as e:
             logger.error(f"خطأ في البحث عن المرافق في الحي: {str(e)}")
@@ -638,38 +777,70 @@ class FacilitySearchService:
         
         return None
 
-    def search_facilities(self, neighborhood_name: str, facility_type: str, limit: Optional[int] = None) -> pd.DataFrame:
+    def has_any_facilities(self, neighborhood_name: str) -> bool:
         """
-        البحث عن مرافق معينة في حي محدد.
+        التحقق السريع مما إذا كان قد يوجد أي مرفق في الحي، دون تنفيذ البحث الكامل.
+        النتيجة False مؤكدة (لا توجد مرافق)، أما True فتعني أن البحث قد يجد نتائج.
         
         Args:
             neighborhood_name: اسم الحي
-            facility_type: نوع المرفق (مدارس، مستشفيات، إلخ)
-            limit: الحد الأقصى لعدد النتائج (اختياري)
             
         Returns:
-            pd.DataFrame: إطار بيانات يحتوي على المرافق
+            bool: False إذا لم يظهر الحي في مواقع أي من ملفات المرافق
+        """
+        clean_name = neighborhood_name.replace("حي ", "").strip()
+        return self._appears_in_locations(clean_name, (csv_file for csv_file, _ in _FACILITY_SOURCES.values()))
+    
+    def _appears_in_locations(self, clean_name: str, csv_files) -> bool:
         """
-        # تحويل أنواع المرافق إلى أسماء ملفات CSV
-        csv_file_name = self.map_facility_type_to_csv(facility_type)
-        if not csv_file_name or csv_file_name not in self.csv_mappings:
-            logger.warning(f"نوع المرفق غير معروف: {facility_type}")
-            return pd.DataFrame()
+        التحقق مما إذا كان اسم الحي (بعد التوحيد) يظهر في نص مواقع أي من الملفات المحددة.
+        التوحيد نفسه المستخدم في البحث، فعدم الظهور يعني عدم وجود أي تطابق.
         
-        # الحصول على بيانات المرفق
-        df = self.csv_mappings[csv_file_name]
-        if df.empty:
-            logger.warning(f"لا توجد بيانات لنوع المرفق: {facility_type}")
-            return pd.DataFrame()
+        Args:
+            clean_name: اسم الحي بدون "حي"
+            csv_files: ملفات CSV المراد فحصها
+            
+        Returns:
+            bool: True إذا ظهر الاسم في أحد الملفات أو تعذر الفحص
+        """
+        # الاسم يحتوي على محارف نمطية قد تطابق نصاً مختلفاً حرفياً - لا يمكن الاستبعاد
+        if not _REGEX_METACHARS.isdisjoint(clean_name):
+            return True
         
-        # تنظيف اسم الحي
-        clean_neighborhood = self.clean_neighborhood_name(neighborhood_name)
+        if self._location_texts is None:
+            with self._location_texts_lock:
+                if self._location_texts is None:
+                    self._location_texts = self._build_location_texts()
         
-        # البحث في البيانات
-        results = self.search_in_dataframe(df, clean_neighborhood)
+        needle = self._normalize_arabic_text(clean_name).lower()
+        for csv_file in csv_files:
+            location_text = self._location_texts.get(csv_file)
+            # ملف غير مفهرس (بدون عمود موقع) - لا يمكن الاستبعاد
+            if location_text is None or needle in location_text:
+                return True
+        return False
+    
+    def _build_location_texts(self) -> Dict[str, str]:
+        """
+        بناء نص موحد لكل ملف CSV يضم جميع قيم عمود الموقع (سطر لكل قيمة) بمرور واحد على كل ملف.
         
-        # تطبيق حد عدد النتائج إذا تم تحديده
-        if limit is not None and not results.empty:
-            results = results.head(limit)
+        Returns:
+            Dict[str, str]: النص الموحد لكل ملف CSV (الملفات الفارغة نصها فارغ)
+        """
+        location_texts: Dict[str, str] = {}
+        for csv_file, df in self.csv_mappings.items():
+            if df is None or df.empty:
+                location_texts[csv_file] = ""
+                continue
+            
+            location_column = next((col for col in _NEIGHBORHOOD_COLUMNS if col in df.columns), None)
+            if not location_column:
+                continue
+            
+            location_texts[csv_file] = "\n".join(
+                self._normalize_arabic_text(str(value)).lower()
+                for value in df[location_column].tolist() if pd.notna(value)
+            )
         
-        return results
\ No newline at end of file
+        logger.info(f"تم بناء نصوص مواقع المرافق ({len(location_texts)} ملف)")
+        return location_texts
@@ -0,0 +1,79 @@
+"""
+اختبارات انحدار لنمط استفسارات أفضل/أسوأ حي المجمّع حسب البادئة المشتركة.
+تقارن النمط الحالي بالأنماط الأصلية المنفصلة (واحد لكل صيغة) على رسائل ممثلة وحالات حدية.
+"""
+
+import itertools
+import re
+import unittest
+
+from core.chatbot import _BEST_WORST_RE
+
+# الأنماط الأصلية قبل التجميع (مرجع المقارنة)
+_ORIGINAL_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'^(?:ما|ايش|وش|وين) (?:هو |)(افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',
+    r'^(?:ما|ايش|وش|وين) (?:هي |)(افضل|أفضل) (?:احياء|أحياء|المناطق|مناطق)(?:\?|؟|$|\s)',
+    r'^(?:افضل|أفضل) (?:حي|منطقة)(?:\?|؟|$|\s)',
+    r'^(?:احسن|أحسن) (?:حي|منطقة)(?:\?|؟|$|\s)',
+    r'^(?:ما|ايش|وش|وين) (?:هو |)(اسوء|أسوأ|اسوا|أسوا) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',
+    r'^(?:ما|ايش|وش|وين) (?:هي |)(اسوء|أسوأ|اسوا|أسوا) (?:احياء|أحياء|المناطق|مناطق)(?:\?|؟|$|\s)',
+    r'^(?:اسوء|أسوأ|اسوا|أسوا) (?:حي|منطقة)(?:\?|؟|$|\s)',
+    r'^(?:اردء|أردأ) (?:حي|منطقة)(?:\?|؟|$|\s)',
+    r'^اقترح (?:لي|علي|) (?:افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',
+    r'^أقترح (?:لي|علي|) (?:افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',
+    r'^اخبرني عن (?:افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',
+    r'^أخبرني عن (?:افضل|أفضل) (?:حي|منطقة|الاحياء|الأحياء)(?:\?|؟|$|\s)',
+    r'^وش افضل حي(?:\?|؟|$|\s)',
+    r'^وش أفضل حي(?:\?|؟|$|\s)',
+    r'^ابغى افضل حي(?:\?|؟|$|\s)',
+    r'^أبغى أفضل حي(?:\?|؟|$|\s)',
+    r'^ابي افضل حي(?:\?|؟|$|\s)',
+    r'^أبي أفضل حي(?:\?|؟|$|\s)',
+))
+
+# مكونات الرسائل المولدة: بادئة + كلمة تفضيل + اسم + نهاية
+_PREFIXES = (
+    "", "ما ", "ما هو ", "ما هي ", "ايش هو ", "وش ", "وين هي ", "كيف ", " ما ",
+    "اقترح لي ", "اقترح  ", "أقترح علي ", "اقترح لنا ", "اخبرني عن ", "أخبرني عن ",
+    "ابغى ", "أبغى ", "ابي ", "أبي ",
+)
+_WORDS = ("افضل", "أفضل", "احسن", "أحسن", "اسوء", "أسوأ", "اسوا", "أسوا", "اردء", "أردأ", "اجمل")
+_NOUNS = ("حي", "منطقة", "الاحياء", "الأحياء", "احياء", "أحياء", "المناطق", "مناطق", "حيوان", "")
+_ENDINGS = ("", "؟", "?", " في الرياض", "\n", "x", "؟؟")
+
+
+def _original_match(message: str) -> bool:
+    return any(pattern.search(message) for pattern in _ORIGINAL_PATTERNS)
+
+
+class BestWorstPatternTest(unittest.TestCase):
+    def test_matches_original_patterns_on_generated_messages(self):
+        for prefix, word, noun, ending in itertools.product(_PREFIXES, _WORDS, _NOUNS, _ENDINGS):
+            message = f"{prefix}{word} {noun}{ending}"
+            with self.subTest(message=message):
+                self.assertEqual(bool(_BEST_WORST_RE.search(message)), _original_match(message))
+
+    def test_representative_messages(self):
+        cases = {
+            "ما هو أفضل حي؟": True,
+            "ما هو أسوأ الأحياء": True,
+            "ما هي أسوأ المناطق؟": True,
+            "وش افضل حي": True,
+            "أبي أفضل حي؟": True,
+            "اقترح  أفضل منطقة": True,
+            # صيغة المفرد مع "هي" لم تكن مدعومة في الأنماط الأصلية
+            "ما هي أفضل حي": False,
+            "ما هي أسوأ الأحياء": False,
+            # مزج الهمزة بين الكلمتين لم يكن مدعوماً في الأنماط الأصلية
+            "أبغى افضل حي": False,
+            "أفضل حيوان أليف": False,
+            "أريد معرفة أفضل حي للعائلات": False,
+        }
+        for message, expected in cases.items():
+            with self.subTest(message=message):
+                self.assertEqual(bool(_BEST_WORST_RE.search(message)), expected)
+                self.assertEqual(_original_match(message), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+اختبارات تجميع بيانات استبيان "Help Us" وكتابتها دفعة واحدة وإعادة المحاولة عند الفشل.
+"""
+
+import threading
+import unittest
+from unittest import mock
+
+from pymongo.errors import BulkWriteError
+
+from core.chatbot import (
+    NeighborhoodChatbot,
+    _HELPUS_BATCH_SIZE,
+    _HELPUS_MAX_ATTEMPTS,
+    _HELPUS_MAX_BUFFERED,
+    _DUPLICATE_KEY_ERROR,
+)
+from core.exceptions import HelpUsStorageError
+
+# رمز خطأ مؤقت (إيقاف الخادم أثناء الكتابة) ورمز خطأ دائم (فشل التحقق من المستند)
+_TRANSIENT_CODE = 11600
+_VALIDATION_CODE = 121
+
+
+class HelpUsBufferTest(unittest.TestCase):
+    def setUp(self):
+        # إنشاء الشاتبوت دون تهيئة الخدمات الفعلية، مع مجموعة بيانات وهمية
+        self.bot = NeighborhoodChatbot.__new__(NeighborhoodChatbot)
+        self.bot._helpus_buffer = []
+        self.bot._helpus_lock = threading.Lock()
+        self.bot._helpus_timer = None
+        self.collection = mock.Mock()
+        self.bot.db = {'Knowledge_base': self.collection}
+        
+        # منع إنشاء مؤقتات فعلية أثناء الاختبار
+        timer_patch = mock.patch("core.chatbot.threading.Timer")
+        self.timer = timer_patch.start()
+        self.addCleanup(timer_patch.stop)
+
+    def _buffered_documents(self):
+        return [submission.document for submission in self.bot._helpus_buffer]
+
+    def test_batch_is_written_when_full(self):
+        documents = [{'n': i} for i in range(_HELPUS_BATCH_SIZE)]
+        for document in documents[:-1]:
+            self.bot.save_helpus_data(document)
+        self.collection.insert_many.assert_not_called()
+        self.timer.assert_called_once()
+        
+        self.bot.save_helpus_data(documents[-1])
+        self.collection.insert_many.assert_called_once_with(documents, ordered=False)
+        self.assertEqual(self.bot._helpus_buffer, [])
+
+    def test_partial_failure_requeues_only_transient_errors(self):
+        documents = [{'n': i} for i in range(4)]
+        for document in documents:
+            self.bot.save_helpus_data(document)
+        self.collection.insert_many.side_effect = BulkWriteError({
+            'writeErrors': [
+                {'index': 0, 'code': _TRANSIENT_CODE, 'errmsg': 'interrupted'},
+                {'index': 1, 'code': _VALIDATION_CODE, 'errmsg': 'validation failed'},
+                {'index': 2, 'code': _DUPLICATE_KEY_ERROR, 'errmsg': 'duplicate key'},
+            ],
+            'writeConcernErrors': [],
+        })
+        
+        self.assertEqual(self.bot.flush_helpus_data(), 1)
+        # الخطأ الدائم يُتخلى عنه، والمفتاح المكرر والمستند الناجح يُعدان محفوظين
+        self.assertEqual(self._buffered_documents(), [documents[0]])
+        self.assertEqual(self.bot._helpus_buffer[0].attempts, 1)
+
+    def test_write_concern_error_requeues_written_documents(self):
+        documents = [{'n': i} for i in range(2)]
+        for document in documents:
+            self.bot.save_helpus_data(document)
+        self.collection.insert_many.side_effect = BulkWriteError({
+            'writeErrors': [],
+            'writeConcernErrors': [{'code': 64, 'errmsg': 'waiting for replication timed out'}],
+        })
+        
+        self.assertEqual(self.bot.flush_helpus_data(), 2)
+        self.assertEqual(self._buffered_documents(), documents)
+
+    def test_requeued_documents_precede_new_submissions(self):
+        self.bot.save_helpus_data({'n': 'old'})
+        self.collection.insert_many.side_effect = ConnectionError("network down")
+        self.bot.flush_helpus_data()
+        
+        self.bot.save_helpus_data({'n': 'new'})
+        self.assertEqual(self._buffered_documents(), [{'n': 'old'}, {'n': 'new'}])
+
+    def test_documents_are_dropped_after_max_attempts(self):
+        self.bot.save_helpus_data({'n': 1})
+        self.collection.insert_many.side_effect = ConnectionError("network down")
+        
+        for _ in range(_HELPUS_MAX_ATTEMPTS - 1):
+            self.assertEqual(self.bot.flush_helpus_data(), 1)
+        self.assertEqual(self.bot.flush_helpus_data(), 0)
+        self.assertEqual(self.bot._helpus_buffer, [])
+        self.assertEqual(self.collection.insert_many.call_count, _HELPUS_MAX_ATTEMPTS)
+
+    def test_full_buffer_rejects_new_submissions(self):
+        for i in range(_HELPUS_MAX_BUFFERED):
+            self.bot._helpus_buffer.append(mock.Mock(document={'n': i}, attempts=1))
+        
+        with self.assertRaises(HelpUsStorageError):
+            self.bot.save_helpus_data({'n': 'new'})
+        self.assertEqual(len(self.bot._helpus_buffer), _HELPUS_MAX_BUFFERED)
+
+    def test_exit_flush_retries_synchronously(self):
+        self.bot.save_helpus_data({'n': 1})
+        self.timer.reset_mock()
+        self.collection.insert_many.side_effect = [ConnectionError("network down"), None]
+        
+        self.bot._flush_helpus_at_exit()
+        self.assertEqual(self.collection.insert_many.call_count, 2)
+        self.assertEqual(self.bot._helpus_buffer, [])
+        self.timer.assert_not_called()
+
+    def test_exit_flush_stops_after_max_attempts(self):
+        self.bot.save_helpus_data({'n': 1})
+        self.collection.insert_many.side_effect = ConnectionError("network down")
+        
+        self.bot._flush_helpus_at_exit()
+        self.assertEqual(self.collection.insert_many.call_count, _HELPUS_MAX_ATTEMPTS)
+        self.assertEqual(self.bot._helpus_buffer, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
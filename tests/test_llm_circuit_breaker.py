@@ -0,0 +1,74 @@
+"""
+اختبارات قاطع الدائرة لاستدعاءات النموذج اللغوي في المعالجة الاحتياطية.
+"""
+
+import threading
+import unittest
+from unittest import mock
+
+from core.chatbot import NeighborhoodChatbot, _GENERIC_ERROR_RESPONSE, _LLM_FAIL_MAX, _LLM_RESET_TIMEOUT
+from core.exceptions import QueryClassificationError
+
+
+class LLMCircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        # إنشاء الشاتبوت دون تهيئة الخدمات الفعلية (قاعدة البيانات والنموذج اللغوي)
+        self.bot = NeighborhoodChatbot.__new__(NeighborhoodChatbot)
+        self.bot._llm_failures = 0
+        self.bot._llm_open_until = 0.0
+        self.bot._llm_breaker_lock = threading.Lock()
+        self.bot.recommendation_service = mock.Mock()
+        self.bot.recommendation_service.extract_explicitly_requested_neighborhood.return_value = None
+        self.bot.llm_service = mock.Mock()
+        self.bot.llm_service.classify_query.side_effect = QueryClassificationError("فشل")
+        self.bot.formatter = mock.Mock()
+
+    def test_breaker_opens_after_consecutive_failures(self):
+        for _ in range(_LLM_FAIL_MAX):
+            self.assertEqual(self.bot._fallback_processing("رسالة"), _GENERIC_ERROR_RESPONSE)
+        self.assertEqual(self.bot.llm_service.classify_query.call_count, _LLM_FAIL_MAX)
+
+        # الدائرة مفتوحة الآن: رد ثابت دون استدعاء النموذج
+        self.assertEqual(self.bot._fallback_processing("رسالة"), _GENERIC_ERROR_RESPONSE)
+        self.assertEqual(self.bot.llm_service.classify_query.call_count, _LLM_FAIL_MAX)
+
+    def test_open_breaker_still_serves_explicit_neighborhood(self):
+        for _ in range(_LLM_FAIL_MAX):
+            self.bot._fallback_processing("رسالة")
+
+        # الطلب الصريح لحي لا يحتاج إلى النموذج، فيُخدم حتى والدائرة مفتوحة
+        self.bot.recommendation_service.extract_explicitly_requested_neighborhood.return_value = "الملقا"
+        self.bot.formatter.format_neighborhood_response.return_value = "رد الملقا"
+        self.assertEqual(self.bot._fallback_processing("أبي حي الملقا"), "رد الملقا")
+        self.assertEqual(self.bot.llm_service.classify_query.call_count, _LLM_FAIL_MAX)
+
+    def test_breaker_closes_after_reset_timeout(self):
+        with mock.patch("core.chatbot.time.monotonic", return_value=1000.0):
+            for _ in range(_LLM_FAIL_MAX):
+                self.bot._fallback_processing("رسالة")
+
+        # قبل انتهاء المهلة: لا استدعاء للنموذج
+        with mock.patch("core.chatbot.time.monotonic", return_value=1000.0 + _LLM_RESET_TIMEOUT - 1):
+            self.assertEqual(self.bot._fallback_processing("رسالة"), _GENERIC_ERROR_RESPONSE)
+        self.assertEqual(self.bot.llm_service.classify_query.call_count, _LLM_FAIL_MAX)
+
+        # بعد انتهاء المهلة: يُسمح بمحاولة جديدة وينجح الاستدعاء فتُغلق الدائرة
+        self.bot.llm_service.classify_query.side_effect = None
+        self.bot.llm_service.classify_query.return_value = ("ترحيب", None, None, False)
+        with mock.patch("core.chatbot.time.monotonic", return_value=1000.0 + _LLM_RESET_TIMEOUT):
+            self.bot._fallback_processing("مرحبا")
+        self.assertEqual(self.bot.llm_service.classify_query.call_count, _LLM_FAIL_MAX + 1)
+        self.assertEqual(self.bot._llm_failures, 0)
+
+    def test_success_resets_failure_count(self):
+        for _ in range(_LLM_FAIL_MAX - 1):
+            self.bot._fallback_processing("رسالة")
+
+        self.bot.llm_service.classify_query.side_effect = None
+        self.bot.llm_service.classify_query.return_value = ("ترحيب", None, None, False)
+        self.bot._fallback_processing("مرحبا")
+        self.assertEqual(self.bot._llm_failures, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+"""
+اختبارات استخراج الحي المذكور في النص.
+"""
+
+import unittest
+from unittest import mock
+
+from core.chatbot import NeighborhoodChatbot
+
+
+class FindMentionedNeighborhoodTest(unittest.TestCase):
+    def setUp(self):
+        # إنشاء الشاتبوت دون تهيئة الخدمات الفعلية
+        self.bot = NeighborhoodChatbot.__new__(NeighborhoodChatbot)
+        self.bot.data_loader = mock.Mock()
+        self.bot.data_loader.get_available_neighborhoods.return_value = ["الياسمين", "الملقا", "النخيل", "النخيل الشرقي"]
+        self.bot._neighborhood_regex = None
+        self.bot._neighborhood_regex_source = None
+
+    def test_list_order_wins_over_text_position(self):
+        # الملقا يظهر أولاً في النص لكن الياسمين يسبقه في القائمة
+        self.assertEqual(self.bot._find_mentioned_neighborhood("قارن بين الملقا والياسمين"), "الياسمين")
+
+    def test_list_order_wins_over_longer_name(self):
+        self.assertEqual(self.bot._find_mentioned_neighborhood("حي النخيل الشرقي"), "النخيل")
+
+    def test_no_neighborhood(self):
+        self.assertIsNone(self.bot._find_mentioned_neighborhood("أبي حي هادئ"))
+        self.assertIsNone(self.bot._find_mentioned_neighborhood(""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+اختبارات انحدار للأنماط المجمّعة في معالج الاستعلامات.
+تقارن النتائج بالمنطق الأصلي الذي يفحص كل كلمة مفتاحية على حدة على رسائل ممثلة وحالات حدية.
+"""
+
+import itertools
+import re
+import unittest
+
+from utils.query_processor import QueryProcessor, _DIRECTION_KEYWORDS
+
+
+def _original_preferred_location(message: str):
+    # أول اتجاه (حسب ترتيب _DIRECTION_KEYWORDS) تظهر إحدى عباراته في الرسالة
+    message_lower = message.lower()
+    for location, keywords in _DIRECTION_KEYWORDS:
+        phrases = [phrase for keyword in keywords for phrase in (f"في {keyword}", f"منطقة {keyword}", f"{keyword} المدينة")]
+        if any(phrase in message_lower for phrase in phrases):
+            return location
+    return None
+
+
+# أنماط طلب السكن الأصلية قبل دمجها في نمط واحد
+_ORIGINAL_HOUSING_REQUEST_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'(?:أبحث|ابحث) عن (?:سكن|شقة|فيلا|بيت|منزل|عقار)',
+    r'(?:أريد|اريد|أبغى|ابغى) (?:سكن|شقة|فيلا|بيت|منزل|عقار)',
+    r'(?:أبحث|ابحث) عن مكان للسكن',
+    r'(?:أريد|اريد|أبغى|ابغى) مكان للسكن',
+))
+
+
+def _original_is_housing_search_query(processor: QueryProcessor, message: str) -> bool:
+    # كلمة بحث عن سكن مع نوع عقار أو نوع معاملة أو كلمة سكن عامة، ثم أنماط الطلب المباشر
+    if any(keyword in message for keyword in processor.housing_search_keywords):
+        for keywords in processor.property_keywords.values():
+            if any(keyword in message for keyword in keywords):
+                return True
+        for keywords in processor.transaction_keywords.values():
+            if any(keyword in message for keyword in keywords):
+                return True
+        if any(word in message for word in ["سكن", "عقار", "منزل", "بيت", "شقة", "فيلا"]):
+            return True
+    return any(pattern.search(message) for pattern in _ORIGINAL_HOUSING_REQUEST_PATTERNS)
+
+
+class PreferredDirectionTest(unittest.TestCase):
+    def setUp(self):
+        self.processor = QueryProcessor(["الملقا", "النرجس"])
+
+    def _preferred_location(self, message: str):
+        return self.processor._extract_person_info(message).get('preferred_location')
+
+    def test_matches_original_on_direction_pairs(self):
+        keywords = [keyword for _, keywords in _DIRECTION_KEYWORDS for keyword in keywords]
+        fragments = [
+            template.format(keyword)
+            for keyword in keywords
+            for template in ("في {}", "منطقة {}", "{} المدينة", "{}")
+        ]
+        for first, second in itertools.product(fragments, repeat=2):
+            for message in (f"أبي شقة {first} أو {second}", f"{first} {second}"):
+                with self.subTest(message=message):
+                    self.assertEqual(self._preferred_location(message), _original_preferred_location(message))
+
+    def test_priority_follows_direction_order_not_position(self):
+        # الجنوب مذكور أولاً لكن الشمال أعلى أولوية في الترتيب الأصلي
+        self.assertEqual(self._preferred_location("شقة في الجنوب أو في الشمال"), "شمال")
+        self.assertEqual(self._preferred_location("منطقة الوسط أو غرب المدينة"), "غرب")
+
+    def test_longer_and_overlapping_phrases(self):
+        cases = {
+            "أبحث عن فيلا في الشمالية": "شمال",
+            "شقة في الشرقي": "شرق",
+            "منطقة المركزية": "وسط",
+            "في شمال المدينة": "شمال",
+            "شمالي الرياض": None,
+            "شقة شمال": None,
+        }
+        for message, expected in cases.items():
+            with self.subTest(message=message):
+                self.assertEqual(self._preferred_location(message), expected)
+                self.assertEqual(_original_preferred_location(message), expected)
+
+
+class HousingSearchQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.processor = QueryProcessor(["الملقا", "النرجس"])
+
+    def test_matches_original_on_generated_messages(self):
+        leads = ("", "أبحث عن", "ابحث عن", "أريد", "ابغى", "محتاج", "ادور على", "اشتري", "كيف", "وش رأيك في")
+        subjects = ("", "سكن", "شقة", "شقق", "فيلا", "بيت", "منزل", "عقار", "أرض", "مكتب", "مكان للسكن", "مطعم", "مدرسة")
+        tails = ("", "للإيجار", "للبيع", "تمليك", "في الملقا", "قريب من مدرسة")
+        for lead, subject, tail in itertools.product(leads, subjects, tails):
+            message = " ".join(part for part in (lead, subject, tail) if part)
+            with self.subTest(message=message):
+                self.assertEqual(
+                    self.processor._is_housing_search_query(message),
+                    _original_is_housing_search_query(self.processor, message)
+                )
+
+    def test_representative_messages(self):
+        cases = {
+            "أبحث عن شقة للإيجار في الملقا": True,
+            "ابغى فيلا": True,
+            "محتاج مستودع للايجار": True,
+            # كلمة البحث وحدها دون نوع عقار أو معاملة لا تكفي
+            "أريد مدرسة قريبة": False,
+            # كلمة البحث تطابق كجزء من كلمة أطول كما في الفحص الأصلي بالاحتواء
+            "السكنية": True,
+            "ما هي المدارس في النرجس": False,
+            "": False,
+        }
+        for message, expected in cases.items():
+            with self.subTest(message=message):
+                self.assertEqual(self.processor._is_housing_search_query(message), expected)
+                self.assertEqual(_original_is_housing_search_query(self.processor, message), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
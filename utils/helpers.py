@@ -77,10 +77,10 @@ def format_price(price: Union[int, float, str]) -> str:
         # تنسيق الرقم
         if numeric_price == int(numeric_price):
             # إذا كان رقماً صحيحاً
-            return "{:,}".format(int(numeric_price))
+            return f"{int(numeric_price):,}"
         else:
             # إذا كان رقماً عشرياً
-            return "{:,.2f}".format(numeric_price)
+            return f"{numeric_price:,.2f}"
             
     except (ValueError, TypeError):
         # إذا فشل التحويل، إرجاع القيمة كما هي
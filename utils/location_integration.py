@@ -6,6 +6,7 @@
 
 import logging
 import math
+from concurrent.futures import Executor, Future
 from typing import Optional, Dict, Any, Tuple
 import json
 import requests
@@ -14,6 +15,10 @@ from core.exceptions import DistanceCalculationError
 
 logger = logging.getLogger(__name__)
 
+# أسماء أعمدة الإحداثيات المحتملة في معلومات الحي (بأحرف صغيرة)
+_LAT_KEYS = frozenset(("lat", "latitude", "خط_العرض"))
+_LON_KEYS = frozenset(("lon", "longitude", "خط_الطول"))
+
 class LocationIntegration:
     """
     فئة لدمج وظائف تحديد الموقع الجغرافي وحساب المسافات.
@@ -43,9 +48,33 @@ class LocationIntegration:
         Returns:
             Optional[Tuple[float, float]]: إحداثيات المستخدم (خط العرض، خط الطول) أو None إذا لم يمكن تحديدها
         """
+        return self._get_location_for_ip(self._get_client_ip())
+    
+    def prefetch_user_location(self, executor: Executor) -> Future:
+        """
+        بدء تحديد موقع المستخدم بواسطة IP في الخلفية.
+        يُقرأ عنوان IP في الخيط الحالي (لأنه يعتمد على سياق طلب Flask) ثم يُنفذ
+        الاستعلام الشبكي في المُنفذ، فيتداخل انتظار الشبكة مع بقية معالجة الرسالة.
+        
+        Args:
+            executor: المُنفذ المستخدم لتشغيل الاستعلام
+            
+        Returns:
+            Future: نتيجة مستقبلية تحتوي على إحداثيات المستخدم (خط العرض، خط الطول)
+        """
+        return executor.submit(self._get_location_for_ip, self._get_client_ip())
+    
+    def _get_location_for_ip(self, client_ip: Optional[str]) -> Tuple[float, float]:
+        """
+        تحديد إحداثيات المستخدم من عنوان IP، مع الرجوع للإحداثيات الافتراضية عند التعذر.
+        
+        Args:
+            client_ip: عنوان IP للعميل
+            
+        Returns:
+            Tuple[float, float]: إحداثيات المستخدم (خط العرض، خط الطول)
+        """
         try:
-            # الحصول على IP العميل
-            client_ip = self._get_client_ip()
             if not client_ip or client_ip.startswith('127.') or client_ip.startswith('192.168.') or client_ip.startswith('10.'):
                 logger.warning(f"تعذر استخدام عنوان IP محلي: {client_ip}. استخدام الإحداثيات الافتراضية للرياض")
                 return (self.default_latitude, self.default_longitude)  # إحداثيات افتراضية للرياض
@@ -148,6 +177,13 @@ class LocationIntegration:
                     logger.warning("تعذر تحديد موقع المستخدم لحساب المسافة، استخدام الإحداثيات الافتراضية")
                     user_location = (self.default_latitude, self.default_longitude)
             
+            # المسار السريع: المسافات المحسوبة دفعة واحدة لجميع الأحياء
+            user_lat, user_lon = user_location
+            distance = self.data_loader.distance_to_neighborhood(neighborhood_name, user_lat, user_lon)
+            if distance is not None:
+                logger.info(f"المسافة إلى الحي {neighborhood_name}: {distance} كم")
+                return distance
+            
             # الحصول على إحداثيات الحي
             neighborhood_info = self.data_loader.find_neighborhood_info(neighborhood_name)
             if not neighborhood_info:
@@ -155,15 +191,14 @@ class LocationIntegration:
                 return None
             
             # التحقق مما إذا كانت لدينا إحداثيات الحي
-            lat_key = next((key for key in neighborhood_info.keys() if key.lower() in ['lat', 'latitude', 'خط_العرض']), None)
-            lon_key = next((key for key in neighborhood_info.keys() if key.lower() in ['lon', 'longitude', 'خط_الطول']), None)
+            lat_key = next((key for key in neighborhood_info.keys() if key.lower() in _LAT_KEYS), None)
+            lon_key = next((key for key in neighborhood_info.keys() if key.lower() in _LON_KEYS), None)
             
             if not lat_key or not lon_key or lat_key not in neighborhood_info or lon_key not in neighborhood_info:
                 logger.warning(f"لم يتم العثور على إحداثيات للحي: {neighborhood_name}")
                 return None
             
             # حساب المسافة
-            user_lat, user_lon = user_location
             neighborhood_lat = float(neighborhood_info[lat_key])
             neighborhood_lon = float(neighborhood_info[lon_key])
             
@@ -4,10 +4,125 @@
 
 import re
 import logging
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
 from typing import Dict, Tuple, List, Optional, Any, Set
 
 logger = logging.getLogger(__name__)
 
+# الحد الأقصى لعدد نتائج التحليل المخزنة مؤقتاً
+_ANALYSIS_CACHE_SIZE = 4096
+
+# الكلمات الدالة على كل اتجاه (منطقة مفضلة)
+_DIRECTION_KEYWORDS = (
+    ('شمال', ('شمال', 'الشمال', 'الشمالية', 'شمالية')),
+    ('جنوب', ('جنوب', 'الجنوب', 'الجنوبية', 'جنوبية')),
+    ('شرق', ('شرق', 'الشرق', 'الشرقية', 'شرقية')),
+    ('غرب', ('غرب', 'الغرب', 'الغربية', 'غربية')),
+    ('وسط', ('وسط', 'الوسط', 'المركز', 'المركزية')),
+)
+
+# الاتجاه المقابل لكل عبارة كاملة ("في X"، "منطقة X"، "X المدينة")
+_DIRECTION_BY_PHRASE = {
+    phrase: location
+    for location, keywords in _DIRECTION_KEYWORDS
+    for keyword in keywords
+    for phrase in (f"في {keyword}", f"منطقة {keyword}", f"{keyword} المدينة")
+}
+
+# أولوية كل اتجاه عند ذكر أكثر من اتجاه في الرسالة (حسب ترتيب _DIRECTION_KEYWORDS)
+_DIRECTION_RANK = {location: rank for rank, (location, _) in enumerate(_DIRECTION_KEYWORDS)}
+
+# نمط مُجمّع لجميع عبارات الاتجاهات (الأطول أولاً) للبحث عنها في مسح واحد
+_DIRECTION_RE = re.compile("|".join(map(re.escape, sorted(_DIRECTION_BY_PHRASE, key=len, reverse=True))))
+
+# أنماط استخراج تفاصيل العقار (عدد الغرف، المساحة، الطابق)
+_PROPERTY_ROOMS_RE = re.compile(r'(\d+) (?:غرف|غرفة|غرف نوم|غرفة نوم)')
+_PROPERTY_AREA_RE = re.compile(r'(?:مساحة|مساحته|مساحتها) (\d+)')
+_PROPERTY_FLOOR_RE = re.compile(r'(?:الطابق|دور|الدور) (?:ال)?(\d+|أرضي|ارضي|الأرضي|الارضي)')
+
+# أنماط استخراج عمر المستخدم بترتيب الأولوية
+_AGE_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'عمري (\d+)',
+    r'أنا (?:في|ب|بعمر) (\d+)',
+    r'عندي (\d+) (?:سنة|عام|سنه)',
+    r'انا (\d+) (?:سنة|عام|سنه)',
+))
+
+# أنماط استخراج المعلومات الشخصية (الأطفال، المساحة، الغرف، الحمامات)
+_CHILDREN_RE = re.compile(r'(\d+) (?:أولاد|اطفال|أطفال|ابناء|أبناء|اولاد|طفل|ابن|ولد)')
+_PERSON_AREA_RE = re.compile(r'مساحة (?:عقاري|العقار|المطلوبة|السكن|الشقة|البيت|المنزل)? (\d+)(?:م|م2|متر|متر مربع)?')
+_PERSON_ROOMS_RE = re.compile(r'(\d+) (?:غرف|غرفة)')
+_BATHROOMS_RE = re.compile(r'(\d+) (?:حمام|حمامات|دورة مياه|دورات مياه)')
+
+# أنماط طلب توصية بحي يحتوي على خصائص معينة (مثل "اقترح لي حي فيه مدارس")
+_SPECIAL_RECOMMENDATION_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'اقترح (?:لي|علي) حي (?:فيه|فيها|به|بها) ([\u0600-\u06FF\s]+)',
+    r'أقترح (?:لي|علي) حي (?:فيه|فيها|به|بها) ([\u0600-\u06FF\s]+)',
+    r'أريد حي (?:فيه|فيها|به|بها) ([\u0600-\u06FF\s]+)',
+    r'اريد حي (?:فيه|فيها|به|بها) ([\u0600-\u06FF\s]+)',
+    r'ابحث عن حي (?:فيه|فيها|به|بها) ([\u0600-\u06FF\s]+)',
+))
+
+# أنماط البحث عن سكن (مدمجة في نمط واحد لأن المطلوب معرفة وجود أي منها فقط)
+_HOUSING_REQUEST_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in (
+    r'(?:أبحث|ابحث) عن (?:سكن|شقة|فيلا|بيت|منزل|عقار)',
+    r'(?:أريد|اريد|أبغى|ابغى) (?:سكن|شقة|فيلا|بيت|منزل|عقار)',
+    r'(?:أبحث|ابحث) عن مكان للسكن',
+    r'(?:أريد|اريد|أبغى|ابغى) مكان للسكن',
+)))
+
+# كلمات عامة تدل على السكن
+_HOUSING_GENERIC_WORDS = ("سكن", "عقار", "منزل", "بيت", "شقة", "فيلا")
+
+# وجود رقم في الرسالة شرط لجميع أنماط الميزانية (فحص مسبق يتجاوز الأنماط عند غيابه)
+_DIGIT_RE = re.compile(r'\d')
+
+# أنماط الميزانية المختلفة بترتيب الأولوية
+_BUDGET_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'(?:ميزانية|الميزانية|ميزانيتي|ميزانيه|بحدود|بميزانية) (?:قدرها|مقدارها|تبلغ|حوالي|تقريبا|تقريباً)? (\d+(?:,\d+)?(?:\.\d+)?) (?:ريال|ألف|الف|مليون|ريال سعودي|ر.س)',
+    r'(\d+(?:,\d+)?(?:\.\d+)?) (?:ريال|ألف|الف|مليون|ريال سعودي|ر.س)',
+    r'(\d+(?:,\d+)?(?:\.\d+)?) (?:ميزانية|ميزانيتي)',
+    r'(?:أقصى|اقصى|الأقصى|الاقصى) (?:سعر|حد|ميزانية) (?:هو|هي)? (\d+(?:,\d+)?(?:\.\d+)?)',
+))
+
+def _freeze_analysis(value: Any) -> Any:
+    """
+    تحويل نتيجة التحليل إلى صورة غير قابلة للتعديل لتخزينها مؤقتاً.
+    
+    Args:
+        value: نتيجة التحليل أو أحد عناصرها
+        
+    Returns:
+        Any: القيمة بعد تحويل القواميس والقوائم والمجموعات إلى صور ثابتة
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze_analysis(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze_analysis(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+def _thaw_analysis(value: Any) -> Any:
+    """
+    إعادة بناء نتيجة تحليل قابلة للتعديل من صورتها الثابتة المخزنة مؤقتاً.
+    
+    Args:
+        value: الصورة الثابتة لنتيجة التحليل أو أحد عناصرها
+        
+    Returns:
+        Any: نسخة جديدة قابلة للتعديل
+    """
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw_analysis(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw_analysis(item) for item in value]
+    if isinstance(value, frozenset):
+        return set(value)
+    return value
+
 class QueryProcessor:
     """
     فئة لمعالجة استعلامات المستخدم وتحليلها وتصنيفها بشكل ذكي
@@ -22,6 +137,11 @@ class QueryProcessor:
         """
         self.available_neighborhoods = available_neighborhoods
         
+        # أسماء الأحياء بدون بادئة "حي" (تُنظف مرة واحدة بدلاً من كل رسالة)
+        self._clean_neighborhoods = tuple(
+            (neighborhood, neighborhood.replace("حي ", "").strip()) for neighborhood in available_neighborhoods
+        )
+        
         # التعبيرات النمطية للأحياء
         self.neighborhood_patterns = {
             'recommendation': [
@@ -119,10 +239,28 @@ class QueryProcessor:
         self.proximity_keywords = [
             "قريب من", "قريبة من", "بالقرب من", "جنب", "بجانب", "جوار", "بجوار", "حول"
         ]
+        
+        # نمط واحد لجميع عبارات القرب (الأطول أولاً حتى تُفضل "بجوار" على "جوار") يمسح الرسالة مرة واحدة
+        self._proximity_regex = re.compile(
+            "(?:" + "|".join(map(re.escape, sorted(self.proximity_keywords, key=len, reverse=True))) + ") ([^\\.،,]*)"
+        )
+        
+        # نمطان يمسحان الرسالة مرة واحدة بدلاً من فحص كل كلمة مفتاحية على حدة:
+        # الأول لكلمات البحث عن سكن، والثاني لأنواع العقار والمعاملات والكلمات العامة
+        self._housing_keyword_regex = re.compile("|".join(map(re.escape, self.housing_search_keywords)))
+        detail_keywords = [keyword for keywords in self.property_keywords.values() for keyword in keywords]
+        detail_keywords += [keyword for keywords in self.transaction_keywords.values() for keyword in keywords]
+        detail_keywords += _HOUSING_GENERIC_WORDS
+        self._housing_detail_regex = re.compile("|".join(map(re.escape, detail_keywords)))
+        
+        # ذاكرة مؤقتة (LRU) لنتائج التحليل بصورة ثابتة - التحليل حتمي لنفس الرسالة بعد إزالة المسافات الطرفية
+        self._analysis_cache: "OrderedDict[str, MappingProxyType]" = OrderedDict()
+        self._analysis_cache_lock = threading.Lock()
     
     def analyze_query(self, user_message: str) -> Dict[str, Any]:
         """
-        تحليل استعلام المستخدم وتحديد نوعه والمعلومات المستخرجة منه
+        تحليل استعلام المستخدم وتحديد نوعه والمعلومات المستخرجة منه.
+        تُخزن النتائج مؤقتاً بصورة ثابتة ويُعاد بناء نسخة منها حتى لا يؤثر تعديلها على الذاكرة المؤقتة.
         
         Args:
             user_message: استعلام المستخدم
@@ -133,6 +271,39 @@ class QueryProcessor:
         if not user_message:
             return {'query_type': 'unknown'}
         
+        # التحليل يعمل على الرسالة بعد إزالة المسافات الطرفية فقط، لذا تُستخدم مفتاحاً للذاكرة المؤقتة
+        clean_message = user_message.strip()
+        
+        with self._analysis_cache_lock:
+            cached = self._analysis_cache.get(clean_message)
+            if cached is not None:
+                self._analysis_cache.move_to_end(clean_message)
+        if cached is not None:
+            return _thaw_analysis(cached)
+        
+        result = self._analyze_query_uncached(user_message)
+        
+        # الصورة الثابتة لا تشارك أي حاوية مع النتيجة، فتُعاد النتيجة نفسها للمستدعي
+        with self._analysis_cache_lock:
+            self._analysis_cache[clean_message] = _freeze_analysis(result)
+            if len(self._analysis_cache) > _ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.popitem(last=False)
+        
+        return result
+    
+    def _analyze_query_uncached(self, user_message: str) -> Dict[str, Any]:
+        """
+        تنفيذ التحليل الفعلي لاستعلام المستخدم دون استخدام الذاكرة المؤقتة
+        
+        Args:
+            user_message: استعلام المستخدم
+            
+        Returns:
+            Dict[str, Any]: نتائج التحليل
+        """
+        if not user_message:
+            return {'query_type': 'unknown'}
+        
         result = {
             'query_type': 'unknown',
             'entities': {},
@@ -143,16 +314,8 @@ class QueryProcessor:
         clean_message = user_message.strip()
         
         # البحث عن أنماط معينة للطلبات بحي يحتوي على خصائص معينة
-        special_recommendation_patterns = [
-            r'اقترح (?:لي|علي) حي (?:فيه|فيها|به|بها) ([\u0600-\u06FF\s]+)',
-            r'أقترح (?:لي|علي) حي (?:فيه|فيها|به|بها) ([\u0600-\u06FF\s]+)',
-            r'أريد حي (?:فيه|فيها|به|بها) ([\u0600-\u06FF\s]+)',
-            r'اريد حي (?:فيه|فيها|به|بها) ([\u0600-\u06FF\s]+)',
-            r'ابحث عن حي (?:فيه|فيها|به|بها) ([\u0600-\u06FF\s]+)'
-        ]
-        
-        for pattern in special_recommendation_patterns:
-            match = re.search(pattern, clean_message)
+        for pattern in _SPECIAL_RECOMMENDATION_PATTERNS:
+            match = pattern.search(clean_message)
             if match:
                 # هذا طلب توصية حي مع خصائص معينة
                 logger.info(f"تم تحديد طلب توصية حي مع خصائص: {match.group(1)}")
@@ -314,35 +477,11 @@ class QueryProcessor:
         Returns:
             bool: صح إذا كان الاستعلام متعلقاً بالبحث عن سكن
         """
-        # البحث عن كلمات مفتاحية للبحث عن سكن
-        if any(keyword in message for keyword in self.housing_search_keywords):
-            # التحقق من وجود نوع عقار
-            for property_type, keywords in self.property_keywords.items():
-                if any(keyword in message for keyword in keywords):
-                    return True
-            
-            # التحقق من وجود كلمات إيجار أو تمليك
-            for transaction_type, keywords in self.transaction_keywords.items():
-                if any(keyword in message for keyword in keywords):
-                    return True
-            
-            # التحقق من وجود كلمة "سكن" أو "عقار" أو "منزل"
-            if any(word in message for word in ["سكن", "عقار", "منزل", "بيت", "شقة", "فيلا"]):
-                return True
-        
-        # أنماط للبحث عن سكن
-        housing_patterns = [
-            r'(?:أبحث|ابحث) عن (?:سكن|شقة|فيلا|بيت|منزل|عقار)',
-            r'(?:أريد|اريد|أبغى|ابغى) (?:سكن|شقة|فيلا|بيت|منزل|عقار)',
-            r'(?:أبحث|ابحث) عن مكان للسكن',
-            r'(?:أريد|اريد|أبغى|ابغى) مكان للسكن'
-        ]
+        # البحث عن كلمات مفتاحية للبحث عن سكن مع نوع عقار أو نوع معاملة أو كلمة سكن عامة
+        if self._housing_keyword_regex.search(message) and self._housing_detail_regex.search(message):
+            return True
         
-        for pattern in housing_patterns:
-            if re.search(pattern, message):
-                return True
-                
-        return False
+        return _HOUSING_REQUEST_RE.search(message) is not None
     
     def _extract_housing_info(self, message: str) -> Dict[str, Any]:
         """
@@ -369,17 +508,17 @@ class QueryProcessor:
                 break
         
         # استخراج عدد الغرف المطلوب
-        room_match = re.search(r'(\d+) (?:غرف|غرفة|غرف نوم|غرفة نوم)', message)
+        room_match = _PROPERTY_ROOMS_RE.search(message)
         if room_match:
             info['rooms'] = int(room_match.group(1))
         
         # استخراج المساحة المطلوبة
-        area_match = re.search(r'(?:مساحة|مساحته|مساحتها) (\d+)', message)
+        area_match = _PROPERTY_AREA_RE.search(message)
         if area_match:
             info['area'] = int(area_match.group(1))
         
         # استخراج الطابق المطلوب
-        floor_match = re.search(r'(?:الطابق|دور|الدور) (?:ال)?(\d+|أرضي|ارضي|الأرضي|الارضي)', message)
+        floor_match = _PROPERTY_FLOOR_RE.search(message)
         if floor_match:
             floor = floor_match.group(1)
             if floor in ['أرضي', 'ارضي', 'الأرضي', 'الارضي']:
@@ -399,24 +538,21 @@ class QueryProcessor:
         Returns:
             Optional[int]: الميزانية المستخرجة أو None إذا لم يتم العثور عليها
         """
-        # أنماط الميزانية المختلفة
-        budget_patterns = [
-            r'(?:ميزانية|الميزانية|ميزانيتي|ميزانيه|بحدود|بميزانية) (?:قدرها|مقدارها|تبلغ|حوالي|تقريبا|تقريباً)? (\d+(?:,\d+)?(?:\.\d+)?) (?:ريال|ألف|الف|مليون|ريال سعودي|ر.س)',
-            r'(\d+(?:,\d+)?(?:\.\d+)?) (?:ريال|ألف|الف|مليون|ريال سعودي|ر.س)',
-            r'(\d+(?:,\d+)?(?:\.\d+)?) (?:ميزانية|ميزانيتي)',
-            r'(?:أقصى|اقصى|الأقصى|الاقصى) (?:سعر|حد|ميزانية) (?:هو|هي)? (\d+(?:,\d+)?(?:\.\d+)?)'
-        ]
+        # جميع أنماط الميزانية تتطلب رقماً - لا حاجة لتجربتها إذا لم يوجد أي رقم
+        if not _DIGIT_RE.search(message):
+            return None
         
-        for pattern in budget_patterns:
-            match = re.search(pattern, message)
+        for pattern in _BUDGET_PATTERNS:
+            match = pattern.search(message)
             if match:
                 # معالجة القيمة المستخرجة
                 budget_str = match.group(1).replace(',', '')
+                matched_text = match.group(0)
                 
                 # تحديد الوحدة المستخدمة (ريال، ألف، مليون)
-                if 'ألف' in match.group(0) or 'الف' in match.group(0):
+                if 'ألف' in matched_text or 'الف' in matched_text:
                     multiplier = 1000
-                elif 'مليون' in match.group(0):
+                elif 'مليون' in matched_text:
                     multiplier = 1000000
                 else:
                     multiplier = 1
@@ -534,8 +670,7 @@ class QueryProcessor:
                         }
         
         # التحقق من وجود أي حي من القائمة في الرسالة
-        for neighborhood in self.available_neighborhoods:
-            clean_neighborhood = neighborhood.replace("حي ", "").strip()
+        for neighborhood, clean_neighborhood in self._clean_neighborhoods:
             if clean_neighborhood in message:
                 return {
                     'name': neighborhood,
@@ -558,13 +693,13 @@ class QueryProcessor:
         clean_name = neighborhood_name.replace("حي ", "").strip()
         
         # أولاً البحث عن تطابق دقيق
-        for neighborhood in self.available_neighborhoods:
-            if neighborhood.replace("حي ", "").strip() == clean_name:
+        for neighborhood, clean_neighborhood in self._clean_neighborhoods:
+            if clean_neighborhood == clean_name:
                 return neighborhood
         
         # ثم البحث عن تطابق جزئي
-        for neighborhood in self.available_neighborhoods:
-            if clean_name in neighborhood.replace("حي ", "").strip():
+        for neighborhood, clean_neighborhood in self._clean_neighborhoods:
+            if clean_name in clean_neighborhood:
                 return neighborhood
         
         return None
@@ -581,15 +716,9 @@ class QueryProcessor:
         """
         info = {}
         
-        # استخراج العمر
-        age_matches = [
-            re.search(r'عمري (\d+)', message),
-            re.search(r'أنا (?:في|ب|بعمر) (\d+)', message),
-            re.search(r'عندي (\d+) (?:سنة|عام|سنه)', message),
-            re.search(r'انا (\d+) (?:سنة|عام|سنه)', message)
-        ]
-        
-        for match in age_matches:
+        # استخراج العمر (التوقف عند أول نمط مطابق)
+        for pattern in _AGE_PATTERNS:
+            match = pattern.search(message)
             if match:
                 info['age'] = int(match.group(1))
                 break
@@ -608,44 +737,33 @@ class QueryProcessor:
                 break
         
         # استخراج عدد الأطفال
-        children_match = re.search(r'(\d+) (?:أولاد|اطفال|أطفال|ابناء|أبناء|اولاد|طفل|ابن|ولد)', message)
+        children_match = _CHILDREN_RE.search(message)
         if children_match:
             info['children'] = int(children_match.group(1))
         
         # استخراج المساحة المطلوبة
-        area_match = re.search(r'مساحة (?:عقاري|العقار|المطلوبة|السكن|الشقة|البيت|المنزل)? (\d+)(?:م|م2|متر|متر مربع)?', message)
+        area_match = _PERSON_AREA_RE.search(message)
         if area_match:
             info['area'] = int(area_match.group(1))
         
         # استخراج عدد الغرف
-        rooms_match = re.search(r'(\d+) (?:غرف|غرفة)', message)
+        rooms_match = _PERSON_ROOMS_RE.search(message)
         if rooms_match:
             info['rooms'] = int(rooms_match.group(1))
         
         # استخراج عدد الحمامات
-        bathroom_match = re.search(r'(\d+) (?:حمام|حمامات|دورة مياه|دورات مياه)', message)
+        bathroom_match = _BATHROOMS_RE.search(message)
         if bathroom_match:
             info['bathrooms'] = int(bathroom_match.group(1))
         
-        # استخراج المنطقة المفضلة
-        location_preferences = {
-            'شمال': ['شمال', 'الشمال', 'الشمالية', 'شمالية'],
-            'جنوب': ['جنوب', 'الجنوب', 'الجنوبية', 'جنوبية'],
-            'شرق': ['شرق', 'الشرق', 'الشرقية', 'شرقية'],
-            'غرب': ['غرب', 'الغرب', 'الغربية', 'غربية'],
-            'وسط': ['وسط', 'الوسط', 'المركز', 'المركزية']
-        }
-        
-        for location, keywords in location_preferences.items():
-            if any(f"في {keyword}" in message.lower() for keyword in keywords):
-                info['preferred_location'] = location
-                break
-            if any(f"منطقة {keyword}" in message.lower() for keyword in keywords):
-                info['preferred_location'] = location
-                break
-            if any(f"{keyword} المدينة" in message.lower() for keyword in keywords):
-                info['preferred_location'] = location
-                break
+        # استخراج المنطقة المفضلة (الاتجاه الأعلى أولوية من بين العبارات المذكورة في الرسالة)
+        location = min(
+            (_DIRECTION_BY_PHRASE[phrase] for phrase in _DIRECTION_RE.findall(message.lower())),
+            key=_DIRECTION_RANK.__getitem__,
+            default=None
+        )
+        if location:
+            info['preferred_location'] = location
         
         return info
     
@@ -661,27 +779,22 @@ class QueryProcessor:
         """
         facilities = []
         
-        # البحث عن كل عبارات القرب والمرافق المرتبطة بها
-        for proximity_phrase in self.proximity_keywords:
-            # بناء نمط للبحث عن "قريب من X" أو "بالقرب من X"
-            pattern = f"{proximity_phrase} ([^\\.،,]*)"
-            matches = re.finditer(pattern, message)
+        # البحث عن كل عبارات القرب والمرافق المرتبطة بها ("قريب من X" أو "بالقرب من X") في مسح واحد
+        for match in self._proximity_regex.finditer(message):
+            facility_text = match.group(1).strip()
             
-            for match in matches:
-                facility_text = match.group(1).strip()
-                
-                # تحديد نوع المرفق من النص
-                facility_type = None
-                for type_name, keywords in self.facility_keywords.items():
-                    if any(keyword in facility_text for keyword in keywords):
-                        facility_type = type_name
-                        break
-                
-                if facility_type:
-                    facilities.append({
-                        'text': facility_text,
-                        'type': facility_type
-                    })
+            # تحديد نوع المرفق من النص
+            facility_type = None
+            for type_name, keywords in self.facility_keywords.items():
+                if any(keyword in facility_text for keyword in keywords):
+                    facility_type = type_name
+                    break
+            
+            if facility_type:
+                facilities.append({
+                    'text': facility_text,
+                    'type': facility_type
+                })
         
         # البحث عن أسماء المرافق المباشرة
         for facility_type, keywords in self.facility_keywords.items():